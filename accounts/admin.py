@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Profile, Skill
+from .models import User, Profile, Skill, FreelancerStats
 
 
 @admin.register(User)
@@ -52,6 +52,16 @@ class ProfileAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(FreelancerStats)
+class FreelancerStatsAdmin(admin.ModelAdmin):
+    """Freelancer statistics admin interface."""
+    
+    list_display = ('user', 'total_bids', 'accepted_bids', 'completed_projects', 'total_earnings', 'updated_at')
+    search_fields = ('user__email', 'user__username')
+    readonly_fields = ('updated_at',)
+    ordering = ('-updated_at',)
+
+
 @admin.register(Skill)
 class SkillAdmin(admin.ModelAdmin):
     """Skill admin interface."""
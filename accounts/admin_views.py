@@ -142,6 +142,7 @@ def admin_project_list(request):
     paginator = Paginator(projects, 20)
     page_number = request.GET.get('page')
     projects = paginator.get_page(page_number)
+    Project.load_bid_counts(projects)
     
     context = {
         'projects': projects,
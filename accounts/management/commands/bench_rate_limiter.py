@@ -0,0 +1,51 @@
+import time
+
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from accounts import ratelimit
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the rate limiter's own overhead per request for the "
+        'in-process path, the shared-cache path and rejections.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100000, help='Checks per scenario')
+        parser.add_argument('--users', type=int, default=1000, help='Distinct users spread across the checks')
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        users = options['users']
+        factory = RequestFactory()
+        requests = []
+        for i in range(users):
+            request = factory.post('/bench/')
+            request.session = {SESSION_KEY: str(i)}
+            requests.append(request)
+        
+        roomy = ratelimit.Limit('bench', f'{count}/s', None, {}, ('POST',))
+        tight = ratelimit.Limit('bench-tight', '1/d', 1, {}, ('POST',))
+        
+        self.stdout.write(f'{count} checks over {users} users, cache backend {cache.__class__.__name__}')
+        self._run('no limit', requests, count, None, shared=False)
+        self._run('in-process only', requests, count, roomy, shared=False)
+        self._run('in-process + shared', requests, count, roomy, shared=True)
+        self._run('rejected (429)', requests, count, tight, shared=True)
+        
+        ratelimit.local_buckets.clear()
+
+    def _run(self, label, requests, count, limit, shared):
+        ratelimit.local_buckets.clear()
+        with override_settings(RATE_LIMIT_SHARED=shared):
+            started = time.perf_counter()
+            for i in range(count):
+                ratelimit.check(requests[i % len(requests)], limit)
+            elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'  {label:<22} {elapsed / count * 1e6:>8.2f} us/request  {count / elapsed:>10.0f} requests/s'
+        )
@@ -0,0 +1,63 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from accounts.models import FreelancerStats
+from bids.models import Bid
+from payments.models import Escrow
+
+
+class Command(BaseCommand):
+    help = 'Rebuild materialized freelancer statistics from bids and released escrows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Rows fetched per round trip while streaming bids',
+        )
+
+    def handle(self, *args, **options):
+        stats = defaultdict(lambda: {
+            'total_bids': 0,
+            'accepted_bids': 0,
+            'completed_projects': 0,
+            'total_earnings': Decimal('0'),
+            'response_time_sum': 0,
+            'delivery_days': defaultdict(int),
+        })
+        
+        rows = (
+            Bid.objects.exclude(status='withdrawn')
+            .values_list('freelancer_id', 'status', 'delivery_time', 'created_at', 'project__created_at')
+            .iterator(chunk_size=options['chunk_size'])
+        )
+        for freelancer_id, status, delivery_time, created_at, project_created_at in rows:
+            entry = stats[freelancer_id]
+            entry['total_bids'] += 1
+            if status == 'accepted':
+                entry['accepted_bids'] += 1
+            entry['response_time_sum'] += max(0, int((created_at - project_created_at).total_seconds()))
+            entry['delivery_days'][str(delivery_time)] += 1
+        
+        released = (
+            Escrow.objects.filter(status='released')
+            .values('freelancer_id')
+            .annotate(completed=Count('pk'), earned=Sum('amount'))
+        )
+        for row in released:
+            entry = stats[row['freelancer_id']]
+            entry['completed_projects'] = row['completed']
+            entry['total_earnings'] = row['earned']
+        
+        with transaction.atomic():
+            for user_id, values in stats.items():
+                values['delivery_days'] = dict(values['delivery_days'])
+                FreelancerStats.objects.update_or_create(user_id=user_id, defaults=values)
+            cleared, _ = FreelancerStats.objects.exclude(user_id__in=list(stats)).delete()
+        
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {len(stats)} freelancers; cleared {cleared}.'))
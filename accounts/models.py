@@ -1,5 +1,7 @@
+from decimal import Decimal
+
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 
@@ -85,6 +87,84 @@ class Profile(models.Model):
             self.save()
 
 
+class FreelancerStats(models.Model):
+    """Materialized performance figures for a freelancer's public profile.
+    
+    Maintained incrementally: bid counts, response time and delivery days
+    follow bids as they are placed, edited and retracted; accepted_bids
+    follows bid acceptance; earnings and completed projects follow escrow
+    release. delivery_days is a {days: bid count} histogram over live bids.
+    """
+    
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='freelancer_stats')
+    total_bids = models.PositiveIntegerField(default=0)
+    accepted_bids = models.PositiveIntegerField(default=0)
+    completed_projects = models.PositiveIntegerField(default=0)
+    total_earnings = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0'))
+    response_time_sum = models.PositiveBigIntegerField(default=0, help_text="Seconds from project posting to bid, summed over live bids")
+    delivery_days = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Freelancer Stats'
+        verbose_name_plural = 'Freelancer Stats'
+    
+    def __str__(self):
+        return f"Stats for {self.user.full_name}"
+    
+    @property
+    def win_rate(self):
+        """Percentage of live bids that were accepted."""
+        if not self.total_bids:
+            return None
+        return round(100 * self.accepted_bids / self.total_bids, 1)
+    
+    @property
+    def median_delivery_days(self):
+        remaining = sum(self.delivery_days.values()) // 2
+        for days in sorted(self.delivery_days, key=int):
+            remaining -= self.delivery_days[days]
+            if remaining < 0:
+                return int(days)
+        return None
+    
+    @property
+    def mean_response_hours(self):
+        if not self.total_bids:
+            return None
+        return round(self.response_time_sum / self.total_bids / 3600, 1)
+    
+    @classmethod
+    def record(cls, user_id, bids=0, accepted=0, completed=0, earnings=0,
+               response_seconds=0, delivery_added=(), delivery_removed=()):
+        """Apply changes to a freelancer's stats under a row lock.
+        
+        Counts and sums are deltas; delivery_added and delivery_removed are
+        iterables of delivery times in days.
+        """
+        with transaction.atomic():
+            stats, created = cls.objects.select_for_update().get_or_create(user_id=user_id)
+            stats.total_bids = max(0, stats.total_bids + bids)
+            stats.accepted_bids = max(0, stats.accepted_bids + accepted)
+            stats.completed_projects = max(0, stats.completed_projects + completed)
+            stats.total_earnings += Decimal(str(earnings))
+            stats.response_time_sum = max(0, stats.response_time_sum + int(response_seconds))
+            
+            histogram = dict(stats.delivery_days)
+            for days in delivery_removed:
+                key = str(int(days))
+                if histogram.get(key, 0) > 1:
+                    histogram[key] -= 1
+                else:
+                    histogram.pop(key, None)
+            for days in delivery_added:
+                key = str(int(days))
+                histogram[key] = histogram.get(key, 0) + 1
+            stats.delivery_days = histogram
+            stats.save()
+        return stats
+
+
 class Skill(models.Model):
     """Skills that can be assigned to freelancers."""
     
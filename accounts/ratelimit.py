@@ -0,0 +1,204 @@
+"""
+Per-user token-bucket rate limiting for write endpoints.
+
+Views opt in with the rate_limit decorator, which records the limit on the
+view. RateLimitMiddleware enforces it in process_view, before the view or
+its other decorators run. Without the middleware the decorator enforces the
+limit itself. Settings can override any view's limit or add limits for views
+that are not decorated:
+
+    RATE_LIMITS = {
+        'bids:create': {'rate': '20/h', 'burst': 5, 'roles': {'employer': '0/h'}},
+    }
+
+Keys are URL names. A rate is "<count>/<s|m|h|d>", and 0 blocks the action
+entirely. Buckets are keyed by the logged-in user id taken from the session,
+so a rejection does not load the user. Anonymous clients are keyed by IP
+address. The user is loaded only when the limit has per-role rates, and
+login_required needs it next anyway.
+
+Each process keeps its own buckets as a fast path. When
+RATE_LIMIT_SHARED is true (the default), admitted requests are also drawn
+from a bucket in the default cache, so nodes share one budget. The shared
+bucket is updated with get/set rather than an atomic compare-and-swap. Under
+heavy concurrency it can admit a few extra requests, but never rejects a
+request that is within the limit. A request rejected locally would also be
+rejected by the shared bucket, so it never reaches the cache.
+"""
+import threading
+import time
+from collections import namedtuple
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+CACHE_KEY_PREFIX = 'ratelimit'
+
+# Above this many buckets, idle ones are dropped from the in-process store
+MAX_LOCAL_BUCKETS = 10000
+
+Limit = namedtuple('Limit', 'scope rate burst roles methods')
+
+
+def parse_rate(rate):
+    """Turn '10/m' into (10, 60)."""
+    count, _, period = rate.partition('/')
+    return int(count), PERIODS[period[:1] or 's']
+
+
+def bucket_params(rate, burst=None):
+    """Return (capacity, tokens added per second) for a rate string."""
+    count, period = parse_rate(rate)
+    capacity = burst if burst is not None and count else count
+    return capacity, count / period
+
+
+def take(state, now, capacity, refill):
+    """Refill a (tokens, updated) bucket and try to spend one token.
+
+    Returns (allowed, new_state, seconds until the next token).
+    """
+    if state is None:
+        tokens = capacity
+    else:
+        tokens = min(capacity, state[0] + (now - state[1]) * refill)
+    if tokens >= 1:
+        return True, (tokens - 1, now), 0
+    if refill <= 0 or capacity < 1:
+        return False, (tokens, now), None
+    return False, (tokens, now), (1 - tokens) / refill
+
+
+class LocalBuckets:
+    """In-process token buckets guarded by one lock."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, refill, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            allowed, state, retry_after = take(self._buckets.get(key), now, capacity, refill)
+            self._buckets[key] = state
+            if len(self._buckets) > MAX_LOCAL_BUCKETS:
+                self._prune(now)
+        return allowed, retry_after
+
+    def refund(self, key):
+        with self._lock:
+            state = self._buckets.get(key)
+            if state is not None:
+                self._buckets[key] = (state[0] + 1, state[1])
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def _prune(self, now):
+        # Buckets untouched for a day are full again under any supported rate
+        stale = [key for key, (_, updated) in self._buckets.items() if now - updated > PERIODS['d']]
+        for key in stale:
+            del self._buckets[key]
+        if len(self._buckets) > MAX_LOCAL_BUCKETS:
+            self._buckets.clear()
+
+
+class CacheBuckets:
+    """Token buckets stored in the shared cache, one (tokens, updated) value per key."""
+
+    def consume(self, key, capacity, refill, now=None):
+        now = time.time() if now is None else now
+        cache_key = f'{CACHE_KEY_PREFIX}:{key}'
+        allowed, state, retry_after = take(cache.get(cache_key), now, capacity, refill)
+        # Keep the entry until the bucket would be full again
+        timeout = int((capacity - state[0]) / refill) + 1 if refill > 0 else PERIODS['d']
+        cache.set(cache_key, state, timeout)
+        return allowed, retry_after
+
+
+local_buckets = LocalBuckets()
+shared_buckets = CacheBuckets()
+
+
+def get_limit(scope, default=None):
+    """Return the effective Limit for a URL name, applying RATE_LIMITS overrides."""
+    override = getattr(settings, 'RATE_LIMITS', {}).get(scope)
+    if override is None:
+        return default
+    base = default or Limit(scope, None, None, {}, ('POST',))
+    return Limit(
+        scope,
+        override.get('rate', base.rate),
+        override.get('burst', base.burst),
+        {**base.roles, **override.get('roles', {})},
+        tuple(override.get('methods', base.methods)),
+    )
+
+
+def client_key(request, limit):
+    """Return (bucket identity, role) for a request without loading the user if possible."""
+    user_id = request.session.get(SESSION_KEY) if hasattr(request, 'session') else None
+    if user_id is None:
+        return f'ip:{request.META.get("REMOTE_ADDR", "")}', None
+    role = request.user.role if limit.roles else None
+    return f'user:{user_id}', role
+
+
+def check(request, limit):
+    """Spend a token for request under limit; return a 429 response or None."""
+    if limit is None or request.method not in limit.methods:
+        return None
+
+    identity, role = client_key(request, limit)
+    rate = limit.roles.get(role, limit.rate) if role else limit.rate
+    if rate is None:
+        return None
+    capacity, refill = bucket_params(rate, limit.burst)
+    key = f'{limit.scope}:{identity}'
+
+    allowed, retry_after = local_buckets.consume(key, capacity, refill)
+    if allowed and getattr(settings, 'RATE_LIMIT_SHARED', True):
+        allowed, retry_after = shared_buckets.consume(key, capacity, refill)
+        if not allowed:
+            local_buckets.refund(key)
+    if allowed:
+        return None
+    return too_many_requests(request, retry_after)
+
+
+def too_many_requests(request, retry_after):
+    """Build the 429 response, as JSON for AJAX callers."""
+    message = 'You are doing that too often. Please wait a moment and try again.'
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest' or 'application/json' in request.headers.get('accept', ''):
+        response = JsonResponse({'success': False, 'message': message}, status=429)
+    else:
+        response = HttpResponse(message, status=429, content_type='text/plain; charset=utf-8')
+    if retry_after is not None:
+        response['Retry-After'] = str(max(1, round(retry_after)))
+    return response
+
+
+def rate_limit(scope, rate=None, burst=None, roles=None, methods=('POST',)):
+    """
+    Decorator to limit how often each user can call a view.
+    Usage: @rate_limit('bids:create', rate='20/h', burst=5, roles={'employer': '0/h'})
+    """
+    default = Limit(scope, rate, burst, dict(roles or {}), tuple(methods))
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if not getattr(request, '_rate_limit_checked', False):
+                response = check(request, get_limit(scope, default))
+                if response is not None:
+                    return response
+            return view_func(request, *args, **kwargs)
+        _wrapped_view.rate_limit = default
+        return _wrapped_view
+    return decorator
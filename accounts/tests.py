@@ -0,0 +1,160 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from . import ratelimit
+from .models import User
+from .ratelimit import CacheBuckets, LocalBuckets, Limit, bucket_params, get_limit, take
+
+
+class TokenBucketTests(SimpleTestCase):
+    """accounts.ratelimit.take and bucket_params."""
+    
+    def test_bucket_params(self):
+        self.assertEqual(bucket_params('30/m'), (30, 0.5))
+        self.assertEqual(bucket_params('30/h', burst=5), (5, 30 / 3600))
+        # A zero rate ignores the burst so nothing is ever admitted
+        self.assertEqual(bucket_params('0/h', burst=5), (0, 0))
+    
+    def test_burst_then_refill(self):
+        capacity, refill = bucket_params('60/m', burst=3)
+        state = None
+        for _ in range(3):
+            allowed, state, retry_after = take(state, 100.0, capacity, refill)
+            self.assertTrue(allowed)
+        
+        allowed, state, retry_after = take(state, 100.0, capacity, refill)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 1.0)
+        
+        allowed, state, _ = take(state, 101.0, capacity, refill)
+        self.assertTrue(allowed)
+        self.assertFalse(take(state, 101.0, capacity, refill)[0])
+    
+    def test_refill_is_capped_at_capacity(self):
+        capacity, refill = bucket_params('60/m', burst=2)
+        _, state, _ = take(None, 0.0, capacity, refill)
+        results = []
+        for _ in range(3):
+            allowed, state, _ = take(state, 1000.0, capacity, refill)
+            results.append(allowed)
+        self.assertEqual(results, [True, True, False])
+    
+    def test_zero_rate_has_no_retry_after(self):
+        capacity, refill = bucket_params('0/h')
+        allowed, _, retry_after = take(None, 0.0, capacity, refill)
+        self.assertFalse(allowed)
+        self.assertIsNone(retry_after)
+
+
+class LocalBucketsTests(SimpleTestCase):
+    """The in-process bucket store."""
+    
+    def test_keys_have_separate_budgets(self):
+        buckets = LocalBuckets()
+        self.assertTrue(buckets.consume('a', 1, 0.1, now=0)[0])
+        self.assertFalse(buckets.consume('a', 1, 0.1, now=0)[0])
+        self.assertTrue(buckets.consume('b', 1, 0.1, now=0)[0])
+    
+    def test_refund_returns_a_token(self):
+        buckets = LocalBuckets()
+        buckets.consume('a', 1, 0.1, now=0)
+        buckets.refund('a')
+        self.assertTrue(buckets.consume('a', 1, 0.1, now=0)[0])
+        # Refunding an unknown key does not create a bucket
+        buckets.refund('missing')
+        self.assertNotIn('missing', buckets._buckets)
+    
+    def test_idle_buckets_are_pruned(self):
+        buckets = LocalBuckets()
+        with mock.patch.object(ratelimit, 'MAX_LOCAL_BUCKETS', 3):
+            buckets.consume('old', 1, 0.1, now=0)
+            for key in ('a', 'b', 'c'):
+                buckets.consume(key, 1, 0.1, now=ratelimit.PERIODS['d'] + 10)
+        self.assertEqual(set(buckets._buckets), {'a', 'b', 'c'})
+
+
+class CacheBucketsTests(SimpleTestCase):
+    """The shared bucket store in the default cache."""
+    
+    def setUp(self):
+        cache.clear()
+    
+    def test_instances_share_one_budget(self):
+        first, second = CacheBuckets(), CacheBuckets()
+        self.assertTrue(first.consume('k', 2, 0.01, now=0)[0])
+        self.assertTrue(second.consume('k', 2, 0.01, now=0)[0])
+        allowed, retry_after = first.consume('k', 2, 0.01, now=0)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 100)
+
+
+class GetLimitTests(SimpleTestCase):
+    """RATE_LIMITS overrides."""
+    
+    default = Limit('bids:create', '30/h', 10, {'employer': '0/h'}, ('POST',))
+    
+    def test_no_override_keeps_declared_limit(self):
+        self.assertIs(get_limit('bids:create', self.default), self.default)
+        self.assertIsNone(get_limit('bids:list'))
+    
+    @override_settings(RATE_LIMITS={'bids:create': {'burst': 2, 'roles': {'freelancer': '5/h'}}})
+    def test_override_merges_with_declared_limit(self):
+        limit = get_limit('bids:create', self.default)
+        self.assertEqual(limit.rate, '30/h')
+        self.assertEqual(limit.burst, 2)
+        self.assertEqual(limit.roles, {'employer': '0/h', 'freelancer': '5/h'})
+        self.assertEqual(limit.methods, ('POST',))
+    
+    @override_settings(RATE_LIMITS={'bids:list': {'rate': '5/m', 'methods': ['GET']}})
+    def test_override_limits_an_undecorated_view(self):
+        self.assertEqual(get_limit('bids:list'), Limit('bids:list', '5/m', None, {}, ('GET',)))
+
+
+@override_settings(RATE_LIMIT_SHARED=True)
+class RateLimitViewTests(TestCase):
+    """Limits enforced on a decorated view (messaging:presence_heartbeat, 10/m with a burst of 5)."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reporter', 'reporter@example.com', None, role='freelancer')
+    
+    def setUp(self):
+        cache.clear()
+        ratelimit.local_buckets.clear()
+        self.client.force_login(self.user)
+        self.url = reverse('messaging:presence_heartbeat')
+    
+    def test_burst_is_admitted_then_429_with_retry_after(self):
+        for _ in range(5):
+            self.assertEqual(self.client.post(self.url).status_code, 204)
+        
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '6')
+    
+    def test_get_requests_are_not_limited(self):
+        for _ in range(8):
+            self.assertEqual(self.client.get(self.url).status_code, 405)
+    
+    def test_ajax_callers_get_json(self):
+        for _ in range(5):
+            self.client.post(self.url)
+        response = self.client.post(self.url, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(response.json()['success'])
+    
+    def test_shared_bucket_limits_across_processes(self):
+        for _ in range(5):
+            self.client.post(self.url)
+        # Another node has its own, still full, local buckets
+        ratelimit.local_buckets.clear()
+        self.assertEqual(self.client.post(self.url).status_code, 429)
+    
+    @override_settings(RATE_LIMITS={'messaging:presence_heartbeat': {'roles': {'freelancer': '0/h'}}})
+    def test_role_override_blocks_the_action(self):
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(response.has_header('Retry-After'))
@@ -5,7 +5,7 @@ from django.contrib import messages
 from django.db import transaction
 from django.core.paginator import Paginator
 from django.db.models import Q, Count
-from .models import User, Profile
+from .models import User, Profile, FreelancerStats
 from projects.models import Project
 from bids.models import Bid
 from payments.models import Wallet, Transaction
@@ -25,8 +25,9 @@ def admin_redirect(request):
 
 def home(request):
     """Home page with featured projects and statistics."""
-    featured_projects = Project.objects.filter(is_featured=True, status='open')[:6]
-    recent_projects = Project.objects.filter(status='open').order_by('-created_at')[:6]
+    featured_projects = list(Project.objects.filter(is_featured=True, status='open')[:6])
+    recent_projects = list(Project.objects.filter(status='open').order_by('-created_at')[:6])
+    Project.load_bid_counts(featured_projects + recent_projects)
     
     # Statistics
     total_projects = Project.objects.filter(status='open').count()
@@ -133,7 +134,8 @@ def dashboard(request):
     if user.role == 'freelancer':
         # Freelancer dashboard
         my_bids = Bid.objects.filter(freelancer=user).order_by('-created_at')[:5]
-        available_projects = Project.objects.filter(status='open').order_by('-created_at')[:5]
+        available_projects = list(Project.objects.filter(status='open').select_related('category').order_by('-created_at')[:5])
+        Project.load_bid_counts(available_projects)
         recent_notifications = Notification.objects.filter(user=user).order_by('-created_at')[:5]
         
         context = {
@@ -145,7 +147,8 @@ def dashboard(request):
     
     elif user.role == 'employer':
         # Employer dashboard
-        my_projects = Project.objects.filter(employer=user).order_by('-created_at')[:5]
+        my_projects = list(Project.objects.filter(employer=user).select_related('category').order_by('-created_at')[:5])
+        Project.load_bid_counts(my_projects)
         recent_bids = Bid.objects.filter(project__employer=user).order_by('-created_at')[:5]
         recent_notifications = Notification.objects.filter(user=user).order_by('-created_at')[:5]
         
@@ -229,19 +232,28 @@ def user_profile_view(request, user_id):
     user = get_object_or_404(User, id=user_id)
     profile = get_object_or_404(Profile, user=user)
     
-    # Get user's projects and bids based on role
+    # Summary figures come from a materialized record; only one page of
+    # recent activity is loaded
+    stats = None
     if user.role == 'freelancer':
-        projects = Project.objects.filter(bids__freelancer=user).distinct()
-        bids = Bid.objects.filter(freelancer=user)
+        stats = FreelancerStats.objects.filter(user=user).first() or FreelancerStats(user=user)
+        activity = Bid.objects.filter(freelancer=user).select_related('project').order_by('-created_at')
+        # Bid terms are private to the freelancer and the project's employer;
+        # everyone else only sees the work the freelancer has won
+        if request.user != user:
+            activity = activity.filter(status='accepted')
     else:
-        projects = Project.objects.filter(employer=user)
-        bids = Bid.objects.filter(project__employer=user)
+        activity = Project.objects.filter(employer=user).order_by('-created_at')
+    
+    paginator = Paginator(activity, 6)
+    page_obj = paginator.get_page(request.GET.get('page'))
     
     context = {
         'profile_user': user,
         'profile': profile,
-        'projects': projects,
-        'bids': bids,
+        'stats': stats,
+        'page_obj': page_obj,
+        'is_own_profile': request.user == user,
     }
     return render(request, 'accounts/user_profile.html', context)
 
@@ -1,13 +1,13 @@
 from django.contrib import admin
-from .models import Bid, BidAttachment, BidMessage
+from .models import Bid, BidAttachment, BidMessage, BidRevision, ProjectBidStats, BidPriceQuantiles
 
 
 @admin.register(Bid)
 class BidAdmin(admin.ModelAdmin):
     """Bid admin interface."""
     
-    list_display = ('freelancer', 'project', 'amount', 'delivery_time', 'status', 'is_featured', 'created_at')
-    list_filter = ('status', 'is_featured', 'created_at')
+    list_display = ('freelancer', 'project', 'amount', 'delivery_time', 'status', 'is_featured', 'is_shortlisted', 'created_at')
+    list_filter = ('status', 'is_featured', 'is_shortlisted', 'created_at')
     search_fields = ('freelancer__email', 'freelancer__first_name', 'freelancer__last_name', 'project__title', 'proposal')
     readonly_fields = ('created_at', 'updated_at', 'accepted_at')
     ordering = ('-created_at',)
@@ -17,7 +17,7 @@ class BidAdmin(admin.ModelAdmin):
             'fields': ('project', 'freelancer', 'amount', 'delivery_time', 'proposal')
         }),
         ('Status', {
-            'fields': ('status', 'is_featured')
+            'fields': ('status', 'is_featured', 'is_shortlisted')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at', 'accepted_at'),
@@ -45,3 +45,32 @@ class BidMessageAdmin(admin.ModelAdmin):
     search_fields = ('bid__project__title', 'sender__email', 'message')
     ordering = ('-created_at',)
 
+
+
+@admin.register(BidRevision)
+class BidRevisionAdmin(admin.ModelAdmin):
+    """Bid revision admin interface."""
+    
+    list_display = ('bid', 'number', 'amount', 'delivery_time', 'proposal_changed', 'created_at')
+    search_fields = ('bid__project__title', 'bid__freelancer__email')
+    readonly_fields = ('created_at',)
+    ordering = ('-created_at',)
+
+
+@admin.register(ProjectBidStats)
+class ProjectBidStatsAdmin(admin.ModelAdmin):
+    """Project bid statistics admin interface."""
+    
+    list_display = ('project', 'bid_count', 'amount_min', 'amount_max', 'updated_at')
+    search_fields = ('project__title',)
+    readonly_fields = ('updated_at',)
+    ordering = ('-updated_at',)
+
+
+@admin.register(BidPriceQuantiles)
+class BidPriceQuantilesAdmin(admin.ModelAdmin):
+    """Bid price quantile table admin interface."""
+    
+    list_display = ('category', 'experience_level', 'sample_size', 'computed_at')
+    list_filter = ('experience_level',)
+    readonly_fields = ('computed_at',)
@@ -0,0 +1,135 @@
+"""
+Near-duplicate proposal detection at bid submission.
+
+Every proposal is fingerprinted with SimHash and its bands are written to
+ProposalFingerprint. A new proposal is compared only against index rows
+that share one of its bands and were created within WINDOW, which is a
+handful of indexed lookups however many bids exist. Matches are flagged
+for moderator review as reports.Report rows with no reporter.
+"""
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from reports.models import Report
+from .models import Bid, ProposalFingerprint
+from . import simhash
+
+# Only proposals this recent are compared
+WINDOW = timedelta(days=30)
+
+# Upper bound on candidate rows read for one lookup; the newest are kept
+MAX_CANDIDATES = 1000
+
+# Shorter proposals are neither screened nor indexed: stock one-liners
+# ("I can do this, please check my profile") match across freelancers
+# without being copies
+MIN_PROPOSAL_WORDS = 20
+
+# A freelancer reusing one proposal on this many other projects is flagged.
+# Any near-copy of another freelancer's proposal is flagged immediately.
+REUSE_THRESHOLD = 3
+
+REPORT_TITLE = 'Near-duplicate bid proposal'
+
+
+def proposal_fingerprint(text):
+    """SimHash of a proposal, or 0 if it is too short to screen."""
+    if len(simhash.words(text)) < MIN_PROPOSAL_WORDS:
+        return 0
+    return simhash.fingerprint(text)
+
+
+def fingerprint_rows(bid_id, freelancer_id, value, created_at):
+    """Unsaved band rows for a fingerprint; none for 0."""
+    if value == 0:
+        return []
+    signed = simhash.to_signed(value)
+    return [
+        ProposalFingerprint(
+            bid_id=bid_id,
+            freelancer_id=freelancer_id,
+            band=band,
+            value=band_value,
+            simhash=signed,
+            created_at=created_at,
+        )
+        for band, band_value in enumerate(simhash.bands(value))
+    ]
+
+
+def index_proposal(bid, value=None):
+    """Store the fingerprint of bid.proposal and replace its band rows."""
+    if value is None:
+        value = proposal_fingerprint(bid.proposal)
+    signed = simhash.to_signed(value)
+
+    Bid.objects.filter(pk=bid.pk).update(proposal_simhash=signed)
+    bid.proposal_simhash = signed
+    ProposalFingerprint.objects.filter(bid=bid).delete()
+    ProposalFingerprint.objects.bulk_create(
+        fingerprint_rows(bid.pk, bid.freelancer_id, value, bid.created_at or timezone.now())
+    )
+
+
+def find_near_duplicates(bid, value):
+    """Return [(bid_id, freelancer_id, distance)] for recent near-duplicates of value."""
+    if value == 0:
+        return []
+
+    match_band = Q()
+    for band, band_value in enumerate(simhash.bands(value)):
+        match_band |= Q(band=band, value=band_value)
+    rows = (
+        ProposalFingerprint.objects.filter(match_band, created_at__gte=timezone.now() - WINDOW)
+        .exclude(bid_id=bid.pk)
+        .order_by('-created_at')
+        .values_list('bid_id', 'freelancer_id', 'simhash')[:MAX_CANDIDATES]
+    )
+
+    matches = {}
+    for bid_id, freelancer_id, other in rows:
+        d = simhash.distance(value, simhash.from_signed(other))
+        if d <= simhash.MAX_DISTANCE:
+            matches[bid_id] = (bid_id, freelancer_id, d)
+    return list(matches.values())
+
+
+def screen_proposal(bid):
+    """Fingerprint a saved bid's proposal and flag it if it is a near-duplicate.
+
+    Returns the Report raised, or None.
+    """
+    value = proposal_fingerprint(bid.proposal)
+    matches = find_near_duplicates(bid, value)
+    index_proposal(bid, value)
+
+    own = [m for m in matches if m[1] == bid.freelancer_id]
+    copied = [m for m in matches if m[1] != bid.freelancer_id]
+    if not copied and len(own) < REUSE_THRESHOLD:
+        return None
+
+    if Report.objects.filter(bid=bid, reporter__isnull=True, status='pending', title=REPORT_TITLE).exists():
+        return None
+
+    lines = []
+    if own:
+        lines.append(
+            f'The freelancer sent a near-identical proposal on {len(own)} other recent bid(s): '
+            + ', '.join(f'#{bid_id}' for bid_id, _, _ in own)
+        )
+    if copied:
+        lines.append(
+            'Near-identical to proposals by other freelancers on bid(s): '
+            + ', '.join(f'#{bid_id} (user {freelancer_id})' for bid_id, freelancer_id, _ in copied)
+        )
+    return Report.objects.create(
+        reporter=None,
+        reported_user_id=bid.freelancer_id,
+        project_id=bid.project_id,
+        bid=bid,
+        report_type='spam',
+        title=REPORT_TITLE,
+        description='\n'.join(lines),
+    )
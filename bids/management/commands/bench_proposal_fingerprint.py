@@ -0,0 +1,56 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from bids import simhash
+from bids.models import Bid
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure proposal fingerprinting throughput, using recent bid '
+        'proposals or generated text when there are too few.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--proposals', type=int, default=2000, help='Proposals to fingerprint')
+        parser.add_argument('--words', type=int, default=150, help='Words per generated proposal')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed passes; the best is reported')
+
+    def handle(self, *args, **options):
+        count = options['proposals']
+        texts = list(Bid.objects.order_by('-pk').values_list('proposal', flat=True)[:count])
+        source = 'recent bids'
+        if len(texts) < count:
+            texts = self._generate(count, options['words'])
+            source = 'generated'
+        total_bytes = sum(len(text.encode()) for text in texts)
+        self.stdout.write(
+            f'{len(texts)} proposals ({source}), {total_bytes / len(texts):.0f} bytes average'
+        )
+        
+        best = None
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            values = [simhash.fingerprint(text) for text in texts]
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        self.stdout.write(
+            f'  fingerprint  {len(texts) / best:>10.0f} proposals/s  '
+            f'{total_bytes / best / 1e6:>6.2f} MB/s  '
+            f'{best / len(texts) * 1e6:>8.1f} us/proposal'
+        )
+        
+        # Comparing a candidate is a band split plus a popcount
+        started = time.perf_counter()
+        for value in values:
+            simhash.bands(value)
+            simhash.distance(value, values[0])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'  band+compare {len(values) / elapsed:>10.0f} proposals/s')
+
+    def _generate(self, count, words):
+        rng = random.Random(0)
+        vocabulary = [f'word{i}' for i in range(5000)]
+        return [' '.join(rng.choice(vocabulary) for _ in range(words)) for _ in range(count)]
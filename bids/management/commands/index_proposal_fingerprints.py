@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from bids import simhash
+from bids.duplicates import WINDOW, fingerprint_rows, proposal_fingerprint
+from bids.models import Bid, ProposalFingerprint
+
+
+class Command(BaseCommand):
+    help = (
+        'Fingerprint recent bid proposals into the near-duplicate index and '
+        'drop index rows older than the comparison window. Does not raise reports.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Bids fingerprinted per transaction',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - WINDOW
+        pruned, _ = ProposalFingerprint.objects.filter(created_at__lt=cutoff).delete()
+        
+        rows = (
+            Bid.objects.filter(created_at__gte=cutoff)
+            .order_by('pk')
+            .values_list('pk', 'freelancer_id', 'proposal', 'created_at')
+            .iterator(chunk_size=options['chunk_size'])
+        )
+        indexed = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= options['chunk_size']:
+                indexed += self._index(batch)
+                batch = []
+        if batch:
+            indexed += self._index(batch)
+        
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} proposals; pruned {pruned} stale index rows.'))
+
+    def _index(self, batch):
+        fingerprints = []
+        signed_by_bid = {}
+        for pk, freelancer_id, proposal, created_at in batch:
+            value = proposal_fingerprint(proposal)
+            signed_by_bid[pk] = simhash.to_signed(value)
+            fingerprints.extend(fingerprint_rows(pk, freelancer_id, value, created_at))
+        
+        with transaction.atomic():
+            ProposalFingerprint.objects.filter(bid_id__in=signed_by_bid).delete()
+            ProposalFingerprint.objects.bulk_create(fingerprints)
+            bids = [Bid(pk=pk, proposal_simhash=signed) for pk, signed in signed_by_bid.items()]
+            Bid.objects.bulk_update(bids, ['proposal_simhash'])
+        return len(batch)
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from bids.models import Bid, ProjectBidStats
+from bids.sketch import QuantileSketch
+
+
+class Command(BaseCommand):
+    help = 'Rebuild materialized per-project bid statistics in one streaming pass over bids'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Rows fetched per round trip while streaming bids',
+        )
+
+    def handle(self, *args, **options):
+        rows = (
+            Bid.objects.exclude(status='withdrawn')
+            .order_by('project_id')
+            .values_list('project_id', 'amount', 'delivery_time')
+            .iterator(chunk_size=options['chunk_size'])
+        )
+        
+        rebuilt = 0
+        current = None
+        for project_id, amount, delivery_time in rows:
+            if current is None or current.project_id != project_id:
+                if current is not None:
+                    self._save(current, sketch)
+                    rebuilt += 1
+                current = ProjectBidStats(project_id=project_id)
+                sketch = QuantileSketch()
+            current.bid_count += 1
+            current.amount_sum += amount
+            current.delivery_time_sum += delivery_time
+            sketch.add(amount)
+            if current.amount_min is None or amount < current.amount_min:
+                current.amount_min = amount
+            if current.amount_max is None or amount > current.amount_max:
+                current.amount_max = amount
+        if current is not None:
+            self._save(current, sketch)
+            rebuilt += 1
+        
+        # Projects whose last live bid went away keep no stats row
+        with_bids = Bid.objects.exclude(status='withdrawn').values('project_id')
+        cleared, _ = ProjectBidStats.objects.exclude(project_id__in=with_bids).delete()
+        
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt bid stats for {rebuilt} projects; cleared {cleared}.'))
+
+    def _save(self, stats, sketch):
+        stats.sketch = sketch.to_dict()
+        with transaction.atomic():
+            ProjectBidStats.objects.update_or_create(
+                project_id=stats.project_id,
+                defaults={
+                    'bid_count': stats.bid_count,
+                    'amount_sum': stats.amount_sum,
+                    'amount_min': stats.amount_min,
+                    'amount_max': stats.amount_max,
+                    'delivery_time_sum': stats.delivery_time_sum,
+                    'sketch': stats.sketch,
+                },
+            )
@@ -0,0 +1,89 @@
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from bids.models import Bid, BidPriceQuantiles
+from bids.pricing import RATIO_BINS, RATIO_MAX, histogram_quantiles, invalidate_price_table
+from projects.models import Category, Project
+
+LEVELS = [level for level, _ in Project._meta.get_field('experience_level').choices]
+
+
+class Command(BaseCommand):
+    help = 'Rebuild bid price quantile tables from accepted bids in one streaming pass'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Bids binned per NumPy batch',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        category_ids = list(Category.objects.order_by('id').values_list('id', flat=True))
+        category_index = {category_id: i for i, category_id in enumerate(category_ids)}
+        level_index = {level: i for i, level in enumerate(LEVELS)}
+        
+        # counts[category, level, bin]
+        counts = np.zeros((len(category_ids), len(LEVELS), RATIO_BINS), dtype=np.int64)
+        rows = (
+            Bid.objects.filter(status='accepted')
+            .values_list('project__category_id', 'project__experience_level', 'amount',
+                         'project__budget_min', 'project__budget_max')
+            .iterator(chunk_size=chunk_size)
+        )
+        
+        seen = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                seen += self._bin(batch, counts, category_index, level_index)
+                batch = []
+        seen += self._bin(batch, counts, category_index, level_index)
+        
+        tables = []
+        for c, category_id in enumerate(category_ids):
+            for l, level in enumerate(LEVELS):
+                tables.append((category_id, level, counts[c, l]))
+            tables.append((category_id, '', counts[c].sum(axis=0)))
+        for l, level in enumerate(LEVELS):
+            tables.append((None, level, counts[:, l].sum(axis=0)))
+        tables.append((None, '', counts.sum(axis=(0, 1))))
+        
+        records = [
+            BidPriceQuantiles(
+                category_id=category_id,
+                experience_level=level,
+                sample_size=int(histogram.sum()),
+                quantiles=histogram_quantiles(histogram),
+            )
+            for category_id, level, histogram in tables
+            if histogram.sum()
+        ]
+        with transaction.atomic():
+            BidPriceQuantiles.objects.all().delete()
+            BidPriceQuantiles.objects.bulk_create(records)
+        invalidate_price_table()
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Binned {seen} accepted bids into {len(records)} quantile tables.'
+        ))
+
+    def _bin(self, batch, counts, category_index, level_index):
+        """Add one batch of bids to the histograms; returns bids counted."""
+        if not batch:
+            return 0
+        category_ids, levels, amounts, budget_min, budget_max = zip(*batch)
+        c = np.array([category_index.get(category_id, -1) for category_id in category_ids])
+        l = np.array([level_index.get(level, -1) for level in levels])
+        amounts = np.array(amounts, dtype=float)
+        midpoints = (np.array(budget_min, dtype=float) + np.array(budget_max, dtype=float)) / 2
+        
+        valid = (c >= 0) & (l >= 0) & (midpoints > 0)
+        ratios = amounts[valid] / midpoints[valid]
+        bins = np.clip((ratios / RATIO_MAX * RATIO_BINS).astype(np.int64), 0, RATIO_BINS - 1)
+        np.add.at(counts, (c[valid], l[valid], bins), 1)
+        return int(valid.sum())
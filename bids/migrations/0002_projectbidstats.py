@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:22
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bids', '0001_initial'),
+        ('projects', '0004_projectbidcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectBidStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bid_count', models.PositiveIntegerField(default=0)),
+                ('amount_sum', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14)),
+                ('amount_min', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('amount_max', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('delivery_time_sum', models.PositiveIntegerField(default=0)),
+                ('sketch', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='bid_stats', to='projects.project')),
+            ],
+            options={
+                'verbose_name': 'Project Bid Stats',
+                'verbose_name_plural': 'Project Bid Stats',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bids', '0002_projectbidstats'),
+        ('projects', '0004_projectbidcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BidPriceQuantiles',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('experience_level', models.CharField(blank=True, max_length=20)),
+                ('sample_size', models.PositiveIntegerField(default=0)),
+                ('quantiles', models.JSONField(default=list)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='bid_price_quantiles', to='projects.category')),
+            ],
+            options={
+                'verbose_name': 'Bid Price Quantiles',
+                'verbose_name_plural': 'Bid Price Quantiles',
+                'unique_together': {('category', 'experience_level')},
+            },
+        ),
+    ]
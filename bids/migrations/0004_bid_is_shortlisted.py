@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bids', '0003_bidpricequantiles'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bid',
+            name='is_shortlisted',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bids', '0005_bid_proposal_simhash_proposalfingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BidRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('delivery_time', models.PositiveIntegerField(blank=True, null=True)),
+                ('proposal_changed', models.BooleanField(default=False)),
+                ('proposal_delta', models.JSONField(blank=True, null=True)),
+                ('proposal_snapshot', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('bid', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='bids.bid')),
+            ],
+            options={
+                'ordering': ['-number'],
+                'unique_together': {('bid', 'number')},
+            },
+        ),
+    ]
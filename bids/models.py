@@ -1,8 +1,13 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
+from django.db.models import Max, Min
 from django.utils import timezone
 
+from .sketch import QuantileSketch
+
 User = get_user_model()
 
 
@@ -27,6 +32,8 @@ class Bid(models.Model):
     # Status and metadata
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     is_featured = models.BooleanField(default=False)
+    is_shortlisted = models.BooleanField(default=False)
+    proposal_simhash = models.BigIntegerField(null=True, blank=True, editable=False)
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -41,14 +48,14 @@ class Bid(models.Model):
         return f"{self.freelancer.full_name} - {self.project.title} (${self.amount})"
     
     def accept(self):
-        """Accept the bid."""
-        self.status = 'accepted'
-        self.accepted_at = timezone.now()
-        self.save()
+        """Accept the bid on behalf of the project's employer.
         
-        # Update project status
-        self.project.status = 'in_progress'
-        self.project.save()
+        See bids.services.accept_bid for the full transactional workflow.
+        """
+        from .services import accept_bid
+        accepted = accept_bid(self, self.project.employer)
+        self.status = accepted.status
+        self.accepted_at = accepted.accepted_at
     
     def reject(self):
         """Reject the bid."""
@@ -93,3 +100,199 @@ class BidMessage(models.Model):
     def __str__(self):
         return f"{self.sender.full_name} - {self.bid.project.title}"
 
+
+
+class BidRevision(models.Model):
+    """One edit of a bid, stored compactly; see bids.revisions.
+    
+    amount and delivery_time hold the values before the edit, or null if the
+    edit left them unchanged. The proposal before the edit is stored either
+    as proposal_delta against the edited text or in full as proposal_snapshot.
+    """
+    
+    bid = models.ForeignKey(Bid, on_delete=models.CASCADE, related_name='revisions')
+    number = models.PositiveIntegerField()
+    amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    delivery_time = models.PositiveIntegerField(null=True, blank=True)
+    proposal_changed = models.BooleanField(default=False)
+    proposal_delta = models.JSONField(null=True, blank=True)
+    proposal_snapshot = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['bid', 'number']
+        ordering = ['-number']
+    
+    def __str__(self):
+        return f"Revision {self.number} of bid {self.bid_id}"
+    
+    @classmethod
+    def record(cls, bid, previous_amount, previous_delivery_time, previous_proposal):
+        """Append a revision for an edit already saved on bid, with one INSERT.
+        
+        The caller must hold a select_for_update lock on the bid row, so the
+        next revision number cannot be taken by a concurrent edit. Returns the
+        revision, or None if the edit changed nothing.
+        """
+        from . import revisions
+        
+        amount_changed = Decimal(str(previous_amount)) != Decimal(str(bid.amount))
+        delivery_changed = int(previous_delivery_time) != int(bid.delivery_time)
+        proposal_changed = previous_proposal != bid.proposal
+        if not (amount_changed or delivery_changed or proposal_changed):
+            return None
+        
+        last = cls.objects.filter(bid=bid).order_by('-number').values_list('number', flat=True).first()
+        number = (last or 0) + 1
+        revision = cls(
+            bid=bid,
+            number=number,
+            amount=previous_amount if amount_changed else None,
+            delivery_time=previous_delivery_time if delivery_changed else None,
+            proposal_changed=proposal_changed,
+        )
+        if revisions.is_snapshot(number):
+            revision.proposal_snapshot = previous_proposal
+        else:
+            revision.proposal_delta = revisions.make_delta(bid.proposal, previous_proposal) if proposal_changed else []
+        revision.save(force_insert=True)
+        return revision
+
+
+class ProjectBidStats(models.Model):
+    """Materialized bid price and delivery statistics for a project.
+    
+    Covers live (non-withdrawn) bids and is maintained incrementally as bids
+    are created, edited, withdrawn and deleted, so pages never aggregate
+    over Bid. Median and p90 come from a QuantileSketch stored in sketch.
+    """
+    
+    project = models.OneToOneField('projects.Project', on_delete=models.CASCADE, related_name='bid_stats')
+    bid_count = models.PositiveIntegerField(default=0)
+    amount_sum = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0'))
+    amount_min = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    amount_max = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    delivery_time_sum = models.PositiveIntegerField(default=0)
+    sketch = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Project Bid Stats'
+        verbose_name_plural = 'Project Bid Stats'
+    
+    def __str__(self):
+        return f"Bid stats for project {self.project_id} ({self.bid_count} bids)"
+    
+    @property
+    def mean_amount(self):
+        if not self.bid_count:
+            return None
+        return (self.amount_sum / self.bid_count).quantize(Decimal('0.01'))
+    
+    @property
+    def median_amount(self):
+        value = QuantileSketch(self.sketch).quantile(0.5)
+        return None if value is None else Decimal(value).quantize(Decimal('0.01'))
+    
+    @property
+    def p90_amount(self):
+        value = QuantileSketch(self.sketch).quantile(0.9)
+        return None if value is None else Decimal(value).quantize(Decimal('0.01'))
+    
+    @property
+    def mean_delivery_time(self):
+        if not self.bid_count:
+            return None
+        return round(self.delivery_time_sum / self.bid_count, 1)
+    
+    @classmethod
+    def record(cls, project_id, added=(), removed=()):
+        """Apply bid changes to a project's stats under a row lock.
+        
+        added and removed are iterables of (amount, delivery_time) pairs; an
+        edit removes the old pair and adds the new one.
+        """
+        with transaction.atomic():
+            stats, created = cls.objects.select_for_update().get_or_create(project_id=project_id)
+            sketch = QuantileSketch(stats.sketch)
+            extremes_stale = False
+            
+            for amount, delivery_time in removed:
+                amount = Decimal(str(amount))
+                stats.bid_count = max(0, stats.bid_count - 1)
+                stats.amount_sum -= amount
+                stats.delivery_time_sum = max(0, stats.delivery_time_sum - int(delivery_time))
+                sketch.remove(amount)
+                if amount in (stats.amount_min, stats.amount_max):
+                    extremes_stale = True
+            
+            for amount, delivery_time in added:
+                amount = Decimal(str(amount))
+                stats.bid_count += 1
+                stats.amount_sum += amount
+                stats.delivery_time_sum += int(delivery_time)
+                sketch.add(amount)
+                if stats.amount_min is None or amount < stats.amount_min:
+                    stats.amount_min = amount
+                if stats.amount_max is None or amount > stats.amount_max:
+                    stats.amount_max = amount
+            
+            if extremes_stale:
+                # Only removing the current min or max needs a scan
+                extremes = Bid.objects.filter(project_id=project_id).exclude(status='withdrawn').aggregate(
+                    low=Min('amount'), high=Max('amount'),
+                )
+                stats.amount_min, stats.amount_max = extremes['low'], extremes['high']
+            
+            stats.sketch = sketch.to_dict()
+            stats.save()
+        return stats
+
+
+class BidPriceQuantiles(models.Model):
+    """Quantiles of accepted bid amounts relative to project budget.
+    
+    One row per (category, experience_level); a null category or blank
+    experience_level is the fallback pooled across all values. Quantiles
+    are ratios of the accepted amount to the budget midpoint, stored for
+    the levels in bids.pricing.QUANTILE_LEVELS.
+    """
+    
+    category = models.ForeignKey('projects.Category', on_delete=models.CASCADE, null=True, blank=True, related_name='bid_price_quantiles')
+    experience_level = models.CharField(max_length=20, blank=True)
+    sample_size = models.PositiveIntegerField(default=0)
+    quantiles = models.JSONField(default=list)
+    computed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['category', 'experience_level']
+        verbose_name = 'Bid Price Quantiles'
+        verbose_name_plural = 'Bid Price Quantiles'
+    
+    def __str__(self):
+        category = self.category_id or 'all'
+        return f"Price quantiles for category {category} / {self.experience_level or 'all'}"
+
+
+class ProposalFingerprint(models.Model):
+    """One band of a bid proposal's SimHash, for near-duplicate lookups.
+    
+    Each bid has bids.simhash.BANDS rows. The full fingerprint and the
+    freelancer are copied onto every row so that a lookup never joins
+    back to Bid.
+    """
+    
+    bid = models.ForeignKey(Bid, on_delete=models.CASCADE, related_name='fingerprint_bands')
+    freelancer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    band = models.PositiveSmallIntegerField()
+    value = models.PositiveIntegerField()
+    simhash = models.BigIntegerField()
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['band', 'value', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"Band {self.band} of bid {self.bid_id}"
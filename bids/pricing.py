@@ -0,0 +1,79 @@
+"""
+Bid price suggestions from historical accepted bids.
+
+rebuild_price_quantiles streams every accepted bid once and bins the ratio
+of its amount to the project's budget midpoint into a fixed histogram per
+(category, experience_level), with NumPy doing the binning a chunk at a
+time, so memory does not grow with the number of bids. Quantiles read off
+the histograms are stored in BidPriceQuantiles. Suggestions are a dict
+lookup in the cached table plus a multiplication.
+"""
+import numpy as np
+from django.core.cache import cache
+
+from .models import BidPriceQuantiles
+
+QUANTILE_LEVELS = (0.10, 0.25, 0.50, 0.75, 0.90)
+
+# Ratio histogram: 0.00 to 4.00 of the budget midpoint in 0.01 steps
+RATIO_MAX = 4.0
+RATIO_BINS = 400
+
+MIN_SAMPLE_SIZE = 20
+PRICE_TABLE_CACHE_KEY = 'bids:price_quantiles'
+PRICE_TABLE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def histogram_quantiles(counts):
+    """Quantile ratios for QUANTILE_LEVELS from a RATIO_BINS histogram."""
+    cumulative = np.cumsum(counts)
+    total = cumulative[-1]
+    bins = np.searchsorted(cumulative, np.array(QUANTILE_LEVELS) * total, side='left')
+    # Report the midpoint of the bin each quantile falls into
+    return [round(float(ratio), 4) for ratio in (bins + 0.5) * (RATIO_MAX / RATIO_BINS)]
+
+
+def get_price_table():
+    """Return {(category_id, experience_level): (sample_size, quantiles)}."""
+    table = cache.get(PRICE_TABLE_CACHE_KEY)
+    if table is None:
+        table = {
+            (category_id, experience_level): (sample_size, tuple(quantiles))
+            for category_id, experience_level, sample_size, quantiles in BidPriceQuantiles.objects.values_list(
+                'category_id', 'experience_level', 'sample_size', 'quantiles'
+            )
+        }
+        cache.set(PRICE_TABLE_CACHE_KEY, table, PRICE_TABLE_CACHE_TIMEOUT)
+    return table
+
+
+def invalidate_price_table():
+    cache.delete(PRICE_TABLE_CACHE_KEY)
+
+
+def suggest_price(project):
+    """Suggested bid amounts for a project, or None without enough history.
+    
+    Falls back from (category, level) to the category, then the level, then
+    all projects until a table has at least MIN_SAMPLE_SIZE accepted bids.
+    """
+    table = get_price_table()
+    for key in (
+        (project.category_id, project.experience_level),
+        (project.category_id, ''),
+        (None, project.experience_level),
+        (None, ''),
+    ):
+        entry = table.get(key)
+        if entry and entry[0] >= MIN_SAMPLE_SIZE:
+            sample_size, quantiles = entry
+            midpoint = (float(project.budget_min) + float(project.budget_max)) / 2
+            amounts = dict(zip(QUANTILE_LEVELS, (round(ratio * midpoint, 2) for ratio in quantiles)))
+            return {
+                'low': amounts[0.25],
+                'median': amounts[0.50],
+                'high': amounts[0.75],
+                'sample_size': sample_size,
+                'scope': 'category' if key[0] else 'marketplace',
+            }
+    return None
@@ -0,0 +1,116 @@
+"""
+"Best match" ranking of the bids on a project.
+
+Every live bid is scored on five normalized features, each in [0, 1]:
+
+    amount    how low the bid sits within the project budget range
+    delivery  fastest delivery time on the project divided by this one
+    rating    freelancer rating, shrunk toward the prior for few reviews
+    skills    share of the project's required skills the freelancer lists
+    proposal  proposal length, saturating at IDEAL_PROPOSAL_LENGTH
+
+The composite score is the weighted sum, computed for all bids at once with
+NumPy. Weights come from settings.BID_RANKING_WEIGHTS when set. Rankings are
+cached per project and dropped whenever a bid is created, edited, withdrawn
+or deleted.
+"""
+import hashlib
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.functions import Length
+
+from .models import Bid
+
+DEFAULT_WEIGHTS = {
+    'amount': 0.30,
+    'delivery': 0.15,
+    'rating': 0.30,
+    'skills': 0.20,
+    'proposal': 0.05,
+}
+FEATURES = tuple(DEFAULT_WEIGHTS)
+
+RATING_PRIOR = 3.0
+RATING_PRIOR_WEIGHT = 5
+IDEAL_PROPOSAL_LENGTH = 1200
+RANKING_CACHE_TIMEOUT = 60 * 60
+
+
+def get_weights():
+    """Return the configured weights as an array in FEATURES order."""
+    weights = {**DEFAULT_WEIGHTS, **getattr(settings, 'BID_RANKING_WEIGHTS', {})}
+    return np.array([float(weights[feature]) for feature in FEATURES])
+
+
+def _cache_key(project_id, weights):
+    digest = hashlib.sha1(weights.tobytes()).hexdigest()[:12]
+    return f'bids:ranking:{project_id}:{digest}'
+
+
+def _split_skills(text):
+    return {skill.strip().lower() for skill in (text or '').split(',') if skill.strip()}
+
+
+def score_bids(project, rows, weights):
+    """Score bid rows; returns (bid_ids, scores) as NumPy arrays.
+    
+    rows are (id, amount, delivery_time, proposal_length, average_rating,
+    total_ratings, skills) tuples.
+    """
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    
+    ids, amounts, delivery, lengths, ratings, rating_counts, skills = zip(*rows)
+    ids = np.array(ids, dtype=np.int64)
+    amounts = np.array(amounts, dtype=float)
+    delivery = np.maximum(np.array(delivery, dtype=float), 1.0)
+    lengths = np.array(lengths, dtype=float)
+    ratings = np.array([rating or 0.0 for rating in ratings])
+    rating_counts = np.array([count or 0 for count in rating_counts], dtype=float)
+    
+    budget_min = float(project.budget_min)
+    budget_span = max(float(project.budget_max) - budget_min, 0.01)
+    
+    required = _split_skills(project.skills_required)
+    if required:
+        overlap = np.array([len(required & _split_skills(text)) for text in skills], dtype=float) / len(required)
+    else:
+        overlap = np.zeros(len(ids))
+    
+    features = np.column_stack([
+        1.0 - np.clip((amounts - budget_min) / budget_span, 0.0, 1.0),
+        delivery.min() / delivery,
+        (ratings * rating_counts + RATING_PRIOR * RATING_PRIOR_WEIGHT) / (rating_counts + RATING_PRIOR_WEIGHT) / 5.0,
+        overlap,
+        np.minimum(lengths / IDEAL_PROPOSAL_LENGTH, 1.0),
+    ])
+    return ids, features @ weights
+
+
+def get_bid_ranking(project):
+    """Return ((bid_id, score), ...) for the project's live bids, best first."""
+    weights = get_weights()
+    key = _cache_key(project.pk, weights)
+    ranking = cache.get(key)
+    if ranking is None:
+        rows = list(
+            Bid.objects.filter(project=project).exclude(status='withdrawn')
+            .annotate(proposal_length=Length('proposal'))
+            .values_list(
+                'id', 'amount', 'delivery_time', 'proposal_length',
+                'freelancer__profile__average_rating', 'freelancer__profile__total_ratings',
+                'freelancer__profile__skills',
+            )
+        )
+        ids, scores = score_bids(project, rows, weights)
+        order = np.argsort(-scores, kind='stable')
+        ranking = tuple((int(ids[i]), round(float(scores[i]), 4)) for i in order)
+        cache.set(key, ranking, RANKING_CACHE_TIMEOUT)
+    return ranking
+
+
+def invalidate_ranking(project_id):
+    """Drop the cached ranking for a project after its bids change."""
+    cache.delete(_cache_key(project_id, get_weights()))
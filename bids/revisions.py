@@ -0,0 +1,116 @@
+"""
+Bid revision history stored as reverse deltas.
+
+The Bid row always holds the latest version. Revision n records edit n,
+which turned version n - 1 into version n. It keeps the previous value of
+each scalar field the edit changed, and a delta that rewrites version n's
+proposal back into version n - 1's. Every SNAPSHOT_INTERVAL revisions,
+starting with the first, the previous proposal is stored in full instead.
+Rebuilding any version therefore applies at most SNAPSHOT_INTERVAL - 1
+deltas, whatever the length of the history.
+
+Deltas work on word and whitespace tokens and are stored as a JSON list
+of [start, end, replacement] character edits against the newer text.
+"""
+import difflib
+import re
+
+from django.core.cache import cache
+
+SNAPSHOT_INTERVAL = 10
+
+# Past versions never change, so rebuilt ones can be cached for a long time
+VERSION_CACHE_TIMEOUT = 60 * 60 * 24
+
+_TOKEN_RE = re.compile(r'\s+|\S+')
+
+
+def is_snapshot(number):
+    """Whether revision number stores its previous proposal in full."""
+    return (number - 1) % SNAPSHOT_INTERVAL == 0
+
+
+def make_delta(source, target):
+    """Return the edits that turn source into target."""
+    a = _TOKEN_RE.findall(source)
+    b = _TOKEN_RE.findall(target)
+    offsets = [0]
+    for token in a:
+        offsets.append(offsets[-1] + len(token))
+
+    ops = []
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != 'equal':
+            ops.append([offsets[i1], offsets[i2], ''.join(b[j1:j2])])
+    return ops
+
+
+def apply_delta(source, ops):
+    """Apply edits from make_delta to source."""
+    parts = []
+    position = 0
+    for start, end, replacement in ops:
+        parts.append(source[position:start])
+        parts.append(replacement)
+        position = end
+    parts.append(source[position:])
+    return ''.join(parts)
+
+
+def _version_cache_key(bid_id, number):
+    return f'bids:revision:{bid_id}:{number}'
+
+
+def get_version(bid, number):
+    """Rebuild version number of bid (0 is the original submission).
+
+    Returns a dict with amount, delivery_time and proposal, or None if the
+    bid has no such version.
+    """
+    from .models import BidRevision
+
+    if number < 0:
+        return None
+    key = _version_cache_key(bid.pk, number)
+    version = cache.get(key)
+    if version is not None:
+        return version
+
+    later = list(
+        BidRevision.objects.filter(bid=bid, number__gt=number)
+        .order_by('number')
+        .values_list('number', 'amount', 'delivery_time')
+    )
+    if not later:
+        # number is the current version, or past the end of the history
+        if number and not BidRevision.objects.filter(bid=bid, number=number).exists():
+            return None
+        return {'amount': bid.amount, 'delivery_time': bid.delivery_time, 'proposal': bid.proposal}
+
+    # Scalars: the first later edit that changed a field kept its old value
+    amount, delivery_time = bid.amount, bid.delivery_time
+    for _, old_amount, old_delivery_time in reversed(later):
+        if old_amount is not None:
+            amount = old_amount
+        if old_delivery_time is not None:
+            delivery_time = old_delivery_time
+
+    # Proposal: start from the nearest snapshot above number, or the
+    # current text if there is none, and walk deltas back down
+    stop = next((n for n, _, _ in later if is_snapshot(n)), later[-1][0])
+    rows = (
+        BidRevision.objects.filter(bid=bid, number__gt=number, number__lte=stop)
+        .order_by('-number')
+        .values_list('proposal_delta', 'proposal_snapshot')
+    )
+    proposal = bid.proposal
+    for delta, snapshot in rows:
+        if snapshot is not None:
+            proposal = snapshot
+        else:
+            proposal = apply_delta(proposal, delta)
+
+    version = {'amount': amount, 'delivery_time': delivery_time, 'proposal': proposal}
+    cache.set(key, version, VERSION_CACHE_TIMEOUT)
+    return version
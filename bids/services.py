@@ -0,0 +1,231 @@
+"""
+Multi-step bid workflows that must commit or fail as a unit.
+
+The bid_* hooks run inside the caller's transaction together with the bid
+write; cache invalidation waits for the commit.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from accounts.models import FreelancerStats
+from payments.models import Escrow, Transaction, Wallet
+from projects.models import Project
+from reports.models import Notification
+from .duplicates import screen_proposal
+from .models import Bid, BidRevision, ProjectBidStats
+from .ranking import invalidate_ranking
+
+
+class BidAcceptanceError(Exception):
+    """Raised when a bid cannot be accepted; the message is user-facing."""
+
+
+def _response_seconds(bid):
+    return max(0, int((bid.created_at - bid.project.created_at).total_seconds()))
+
+
+def bid_placed(bid):
+    """Update bid aggregates and screen the proposal after a new bid is saved."""
+    bid.project.increment_bids()
+    ProjectBidStats.record(bid.project_id, added=[(bid.amount, bid.delivery_time)])
+    FreelancerStats.record(
+        bid.freelancer_id,
+        bids=1,
+        response_seconds=_response_seconds(bid),
+        delivery_added=[bid.delivery_time],
+    )
+    transaction.on_commit(lambda: invalidate_ranking(bid.project_id))
+    screen_proposal(bid)
+
+
+def bid_revised(bid, previous_amount, previous_delivery_time, previous_proposal):
+    """Record the revision, update bid aggregates and re-screen the proposal after a bid edit is saved."""
+    BidRevision.record(bid, previous_amount, previous_delivery_time, previous_proposal)
+    ProjectBidStats.record(
+        bid.project_id,
+        added=[(bid.amount, bid.delivery_time)],
+        removed=[(previous_amount, previous_delivery_time)],
+    )
+    if int(previous_delivery_time) != int(bid.delivery_time):
+        FreelancerStats.record(
+            bid.freelancer_id,
+            delivery_added=[bid.delivery_time],
+            delivery_removed=[previous_delivery_time],
+        )
+    transaction.on_commit(lambda: invalidate_ranking(bid.project_id))
+    screen_proposal(bid)
+
+
+def bid_retracted(bid):
+    """Update bid aggregates after a bid is withdrawn or deleted."""
+    bid.project.decrement_bids()
+    ProjectBidStats.record(bid.project_id, removed=[(bid.amount, bid.delivery_time)])
+    FreelancerStats.record(
+        bid.freelancer_id,
+        bids=-1,
+        response_seconds=-_response_seconds(bid),
+        delivery_removed=[bid.delivery_time],
+    )
+    transaction.on_commit(lambda: invalidate_ranking(bid.project_id))
+
+
+class BulkBidActionError(Exception):
+    """Raised when a bulk bid action is rejected; the message is user-facing."""
+
+
+# action -> (fields to set, statuses the action applies to, notification)
+BULK_ACTIONS = {
+    'reject': ({'status': 'rejected'}, ('pending',), (
+        'bid_rejected', 'Your bid was not selected',
+        'The employer declined your bid on "{title}".',
+    )),
+    'shortlist': ({'is_shortlisted': True}, ('pending',), (
+        'system', 'Your bid was shortlisted',
+        'The employer shortlisted your bid on "{title}".',
+    )),
+    'unshortlist': ({'is_shortlisted': False}, ('pending',), None),
+    'feature': ({'is_featured': True}, ('pending', 'accepted'), None),
+    'unfeature': ({'is_featured': False}, ('pending', 'accepted'), None),
+}
+MAX_BULK_BIDS = 500
+
+
+def apply_bulk_action(employer, action, bid_ids):
+    """Apply one action to many bids owned by employer.
+    
+    Ownership is verified with one query, the change is a single
+    UPDATE ... WHERE id IN (...), and notifications go out in one
+    bulk_create. Bids whose status the action does not apply to are
+    skipped. Returns the number of bids changed.
+    """
+    if action not in BULK_ACTIONS:
+        raise BulkBidActionError('Unknown bulk action.')
+    try:
+        bid_ids = {int(bid_id) for bid_id in bid_ids}
+    except (TypeError, ValueError):
+        raise BulkBidActionError('Invalid bid selection.')
+    if not bid_ids:
+        raise BulkBidActionError('Select at least one bid.')
+    if len(bid_ids) > MAX_BULK_BIDS:
+        raise BulkBidActionError(f'Select at most {MAX_BULK_BIDS} bids at a time.')
+    
+    changes, statuses, notification = BULK_ACTIONS[action]
+    now = timezone.now()
+    with transaction.atomic():
+        owned = list(
+            Bid.objects.filter(pk__in=bid_ids, project__employer=employer)
+            .values_list('pk', 'status', 'freelancer_id', 'project_id', 'project__title')
+        )
+        if len(owned) != len(bid_ids):
+            raise BulkBidActionError('You can only manage bids on your own projects.')
+        
+        targets = [row for row in owned if row[1] in statuses]
+        if not targets:
+            return 0
+        # Re-check status in the UPDATE so a concurrent accept is not overwritten
+        Bid.objects.filter(pk__in=[row[0] for row in targets], status__in=statuses).update(updated_at=now, **changes)
+        
+        if notification:
+            notification_type, title, message = notification
+            Notification.objects.bulk_create([
+                Notification(
+                    user_id=freelancer_id,
+                    notification_type=notification_type,
+                    title=title,
+                    message=message.format(title=project_title),
+                    project_id=project_id,
+                    bid_id=pk,
+                )
+                for pk, _, freelancer_id, project_id, project_title in targets
+            ])
+    return len(targets)
+
+
+def accept_bid(bid, employer):
+    """Accept a bid, reject the others and fund escrow in one transaction.
+    
+    The project row is locked first, so concurrent or repeated accepts on the
+    same project serialize and only one can win. The bid row is locked as
+    well, so it cannot be withdrawn or deleted between the status check and
+    the accept. Every step is a fixed number
+    of queries whatever the number of competing bids.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        project = Project.objects.select_for_update().get(pk=bid.project_id)
+        if project.employer_id != employer.pk:
+            raise BidAcceptanceError('You can only accept bids on your own projects.')
+        
+        # Lock the bid too: a withdraw or delete does not take the project lock
+        try:
+            bid = Bid.objects.select_for_update().get(pk=bid.pk)
+        except Bid.DoesNotExist:
+            raise BidAcceptanceError('This bid cannot be accepted.')
+        if bid.status != 'pending' or project.status != 'open':
+            raise BidAcceptanceError('This bid cannot be accepted.')
+        # Escrow is one-to-one with the project
+        if Escrow.objects.filter(project=project).exists():
+            raise BidAcceptanceError('This project already has a funded escrow.')
+        
+        wallet = Wallet.objects.select_for_update().filter(user_id=employer.pk).first()
+        if wallet is None or wallet.balance < bid.amount:
+            raise BidAcceptanceError('Insufficient wallet balance to fund escrow for this bid. Please add funds.')
+        
+        Wallet.objects.filter(pk=wallet.pk).update(balance=F('balance') - bid.amount, updated_at=now)
+        Transaction.objects.create(
+            user_id=employer.pk,
+            transaction_type='payment',
+            amount=bid.amount,
+            status='completed',
+            project=project,
+            bid=bid,
+            description=f"Escrow deposit for project: {project.title}",
+            completed_at=now,
+        )
+        Escrow.objects.create(
+            project=project,
+            employer_id=employer.pk,
+            freelancer_id=bid.freelancer_id,
+            amount=bid.amount,
+        )
+        
+        if not Bid.objects.filter(pk=bid.pk, status='pending').update(status='accepted', accepted_at=now, updated_at=now):
+            raise BidAcceptanceError('This bid cannot be accepted.')
+        rejected = list(
+            Bid.objects.filter(project=project, status='pending').exclude(pk=bid.pk).values_list('pk', 'freelancer_id')
+        )
+        if rejected:
+            Bid.objects.filter(pk__in=[pk for pk, _ in rejected]).update(status='rejected', updated_at=now)
+        
+        project.status = 'in_progress'
+        project.save(update_fields=['status', 'updated_at'])
+        FreelancerStats.record(bid.freelancer_id, accepted=1)
+        
+        notifications = [
+            Notification(
+                user_id=bid.freelancer_id,
+                notification_type='bid_accepted',
+                title='Your bid was accepted',
+                message=f'Your bid on "{project.title}" was accepted. Funds are held in escrow.',
+                project=project,
+                bid_id=bid.pk,
+            )
+        ]
+        notifications.extend(
+            Notification(
+                user_id=freelancer_id,
+                notification_type='bid_rejected',
+                title='Your bid was not selected',
+                message=f'The employer accepted another bid on "{project.title}".',
+                project=project,
+                bid_id=rejected_pk,
+            )
+            for rejected_pk, freelancer_id in rejected
+        )
+        Notification.objects.bulk_create(notifications)
+        transaction.on_commit(lambda: invalidate_ranking(project.pk))
+    
+    bid.status = 'accepted'
+    bid.accepted_at = now
+    return bid
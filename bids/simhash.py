@@ -0,0 +1,77 @@
+"""
+64-bit SimHash fingerprints for near-duplicate proposal detection.
+
+Proposals are split into overlapping word shingles, each shingle is hashed
+to 64 bits, and every output bit is the majority vote of that bit across
+shingles. Texts that share most of their shingles end up a few bits apart,
+so near-duplicates are found by Hamming distance instead of text diffing.
+
+Fingerprints are also cut into BANDS contiguous slices. If two fingerprints are
+at most BANDS - 1 bits apart, at least one slice is identical (pigeonhole),
+so an exact index lookup on the slices finds every candidate.
+"""
+import hashlib
+import re
+
+import numpy as np
+
+BITS = 64
+BANDS = 6
+SHINGLE_SIZE = 2
+
+# Slice widths, high slice first: 11, 11, 11, 11, 10, 10
+BAND_WIDTHS = [BITS // BANDS + (1 if i < BITS % BANDS else 0) for i in range(BANDS)]
+
+# Fingerprints this many bits apart or closer count as near-duplicates
+MAX_DISTANCE = BANDS - 1
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def words(text):
+    """Lowercase word tokens of text."""
+    return _WORD_RE.findall(text.lower())
+
+
+def _shingles(text):
+    tokens = words(text)
+    if len(tokens) <= SHINGLE_SIZE:
+        return [' '.join(tokens)] if tokens else []
+    return [' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+
+
+def fingerprint(text):
+    """Return the SimHash of text as an unsigned 64-bit int (0 for empty text)."""
+    shingles = _shingles(text)
+    if not shingles:
+        return 0
+
+    digests = b''.join(hashlib.blake2b(s.encode(), digest_size=8).digest() for s in shingles)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 > len(shingles)
+    return int.from_bytes(np.packbits(votes).tobytes(), 'big')
+
+
+def bands(value):
+    """Split a fingerprint into BANDS integers of BAND_WIDTHS bits, high band first."""
+    result = []
+    shift = BITS
+    for width in BAND_WIDTHS:
+        shift -= width
+        result.append((value >> shift) & ((1 << width) - 1))
+    return result
+
+
+def distance(a, b):
+    """Hamming distance between two fingerprints."""
+    return bin(a ^ b).count('1')
+
+
+def to_signed(value):
+    """Map an unsigned fingerprint onto a signed 64-bit database integer."""
+    return value - (1 << BITS) if value >= 1 << (BITS - 1) else value
+
+
+def from_signed(value):
+    """Inverse of to_signed."""
+    return value + (1 << BITS) if value < 0 else value
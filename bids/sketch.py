@@ -0,0 +1,69 @@
+"""
+Mergeable, deletable quantile sketch for bid amounts.
+
+Values are counted in logarithmic buckets of width log(GAMMA), so any
+quantile is answered within RELATIVE_ACCURACY of the true value using a few
+hundred integers at most. Unlike sampling sketches, a value can be removed
+again by decrementing its bucket, which lets bid stats follow edits and
+withdrawals without rescanning bids.
+"""
+import math
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(GAMMA)
+
+# Bucket for zero or negative values, which have no logarithm
+ZERO_BUCKET = 'z'
+
+
+class QuantileSketch:
+    """Logarithmic-bucket quantile sketch; serializes to a JSON-safe dict."""
+    
+    def __init__(self, buckets=None):
+        self.buckets = dict(buckets or {})
+    
+    @staticmethod
+    def _bucket(value):
+        if value <= 0:
+            return ZERO_BUCKET
+        return str(math.ceil(math.log(value) / _LOG_GAMMA))
+    
+    @staticmethod
+    def _bucket_value(bucket):
+        if bucket == ZERO_BUCKET:
+            return 0.0
+        return 2 * GAMMA ** int(bucket) / (GAMMA + 1)
+    
+    @property
+    def count(self):
+        return sum(self.buckets.values())
+    
+    def add(self, value):
+        bucket = self._bucket(float(value))
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+    
+    def remove(self, value):
+        bucket = self._bucket(float(value))
+        remaining = self.buckets.get(bucket, 0) - 1
+        if remaining > 0:
+            self.buckets[bucket] = remaining
+        else:
+            self.buckets.pop(bucket, None)
+    
+    def quantile(self, q):
+        """Approximate q-quantile (0 <= q <= 1), or None when empty."""
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        ordered = sorted(self.buckets.items(), key=lambda item: -math.inf if item[0] == ZERO_BUCKET else int(item[0]))
+        seen = 0
+        for bucket, count in ordered:
+            seen += count
+            if seen > rank:
+                return self._bucket_value(bucket)
+        return self._bucket_value(ordered[-1][0])
+    
+    def to_dict(self):
+        return dict(self.buckets)
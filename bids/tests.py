@@ -0,0 +1,228 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import User
+from payments.models import Escrow, Transaction, Wallet
+from projects.models import Category, Project
+from reports.models import Notification
+from .models import Bid, BidRevision
+from .ranking import _cache_key, get_bid_ranking, get_weights
+from .revisions import SNAPSHOT_INTERVAL, apply_delta, get_version, is_snapshot, make_delta
+from .services import BidAcceptanceError, accept_bid
+
+
+class BidTestMixin:
+    """Users, a project and bids for bid workflow tests."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = User.objects.create_user('employer', 'employer@example.com', None, role='employer')
+        cls.category = Category.objects.create(name='Web')
+    
+    def setUp(self):
+        cache.clear()
+        Wallet.objects.filter(user=self.employer).update(balance=Decimal('1000.00'))
+        self.project = self.make_project()
+    
+    def make_project(self):
+        return Project.objects.create(
+            title='Build a website',
+            description='Details',
+            category=self.category,
+            employer=self.employer,
+            budget_min=100,
+            budget_max=500,
+            deadline=timezone.now() + timedelta(days=7),
+            skills_required='python, django',
+        )
+    
+    def make_bids(self, count, project=None, amount=200):
+        project = project or self.project
+        start = User.objects.count()
+        bids = []
+        for i in range(start, start + count):
+            freelancer = User.objects.create_user(f'freelancer{i}', f'f{i}@example.com', None, role='freelancer')
+            bids.append(Bid.objects.create(
+                project=project, freelancer=freelancer, amount=amount,
+                delivery_time=5, proposal='I can build this.',
+            ))
+        return bids
+
+
+class AcceptBidTests(BidTestMixin, TestCase):
+    """bids.services.accept_bid."""
+    
+    def test_accept_funds_escrow_and_rejects_the_rest(self):
+        bid, *others = self.make_bids(3)
+        
+        accept_bid(bid, self.employer)
+        
+        self.assertEqual(Bid.objects.get(pk=bid.pk).status, 'accepted')
+        self.assertEqual(
+            set(Bid.objects.filter(pk__in=[other.pk for other in others]).values_list('status', flat=True)),
+            {'rejected'},
+        )
+        self.assertEqual(Project.objects.get(pk=self.project.pk).status, 'in_progress')
+        self.assertEqual(Wallet.objects.get(user=self.employer).balance, Decimal('800.00'))
+        self.assertEqual(Escrow.objects.get(project=self.project).amount, Decimal('200.00'))
+        self.assertEqual(Transaction.objects.filter(user=self.employer, bid=bid).count(), 1)
+        self.assertEqual(Notification.objects.filter(project=self.project).count(), 3)
+    
+    def test_query_count_does_not_grow_with_competing_bids(self):
+        def queries_for(count):
+            project = self.make_project()
+            bids = self.make_bids(count, project=project)
+            with CaptureQueriesContext(connection) as queries:
+                accept_bid(bids[0], self.employer)
+            return len(queries)
+        
+        self.assertEqual(queries_for(2), queries_for(25))
+    
+    @skipUnlessDBFeature('has_select_for_update')
+    def test_project_and_bid_rows_are_locked(self):
+        bid = self.make_bids(1)[0]
+        with CaptureQueriesContext(connection) as queries:
+            accept_bid(bid, self.employer)
+        locked = [query['sql'] for query in queries if 'FOR UPDATE' in query['sql']]
+        self.assertTrue(any('projects_project' in sql for sql in locked))
+        self.assertTrue(any('bids_bid' in sql for sql in locked))
+    
+    def test_bid_withdrawn_after_it_was_loaded_is_not_accepted(self):
+        bid = self.make_bids(1)[0]
+        Bid.objects.filter(pk=bid.pk).update(status='withdrawn')
+        
+        with self.assertRaises(BidAcceptanceError):
+            accept_bid(bid, self.employer)
+        
+        self.assertEqual(Bid.objects.get(pk=bid.pk).status, 'withdrawn')
+        self.assertEqual(Wallet.objects.get(user=self.employer).balance, Decimal('1000.00'))
+        self.assertFalse(Escrow.objects.filter(project=self.project).exists())
+    
+    def test_bid_deleted_after_it_was_loaded_is_not_accepted(self):
+        bid = self.make_bids(1)[0]
+        Bid.objects.filter(pk=bid.pk).delete()
+        
+        with self.assertRaises(BidAcceptanceError):
+            accept_bid(bid, self.employer)
+        self.assertEqual(Wallet.objects.get(user=self.employer).balance, Decimal('1000.00'))
+    
+    def test_second_accept_on_a_project_fails(self):
+        first, second = self.make_bids(2)
+        accept_bid(first, self.employer)
+        
+        with self.assertRaises(BidAcceptanceError):
+            accept_bid(second, self.employer)
+        self.assertEqual(Wallet.objects.get(user=self.employer).balance, Decimal('800.00'))
+    
+    def test_existing_escrow_is_reported_not_raised_as_integrity_error(self):
+        bid = self.make_bids(1)[0]
+        Escrow.objects.create(project=self.project, employer=self.employer, freelancer=bid.freelancer, amount=1)
+        
+        with self.assertRaisesMessage(BidAcceptanceError, 'already has a funded escrow'):
+            accept_bid(bid, self.employer)
+        self.assertEqual(Bid.objects.get(pk=bid.pk).status, 'pending')
+    
+    def test_insufficient_balance_changes_nothing(self):
+        bid = self.make_bids(1, amount=5000)[0]
+        
+        with self.assertRaises(BidAcceptanceError):
+            accept_bid(bid, self.employer)
+        self.assertEqual(Bid.objects.get(pk=bid.pk).status, 'pending')
+        self.assertEqual(Project.objects.get(pk=self.project.pk).status, 'open')
+    
+    def test_only_the_project_employer_can_accept(self):
+        bid = self.make_bids(1)[0]
+        other = User.objects.create_user('other', 'other@example.com', None, role='employer')
+        
+        with self.assertRaises(BidAcceptanceError):
+            accept_bid(bid, other)
+    
+    def test_cached_ranking_is_dropped_on_commit(self):
+        bid = self.make_bids(2)[0]
+        get_bid_ranking(self.project)
+        key = _cache_key(self.project.pk, get_weights())
+        self.assertIsNotNone(cache.get(key))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            accept_bid(bid, self.employer)
+        self.assertIsNone(cache.get(key))
+
+
+class BidRevisionTests(BidTestMixin, TestCase):
+    """Reverse-delta revision history in bids.revisions."""
+    
+    def edit(self, bid, **changes):
+        previous = (bid.amount, bid.delivery_time, bid.proposal)
+        for field, value in changes.items():
+            setattr(bid, field, value)
+        bid.save()
+        return BidRevision.record(bid, *previous)
+    
+    def version_of(self, bid):
+        return {'amount': Decimal(str(bid.amount)), 'delivery_time': bid.delivery_time, 'proposal': bid.proposal}
+    
+    def test_make_delta_round_trips_whitespace(self):
+        source = 'Line one.\n\n  Indented   line two\twith tabs.\n'
+        target = 'Line one!\n  Indented line two\twith tabs and more.\n\n'
+        self.assertEqual(apply_delta(source, make_delta(source, target)), target)
+        self.assertEqual(make_delta(source, source), [])
+    
+    def test_every_version_rebuilds_across_snapshot_boundaries(self):
+        bid = self.make_bids(1)[0]
+        expected = [self.version_of(bid)]
+        edits = SNAPSHOT_INTERVAL * 2 + 3
+        for i in range(1, edits + 1):
+            changes = {'proposal': f'{bid.proposal}\nRevision {i}: ' + 'more detail ' * (i % 4)}
+            if i % 3 == 0:
+                changes['amount'] = Decimal(200 + i)
+            if i % 5 == 0:
+                changes['delivery_time'] = 5 + i
+            if i % 7 == 0:
+                # Scalar-only edit
+                changes.pop('proposal')
+                changes['amount'] = Decimal(300 + i)
+            revision = self.edit(bid, **changes)
+            self.assertEqual(revision.number, i)
+            self.assertEqual(revision.proposal_snapshot is not None, is_snapshot(i))
+            expected.append(self.version_of(bid))
+        
+        for number, version in enumerate(expected):
+            cache.clear()
+            self.assertEqual(get_version(bid, number), version, f'version {number}')
+        # A second pass is served from the cache and still agrees
+        for number, version in enumerate(expected):
+            self.assertEqual(get_version(bid, number), version, f'cached version {number}')
+    
+    def test_rebuild_stops_at_nearest_snapshot(self):
+        bid = self.make_bids(1)[0]
+        for i in range(1, SNAPSHOT_INTERVAL * 3):
+            self.edit(bid, proposal=f'Proposal version {i}')
+        # Deltas past the next snapshot must never be read for version 2
+        BidRevision.objects.filter(bid=bid, number__gt=SNAPSHOT_INTERVAL + 1).update(proposal_delta=[[0, 0, 'garbage']])
+        
+        with CaptureQueriesContext(connection) as queries:
+            version = get_version(bid, 2)
+        self.assertEqual(version['proposal'], 'Proposal version 2')
+        self.assertEqual(len(queries), 2)
+    
+    def test_unchanged_edit_records_nothing(self):
+        bid = self.make_bids(1)[0]
+        self.assertIsNone(self.edit(bid, amount=Decimal('200.00')))
+        self.assertFalse(BidRevision.objects.filter(bid=bid).exists())
+    
+    def test_missing_versions(self):
+        bid = self.make_bids(1)[0]
+        self.assertEqual(get_version(bid, 0), self.version_of(bid))
+        self.assertIsNone(get_version(bid, 1))
+        self.assertIsNone(get_version(bid, -1))
+        
+        self.edit(bid, amount=Decimal('250.00'))
+        self.assertEqual(get_version(bid, 0)['amount'], Decimal('200.00'))
+        self.assertEqual(get_version(bid, 1)['amount'], Decimal('250.00'))
+        self.assertIsNone(get_version(bid, 2))
@@ -8,9 +8,12 @@ urlpatterns = [
     path('create/<int:project_id>/', views.bid_create, name='create'),
     path('<int:pk>/', views.bid_detail, name='detail'),
     path('<int:pk>/edit/', views.bid_edit, name='edit'),
+    path('<int:pk>/revisions/<int:number>/', views.bid_revision, name='revision'),
     path('<int:pk>/delete/', views.bid_delete, name='delete'),
     path('<int:pk>/accept/', views.bid_accept, name='accept'),
     path('<int:pk>/reject/', views.bid_reject, name='reject'),
     path('<int:pk>/withdraw/', views.bid_withdraw, name='withdraw'),
+    path('bulk/', views.bid_bulk_action, name='bulk_action'),
+    path('api/bulk/', views.bid_bulk_action_api, name='bulk_action_api'),
 ]
 
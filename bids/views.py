@@ -1,33 +1,72 @@
+import json
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator
 from django.db.models import Q
 from django.core.exceptions import PermissionDenied
-from .models import Bid, BidAttachment, BidMessage
+from django.db import transaction
+from django.http import Http404, JsonResponse
+from django.utils.http import url_has_allowed_host_and_scheme
+from .models import Bid, BidAttachment, BidMessage, ProjectBidStats
+from .pricing import suggest_price
+from .ranking import get_bid_ranking
+from .revisions import get_version
+from .services import (
+    accept_bid, apply_bulk_action, bid_placed, bid_revised, bid_retracted,
+    BidAcceptanceError, BulkBidActionError,
+)
 from projects.models import Project
 from accounts.decorators import freelancer_required, owner_required
+from accounts.ratelimit import rate_limit
 
 
 @login_required
 def bid_list(request):
-    """List user's bids."""
+    """List user's bids; employers can narrow to one project with ?project=<id> and rank it with ?sort=best."""
+    project = None
+    sort = ''
     if request.user.role == 'freelancer':
         bids = Bid.objects.filter(freelancer=request.user).order_by('-created_at')
     else:
         bids = Bid.objects.filter(project__employer=request.user).order_by('-created_at')
+        project_id = request.GET.get('project', '')
+        if project_id.isdigit():
+            project = get_object_or_404(Project, pk=project_id, employer=request.user)
+            bids = bids.filter(project=project)
+            if request.GET.get('sort') == 'best':
+                sort = 'best'
+    bids = bids.select_related('project', 'freelancer')
     
-    # Pagination
-    paginator = Paginator(bids, 10)
     page_number = request.GET.get('page')
-    bids = paginator.get_page(page_number)
+    if sort == 'best':
+        # Page through the cached ranking, then load only that page's bids;
+        # withdrawn bids are unranked and come last
+        ranking = get_bid_ranking(project)
+        scores = dict(ranking)
+        ordered_ids = [bid_id for bid_id, _ in ranking]
+        ordered_ids += list(bids.filter(status='withdrawn').values_list('pk', flat=True))
+        page = Paginator(ordered_ids, 10).get_page(page_number)
+        by_id = bids.in_bulk(page.object_list)
+        page.object_list = [by_id[bid_id] for bid_id in page.object_list if bid_id in by_id]
+        for bid in page.object_list:
+            bid.match_score = scores.get(bid.pk)
+        bids = page
+    else:
+        # Pagination
+        paginator = Paginator(bids, 10)
+        bids = paginator.get_page(page_number)
     
     context = {
         'bids': bids,
+        'project': project,
+        'sort': sort,
     }
     return render(request, 'bids/bid_list.html', context)
 
 
+@rate_limit('bids:create', rate='30/h', burst=10)
 @login_required
 @freelancer_required
 def bid_create(request, project_id):
@@ -54,19 +93,25 @@ def bid_create(request, project_id):
         # Validation
         if not all([amount, delivery_time, proposal]):
             messages.error(request, 'Please fill in all required fields.')
-            return render(request, 'bids/bid_create.html', {'project': project})
+            return render(request, 'bids/bid_create.html', {
+                'project': project,
+                'bid_stats': ProjectBidStats.objects.filter(project=project, bid_count__gt=0).first(),
+                'price_suggestion': suggest_price(project),
+            })
         
         try:
-            bid = Bid.objects.create(
-                project=project,
-                freelancer=request.user,
-                amount=amount,
-                delivery_time=delivery_time,
-                proposal=proposal,
-            )
-            
-            # Increment project bid count
-            project.increment_bids()
+            # The bid and its aggregates commit together or not at all
+            with transaction.atomic():
+                bid = Bid.objects.create(
+                    project=project,
+                    freelancer=request.user,
+                    amount=amount,
+                    delivery_time=delivery_time,
+                    proposal=proposal,
+                )
+                
+                # Update bid count, price stats and ranking
+                bid_placed(bid)
             
             messages.success(request, 'Bid placed successfully!')
             return redirect('bids:detail', pk=bid.pk)
@@ -75,6 +120,8 @@ def bid_create(request, project_id):
     
     context = {
         'project': project,
+        'bid_stats': ProjectBidStats.objects.filter(project=project, bid_count__gt=0).first(),
+        'price_suggestion': suggest_price(project),
     }
     return render(request, 'bids/bid_create.html', context)
 
@@ -91,13 +138,38 @@ def bid_detail(request, pk):
     # Get bid messages
     bid_messages = bid.messages.all().order_by('created_at')
     
+    # Revision list without the stored proposal text
+    revisions = bid.revisions.only('bid_id', 'number', 'amount', 'delivery_time', 'proposal_changed', 'created_at')
+    
     context = {
         'bid': bid,
         'bid_messages': bid_messages,
+        'revisions': revisions,
     }
     return render(request, 'bids/bid_detail.html', context)
 
 
+@login_required
+def bid_revision(request, pk, number):
+    """View an earlier version of a bid."""
+    bid = get_object_or_404(Bid, pk=pk)
+    
+    if request.user != bid.freelancer and request.user != bid.project.employer:
+        messages.error(request, 'You do not have permission to view this bid.')
+        return redirect('bids:list')
+    
+    version = get_version(bid, number)
+    if version is None:
+        raise Http404("No such revision")
+    
+    context = {
+        'bid': bid,
+        'number': number,
+        'version': version,
+    }
+    return render(request, 'bids/bid_revision.html', context)
+
+
 @login_required
 def bid_edit(request, pk):
     """Edit bid (freelancers only)."""
@@ -117,7 +189,13 @@ def bid_edit(request, pk):
         bid.proposal = request.POST.get('proposal')
         
         try:
-            bid.save()
+            with transaction.atomic():
+                # Lock the bid so concurrent edits take revision numbers in
+                # turn, each against the version saved before it
+                current = Bid.objects.select_for_update().get(pk=bid.pk)
+                previous_amount, previous_delivery_time, previous_proposal = current.amount, current.delivery_time, current.proposal
+                bid.save()
+                bid_revised(bid, previous_amount, previous_delivery_time, previous_proposal)
             messages.success(request, 'Bid updated successfully!')
             return redirect('bids:detail', pk=bid.pk)
         except Exception as e:
@@ -144,9 +222,15 @@ def bid_delete(request, pk):
         return redirect('bids:detail', pk=pk)
     
     if request.method == 'POST':
-        # Decrement project bid count
-        bid.project.decrement_bids()
-        bid.delete()
+        with transaction.atomic():
+            # Re-check under the lock accept_bid takes, so an accept that
+            # committed in the meantime is not undone
+            if not Bid.objects.select_for_update().filter(pk=bid.pk, status='pending').exists():
+                messages.error(request, 'This bid can no longer be deleted.')
+                return redirect('bids:detail', pk=pk)
+            bid.delete()
+            # Update bid count, price stats and ranking
+            bid_retracted(bid)
         messages.success(request, 'Bid deleted successfully!')
         return redirect('bids:list')
     
@@ -171,14 +255,12 @@ def bid_accept(request, pk):
     
     if request.method == 'POST':
         try:
-            # Accept the bid
-            bid.accept()
-            
-            # Reject all other bids on this project
-            Bid.objects.filter(project=bid.project, status='pending').exclude(pk=bid.pk).update(status='rejected')
-            
-            messages.success(request, 'Bid accepted successfully!')
+            # Accept, reject the rest, fund escrow and notify in one transaction
+            accept_bid(bid, request.user)
+            messages.success(request, 'Bid accepted successfully! The bid amount is now held in escrow.')
             return redirect('bids:detail', pk=bid.pk)
+        except BidAcceptanceError as e:
+            messages.error(request, str(e))
         except Exception as e:
             messages.error(request, f'Error accepting bid: {str(e)}')
     
@@ -230,9 +312,15 @@ def bid_withdraw(request, pk):
     
     if request.method == 'POST':
         try:
-            bid.withdraw()
-            # Decrement project bid count
-            bid.project.decrement_bids()
+            with transaction.atomic():
+                # Re-check under the lock accept_bid takes, so an accept that
+                # committed in the meantime is not undone
+                if not Bid.objects.select_for_update().filter(pk=bid.pk, status='pending').exists():
+                    messages.error(request, 'This bid cannot be withdrawn.')
+                    return redirect('bids:detail', pk=pk)
+                bid.withdraw()
+                # Update bid count, price stats and ranking
+                bid_retracted(bid)
             messages.success(request, 'Bid withdrawn successfully!')
             return redirect('bids:list')
         except Exception as e:
@@ -243,3 +331,63 @@ def bid_withdraw(request, pk):
     }
     return render(request, 'bids/bid_withdraw.html', context)
 
+
+
+@login_required
+def bid_bulk_action(request):
+    """Apply reject/shortlist/feature to many bids at once (employers only)."""
+    next_url = request.POST.get('next', '')
+    if not url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        next_url = ''
+    
+    if request.method != 'POST':
+        return redirect(next_url or 'bids:list')
+    
+    action = request.POST.get('action', '')
+    try:
+        changed = apply_bulk_action(request.user, action, request.POST.getlist('bid_ids'))
+        messages.success(request, f'{changed} bid{"" if changed == 1 else "s"} updated.')
+    except BulkBidActionError as e:
+        messages.error(request, str(e))
+    
+    return redirect(next_url or 'bids:list')
+
+
+@login_required
+def bid_bulk_action_api(request):
+    """JSON variant of bid_bulk_action.
+    
+    Expects {"action": "reject", "bid_ids": [1, 2, 3]} and returns the
+    number of bids changed.
+    """
+    if request.method != 'POST':
+        return JsonResponse({
+            'success': False,
+            'message': 'Invalid request method.'
+        }, status=405)
+    
+    try:
+        payload = json.loads(request.body)
+        action = payload['action']
+        bid_ids = payload['bid_ids']
+        if not isinstance(bid_ids, list):
+            raise TypeError
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({
+            'success': False,
+            'message': 'Expected a JSON object with "action" and a "bid_ids" list.'
+        }, status=400)
+    
+    try:
+        changed = apply_bulk_action(request.user, action, bid_ids)
+    except BulkBidActionError as e:
+        return JsonResponse({
+            'success': False,
+            'message': str(e)
+        }, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'action': action,
+        'updated': changed,
+    })
@@ -1,5 +1,8 @@
 """
 ASGI config for freelancer_marketplace project.
+
+Serve through this entry point (e.g. uvicorn freelancer_marketplace.asgi:application)
+for live conversation streams; under WSGI, conversation pages fall back to polling.
 """
 
 import os
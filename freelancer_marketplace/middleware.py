@@ -2,6 +2,8 @@ from django.shortcuts import redirect
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
 
+from accounts import ratelimit
+
 
 class AuthorizationMiddleware:
     """Middleware to add additional authorization checks."""
@@ -24,3 +26,24 @@ class AuthorizationMiddleware:
                 return redirect('accounts:login')
         return None
 
+
+
+class RateLimitMiddleware:
+    """Reject rate-limited requests with 429 before the view runs.
+    
+    Applies limits declared with accounts.ratelimit.rate_limit, and any
+    RATE_LIMITS setting keyed by URL name.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        return self.get_response(request)
+    
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        declared = getattr(view_func, 'rate_limit', None)
+        scope = declared.scope if declared else request.resolver_match.view_name
+        limit = ratelimit.get_limit(scope, declared)
+        request._rate_limit_checked = True
+        return ratelimit.check(request, limit)
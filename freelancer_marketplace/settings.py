@@ -42,6 +42,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'freelancer_marketplace.middleware.AuthorizationMiddleware',
+    'freelancer_marketplace.middleware.RateLimitMiddleware',
 ]
 
 ROOT_URLCONF = 'freelancer_marketplace.urls'
@@ -77,6 +78,41 @@ DATABASES = {
     }
 }
 
+# Cache
+# Catalog and page caches keep version stamps here so every worker sees
+# invalidations; point this at a shared backend (Memcached/Redis) when
+# running more than one process.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'freelancer-marketplace',
+    }
+}
+
+# Rate limits for write endpoints (see accounts/ratelimit.py). Defaults live on
+# the views; entries here, keyed by URL name, override them.
+RATE_LIMITS = {}
+RATE_LIMIT_SHARED = True
+
+# Pub/sub used to push conversation events to open streams (see
+# messaging/realtime.py). The in-process broker only reaches clients of the
+# same worker; point this at a shared broker when running several. Streams
+# are only served under ASGI (freelancer_marketplace.asgi); behind WSGI,
+# conversation pages poll the delta-sync API instead.
+MESSAGING_BROKER = 'messaging.realtime.InProcessBroker'
+
+# Message search backend (see messaging/search.py): 'fulltext' for MySQL
+# FULLTEXT, 'index' for the local inverted index, or 'auto'
+MESSAGE_SEARCH_BACKEND = 'auto'
+
+# Messages older than this, in conversations idle as long, are moved to
+# compressed archive batches by the archive_messages command
+MESSAGE_ARCHIVE_AFTER_DAYS = 365
+
+# Presence (see messaging/presence.py) is kept in each process's memory;
+# when true it is also shared through the default cache so all nodes agree
+PRESENCE_SHARED = True
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -7,6 +7,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import RedirectView
 from accounts import views as accounts_views
+from pages import views as pages_views
 
 # Customize admin site
 admin.site.site_header = "Freelancer Marketplace Administration"
@@ -26,6 +27,9 @@ urlpatterns = [
     path('payments/', include('payments.urls')),
     path('reports/', include('reports.urls')),
     path('pages/', include('pages.urls')),
+    # Sitemaps
+    path('sitemap.xml', pages_views.sitemap_index, name='sitemap_index'),
+    path('sitemap-<slug:section>-<int:shard>.xml', pages_views.sitemap_section, name='sitemap_section'),
 ]
 
 if settings.DEBUG:
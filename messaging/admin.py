@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Conversation, Message, MessageAttachment
+from .models import Conversation, InboxEntry, Message, MessageArchive, MessageAttachment, UnreadCounter
 
 
 @admin.register(Conversation)
@@ -19,10 +19,10 @@ class ConversationAdmin(admin.ModelAdmin):
 class MessageAdmin(admin.ModelAdmin):
     """Message admin interface."""
     
-    list_display = ('conversation', 'sender', 'is_read', 'created_at')
-    list_filter = ('is_read', 'created_at')
+    list_display = ('conversation', 'sender', 'created_at')
+    list_filter = ('created_at',)
     search_fields = ('conversation__participants__email', 'sender__email', 'content')
-    readonly_fields = ('created_at', 'read_at')
+    readonly_fields = ('created_at',)
     ordering = ('-created_at',)
 
 
@@ -35,3 +35,34 @@ class MessageAttachmentAdmin(admin.ModelAdmin):
     search_fields = ('message__conversation__participants__email', 'filename')
     ordering = ('-uploaded_at',)
 
+
+
+@admin.register(UnreadCounter)
+class UnreadCounterAdmin(admin.ModelAdmin):
+    """Unread message counter admin interface."""
+    
+    list_display = ('user', 'count', 'updated_at')
+    search_fields = ('user__email',)
+    readonly_fields = ('updated_at',)
+    ordering = ('-count',)
+
+
+@admin.register(InboxEntry)
+class InboxEntryAdmin(admin.ModelAdmin):
+    """Inbox entry admin interface."""
+    
+    list_display = ('user', 'conversation', 'other_participant_name', 'message_count', 'unread_count', 'last_read_message_id', 'last_message_at')
+    search_fields = ('user__email', 'other_participant_name')
+    raw_id_fields = ('user', 'conversation', 'other_participant', 'last_sender')
+    ordering = ('-last_message_at',)
+
+
+@admin.register(MessageArchive)
+class MessageArchiveAdmin(admin.ModelAdmin):
+    """Message archive admin interface."""
+    
+    list_display = ('conversation', 'first_message_id', 'last_message_id', 'message_count', 'last_created_at', 'created_at')
+    raw_id_fields = ('conversation',)
+    exclude = ('data',)
+    readonly_fields = ('first_message_id', 'last_message_id', 'message_count', 'first_created_at', 'last_created_at', 'created_at')
+    ordering = ('-created_at',)
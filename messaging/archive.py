@@ -0,0 +1,155 @@
+"""
+Archival of old messages out of the hot Message table.
+
+Messages older than MESSAGE_ARCHIVE_AFTER_DAYS, in conversations with no
+activity since then, are moved into MessageArchive rows. Each row holds up
+to a batch of messages as zlib-compressed JSON. A message is archived only
+once every participant's read watermark has passed it, so unread counts are
+unaffected. Messages with attachments stay in Message.
+
+Each batch is its own short transaction: it inserts the archive row,
+deletes the moved messages and raises Conversation.archived_up_to. An
+interrupted run loses nothing, and the next run carries on from whatever
+is still eligible.
+
+Archived messages are rehydrated by archived_messages when a user scrolls
+back past the live history. They are no longer searchable, and the
+delta-sync API and stream replay only return live messages.
+"""
+import json
+import zlib
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Min, Sum, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Conversation, InboxEntry, Message, MessageArchive
+
+User = get_user_model()
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 365
+
+ARCHIVE_BATCH_SIZE = 500
+
+COMPRESSION_LEVEL = 6
+
+
+def archive_cutoff(days=None, now=None):
+    if days is None:
+        days = getattr(settings, 'MESSAGE_ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS)
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def pack(rows):
+    """Compress [(id, sender_id, created_at, content)] rows."""
+    payload = [[pk, sender_id, created_at.isoformat(), content] for pk, sender_id, created_at, content in rows]
+    return zlib.compress(json.dumps(payload, separators=(',', ':')).encode(), COMPRESSION_LEVEL)
+
+
+def unpack(data):
+    """Inverse of pack."""
+    return [
+        (pk, sender_id, datetime.fromisoformat(created_at), content)
+        for pk, sender_id, created_at, content in json.loads(zlib.decompress(bytes(data)))
+    ]
+
+
+def inactive_conversations(cutoff, after=0):
+    """Ids of conversations without activity since cutoff, in id order from after."""
+    return Conversation.objects.filter(updated_at__lt=cutoff, pk__gt=after).order_by('pk').values_list('pk', flat=True)
+
+
+def archive_batch(conversation_id, cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move the oldest eligible messages of a conversation into one archive row.
+
+    Returns the number of messages moved; 0 when nothing is left to archive.
+    """
+    read_by_all = InboxEntry.objects.filter(conversation_id=conversation_id).aggregate(
+        up_to=Min('last_read_message_id'),
+    )['up_to']
+    if not read_by_all:
+        return 0
+
+    with transaction.atomic():
+        rows = list(
+            Message.objects.filter(
+                conversation_id=conversation_id,
+                created_at__lt=cutoff,
+                pk__lte=read_by_all,
+                attachments__isnull=True,
+            )
+            .order_by('pk')
+            .values_list('pk', 'sender_id', 'created_at', 'content')[:batch_size]
+        )
+        if not rows:
+            return 0
+        MessageArchive.objects.create(
+            conversation_id=conversation_id,
+            first_message_id=rows[0][0],
+            last_message_id=rows[-1][0],
+            message_count=len(rows),
+            first_created_at=rows[0][2],
+            last_created_at=rows[-1][2],
+            data=pack(rows),
+        )
+        Message.objects.filter(pk__in=[row[0] for row in rows]).delete()
+        Conversation.objects.filter(pk=conversation_id).update(
+            archived_up_to=Greatest('archived_up_to', Value(rows[-1][0])),
+        )
+    return len(rows)
+
+
+def archived_messages(conversation, before=None, limit=50):
+    """Rehydrate up to limit archived messages with an id below before, newest first.
+
+    Returns unsaved Message instances with sender attached, so templates can
+    render them like live ones.
+    """
+    if not conversation.archived_up_to:
+        return []
+    batches = MessageArchive.objects.filter(conversation=conversation).order_by('-last_message_id')
+    if before is not None:
+        batches = batches.filter(first_message_id__lt=before)
+
+    rows = []
+    offset = 0
+    while len(rows) < limit:
+        batch = batches.values_list('data', flat=True)[offset:offset + 1]
+        batch = next(iter(batch), None)
+        if batch is None:
+            break
+        rows.extend(row for row in reversed(unpack(batch)) if before is None or row[0] < before)
+        offset += 1
+    rows = rows[:limit]
+
+    senders = User.objects.in_bulk({sender_id for _, sender_id, _, _ in rows})
+    messages = []
+    for pk, sender_id, created_at, content in rows:
+        if sender_id not in senders:
+            # Live messages of deleted users are deleted with them
+            continue
+        message = Message(pk=pk, conversation=conversation, sender=senders[sender_id], content=content, created_at=created_at)
+        messages.append(message)
+    return messages
+
+
+def archived_count(conversation_id):
+    return MessageArchive.objects.filter(conversation_id=conversation_id).aggregate(n=Sum('message_count'))['n'] or 0
+
+
+def latest_archived(conversation_id):
+    """The newest archived (sender_id, content, created_at, id) of a conversation, or None."""
+    data = (
+        MessageArchive.objects.filter(conversation_id=conversation_id)
+        .order_by('-last_message_id')
+        .values_list('data', flat=True)
+        .first()
+    )
+    if data is None:
+        return None
+    pk, sender_id, created_at, content = unpack(data)[-1]
+    return sender_id, content, created_at, pk
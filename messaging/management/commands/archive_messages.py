@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from messaging import archive
+from messaging.models import Message
+
+
+class Command(BaseCommand):
+    help = (
+        'Move old messages of inactive conversations into compressed archive '
+        'batches. Safe to interrupt and re-run; each batch is its own short '
+        'transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Archive messages older than this many days (default MESSAGE_ARCHIVE_AFTER_DAYS)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=archive.ARCHIVE_BATCH_SIZE,
+            help='Messages per archive batch and transaction',
+        )
+        parser.add_argument(
+            '--start-after',
+            type=int,
+            default=0,
+            help='Resume after this conversation id',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Seconds to sleep between batches, to spread the write load',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count eligible conversations and messages without moving anything',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = archive.archive_cutoff(options['days'])
+        
+        if options['dry_run']:
+            conversations = archive.inactive_conversations(cutoff, options['start_after'])
+            eligible = Message.objects.filter(
+                conversation__in=conversations, created_at__lt=cutoff, attachments__isnull=True,
+            ).count()
+            self.stdout.write(f'{conversations.count()} inactive conversations, up to {eligible} messages older than {cutoff:%Y-%m-%d}.')
+            return
+        
+        moved = batches = 0
+        last_id = options['start_after']
+        while True:
+            # Keyset over conversation ids, a page at a time
+            page = list(archive.inactive_conversations(cutoff, last_id)[:100])
+            if not page:
+                break
+            for conversation_id in page:
+                while True:
+                    count = archive.archive_batch(conversation_id, cutoff, options['batch_size'])
+                    if not count:
+                        break
+                    moved += count
+                    batches += 1
+                    if options['pause']:
+                        time.sleep(options['pause'])
+                last_id = conversation_id
+            self.stdout.write(f'  up to conversation {last_id}: {moved} messages in {batches} batches')
+        
+        self.stdout.write(self.style.SUCCESS(f'Archived {moved} messages in {batches} batches.'))
@@ -0,0 +1,160 @@
+import asyncio
+import resource
+import time
+import tracemalloc
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand
+
+from messaging import realtime
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test conversation event streams. By default opens --connections '
+        'idle streams inside this process and measures memory per connection '
+        'and publish-to-delivery latency. With --url, holds that many real '
+        'connections open against a running ASGI server instead.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=5000, help='Open streams')
+        parser.add_argument('--conversations', type=int, default=500, help='Conversations the streams are spread over')
+        parser.add_argument('--messages', type=int, default=20, help='Publish rounds (one event per conversation each)')
+        parser.add_argument('--url', help='Events URL of a running server, e.g. http://127.0.0.1:8000/messaging/conversation/1/events/')
+        parser.add_argument('--cookie', default='', help='Cookie header for --url, e.g. sessionid=...')
+        parser.add_argument('--hold', type=float, default=30, help='Seconds to hold --url connections open')
+
+    def handle(self, *args, **options):
+        # Each connection needs a file descriptor in --url mode
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft < hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+        if options['url']:
+            asyncio.run(self._remote(options))
+        else:
+            asyncio.run(self._in_process(options))
+
+    async def _in_process(self, options):
+        count = options['connections']
+        conversations = max(1, min(options['conversations'], count))
+        rounds = options['messages']
+        broker = realtime.get_broker()
+        loop = asyncio.get_running_loop()
+
+        received = [0]
+        latencies = []
+        published_at = {}
+        all_delivered = asyncio.Event()
+        expected = [0]
+
+        async def consume(stream):
+            async for frame in stream:
+                if frame.startswith('id: '):
+                    message_id = int(frame[4:frame.index('\n')])
+                    latencies.append(time.perf_counter() - published_at[message_id])
+                    received[0] += 1
+                    if received[0] == expected[0]:
+                        all_delivered.set()
+
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        tasks = []
+        for i in range(count):
+            subscribed = asyncio.Event()
+            stream = realtime.event_stream(i % conversations + 1, subscribed=subscribed)
+            tasks.append(asyncio.create_task(consume(stream)))
+            await subscribed.wait()
+        opened = time.perf_counter() - started
+        per_connection = (tracemalloc.get_traced_memory()[0] - baseline) / count
+        tracemalloc.stop()
+
+        self.stdout.write(f'{count} idle streams over {conversations} conversations, broker {broker.__class__.__name__}')
+        self.stdout.write(f'  opened in {opened:.2f}s, {per_connection / 1024:.1f} KiB Python heap per stream')
+        self.stdout.write(f'  subscribers registered: {broker.subscriber_count()}')
+
+        # Publish from a worker thread, as a view's on_commit hook would
+        message_id = 0
+        round_times = []
+        for _ in range(rounds):
+            all_delivered.clear()
+            expected[0] = received[0] + count
+            round_started = time.perf_counter()
+            for conversation_id in range(1, conversations + 1):
+                message_id += 1
+                published_at[message_id] = time.perf_counter()
+                event = {'type': 'message', 'id': message_id, 'conversation_id': conversation_id, 'content': 'x'}
+                await loop.run_in_executor(None, broker.publish, realtime.conversation_channel(conversation_id), event)
+            await asyncio.wait_for(all_delivered.wait(), timeout=60)
+            round_times.append(time.perf_counter() - round_started)
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if latencies:
+            latencies.sort()
+            p50 = latencies[len(latencies) // 2] * 1000
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+            self.stdout.write(
+                f'  {received[0]} deliveries in {rounds} rounds, '
+                f'{sum(round_times) / len(round_times) * 1000:.1f} ms per round, '
+                f'latency p50 {p50:.2f} ms p99 {p99:.2f} ms'
+            )
+        self.stdout.write(f'  subscribers left after close: {broker.subscriber_count()}')
+
+    async def _remote(self, options):
+        url = urlsplit(options['url'])
+        port = url.port or (443 if url.scheme == 'https' else 80)
+        path = url.path + (f'?{url.query}' if url.query else '')
+        request = (
+            f'GET {path} HTTP/1.1\r\nHost: {url.netloc}\r\nAccept: text/event-stream\r\n'
+            f'Cookie: {options["cookie"]}\r\nConnection: keep-alive\r\n\r\n'
+        ).encode()
+
+        stats = {'connected': 0, 'failed': 0, 'dropped': 0, 'frames': 0}
+        errors = {}
+
+        async def hold(deadline):
+            try:
+                reader, writer = await asyncio.open_connection(url.hostname, port, ssl=url.scheme == 'https')
+                writer.write(request)
+                await writer.drain()
+                status = await reader.readline()
+                if b' 200 ' not in status:
+                    raise ConnectionError(status.decode(errors='replace').strip() or 'no response')
+            except (OSError, ConnectionError) as e:
+                stats['failed'] += 1
+                errors[str(e)] = errors.get(str(e), 0) + 1
+                return
+            stats['connected'] += 1
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        line = await asyncio.wait_for(reader.readline(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                    if not line:
+                        stats['dropped'] += 1
+                        break
+                    if line.startswith((b'data:', b': keepalive')):
+                        stats['frames'] += 1
+            finally:
+                writer.close()
+
+        started = time.monotonic()
+        deadline = started + options['hold']
+        await asyncio.gather(*(hold(deadline) for _ in range(options['connections'])))
+
+        self.stdout.write(
+            f'{options["connections"]} connections to {options["url"]} held {options["hold"]:.0f}s: '
+            f'{stats["connected"]} connected, {stats["failed"]} failed, {stats["dropped"]} dropped early, '
+            f'{stats["frames"]} event/keepalive frames received'
+        )
+        for error, n in sorted(errors.items(), key=lambda item: -item[1])[:5]:
+            self.stdout.write(f'  {n} x {error}')
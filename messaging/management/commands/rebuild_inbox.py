@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from messaging.models import Conversation, InboxEntry
+
+
+class Command(BaseCommand):
+    help = 'Rebuild every user\'s inbox entries from conversations and messages'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Conversations fetched per round trip',
+        )
+
+    def handle(self, *args, **options):
+        rebuilt = 0
+        for conversation in Conversation.objects.order_by('pk').iterator(chunk_size=options['chunk_size']):
+            InboxEntry.rebuild(conversation)
+            rebuilt += 1
+        
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt inbox entries for {rebuilt} conversations.'))
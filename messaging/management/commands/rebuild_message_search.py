@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from messaging import search
+from messaging.models import Conversation, MessageSearchTerm
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the local message search index from conversations and messages'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Conversations fetched per round trip',
+        )
+
+    def handle(self, *args, **options):
+        if search.get_backend() != 'index':
+            raise CommandError('MESSAGE_SEARCH_BACKEND does not use the local index; nothing to rebuild.')
+        
+        MessageSearchTerm.objects.all().delete()
+        rebuilt = 0
+        conversations = Conversation.objects.order_by('pk').prefetch_related('participants')
+        for conversation in conversations.iterator(chunk_size=options['chunk_size']):
+            user_ids = [user.pk for user in conversation.participants.all()]
+            search.index_conversation(conversation.pk, user_ids)
+            rebuilt += 1
+        
+        self.stdout.write(self.style.SUCCESS(f'Indexed messages of {rebuilt} conversations.'))
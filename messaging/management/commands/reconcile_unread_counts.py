@@ -0,0 +1,48 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from messaging.models import InboxEntry, UnreadCounter
+
+
+class Command(BaseCommand):
+    help = 'Recompute every user\'s denormalized unread message counter'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted counters without writing corrections',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        
+        # Messages from others above each participant's read watermark
+        unread = Q(conversation__messages__pk__gt=F('last_read_message_id')) & ~Q(conversation__messages__sender_id=F('user_id'))
+        actual = dict(
+            InboxEntry.objects.values('user_id')
+            .annotate(unread=Count('conversation__messages', filter=unread))
+            .values_list('user_id', 'unread')
+        )
+        stored = dict(UnreadCounter.objects.values_list('user_id', 'count'))
+        
+        drifted = {
+            user_id: actual.get(user_id, 0)
+            for user_id in set(actual) | set(stored)
+            if actual.get(user_id, 0) != stored.get(user_id)
+        }
+        for user_id, count in sorted(drifted.items()):
+            self.stdout.write(f'user {user_id}: {stored.get(user_id, "missing")} -> {count}')
+        
+        if drifted and not dry_run:
+            with transaction.atomic():
+                for user_id, count in drifted.items():
+                    UnreadCounter.objects.update_or_create(user_id=user_id, defaults={'count': count})
+            cache.delete_many([UnreadCounter.cache_key(user_id) for user_id in drifted])
+        
+        action = 'Found' if dry_run else 'Reconciled'
+        self.stdout.write(
+            self.style.SUCCESS(f'{action} {len(drifted)} drifted counter{"" if len(drifted) == 1 else "s"}.')
+        )
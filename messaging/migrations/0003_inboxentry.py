@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_inbox(apps, schema_editor):
+    Conversation = apps.get_model('messaging', 'Conversation')
+    Message = apps.get_model('messaging', 'Message')
+    InboxEntry = apps.get_model('messaging', 'InboxEntry')
+    for conversation in Conversation.objects.order_by('pk').iterator(chunk_size=500):
+        participants = list(conversation.participants.values_list('pk', 'first_name', 'last_name', 'username'))
+        messages = Message.objects.filter(conversation=conversation)
+        last = messages.order_by('-created_at', '-pk').values_list('sender_id', 'content', 'created_at').first()
+        unread_by_sender = dict(
+            messages.filter(is_read=False).values('sender_id').annotate(n=Count('pk')).values_list('sender_id', 'n')
+        )
+        message_count = messages.count()
+        entries = []
+        for user_id, *_ in participants:
+            other = next((p for p in participants if p[0] != user_id), None)
+            entries.append(InboxEntry(
+                user_id=user_id,
+                conversation=conversation,
+                other_participant_id=other[0] if other else None,
+                other_participant_name=(f'{other[1]} {other[2]}'.strip() or other[3]) if other else '',
+                last_sender_id=last[0] if last else None,
+                last_message_snippet=last[1][:200] if last else '',
+                last_message_at=last[2] if last else conversation.created_at,
+                message_count=message_count,
+                unread_count=sum(n for sender_id, n in unread_by_sender.items() if sender_id != user_id),
+            ))
+        InboxEntry.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0002_unreadcounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InboxEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('other_participant_name', models.CharField(blank=True, max_length=300)),
+                ('last_message_snippet', models.CharField(blank=True, max_length=200)),
+                ('last_message_at', models.DateTimeField()),
+                ('message_count', models.PositiveIntegerField(default=0)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to='messaging.conversation')),
+                ('last_sender', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('other_participant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Inbox entries',
+                'indexes': [models.Index(fields=['user', '-last_message_at', '-id'], name='messaging_i_user_id_548da5_idx')],
+                'unique_together': {('user', 'conversation')},
+            },
+        ),
+        migrations.RunPython(backfill_inbox, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:43
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils import timezone
+
+
+def merge_duplicate_conversations(apps, schema_editor):
+    """Set the pair key of two-person conversations, folding duplicates into the oldest."""
+    Conversation = apps.get_model('messaging', 'Conversation')
+    Message = apps.get_model('messaging', 'Message')
+    InboxEntry = apps.get_model('messaging', 'InboxEntry')
+    Participant = Conversation.participants.through
+
+    participants = {}
+    for conversation_id, user_id in Participant.objects.values_list('conversation_id', 'user_id').iterator():
+        participants.setdefault(conversation_id, []).append(user_id)
+
+    groups = {}
+    for conversation_id, project_id in Conversation.objects.order_by('pk').values_list('pk', 'project_id').iterator():
+        user_ids = participants.get(conversation_id, [])
+        if len(user_ids) == 2:
+            key = (min(user_ids), max(user_ids), project_id or 0)
+            groups.setdefault(key, []).append(conversation_id)
+
+    for (low, high, project), conversation_ids in groups.items():
+        keeper, duplicates = conversation_ids[0], conversation_ids[1:]
+        if duplicates:
+            Message.objects.filter(conversation_id__in=duplicates).update(conversation_id=keeper)
+            Conversation.objects.filter(pk__in=duplicates).delete()
+            _rebuild_inbox(Message, InboxEntry, keeper)
+        Conversation.objects.filter(pk=keeper).update(pair_low=low, pair_high=high, pair_project=project)
+
+
+def _rebuild_inbox(Message, InboxEntry, conversation_id):
+    messages = Message.objects.filter(conversation_id=conversation_id)
+    last = messages.order_by('-created_at', '-pk').values_list('sender_id', 'content', 'created_at').first()
+    unread_by_sender = dict(
+        messages.filter(is_read=False).values('sender_id').annotate(n=Count('pk')).values_list('sender_id', 'n')
+    )
+    message_count = messages.count()
+    for entry in InboxEntry.objects.filter(conversation_id=conversation_id):
+        if last:
+            entry.last_sender_id, entry.last_message_snippet, entry.last_message_at = last[0], last[1][:200], last[2]
+        entry.message_count = message_count
+        entry.unread_count = sum(n for sender_id, n in unread_by_sender.items() if sender_id != entry.user_id)
+        entry.updated_at = timezone.now()
+        entry.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0004_delta_sync_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='pair_high',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='pair_low',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='pair_project',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(merge_duplicate_conversations, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(fields=('pair_low', 'pair_high', 'pair_project'), name='messaging_conversation_pair_unique'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:46
+
+from django.db import migrations, models
+from django.db.models import Max, Min, Sum
+
+
+def backfill_watermarks(apps, schema_editor):
+    """Set each entry's watermark just below its first unread message from others.
+    
+    Read messages above that point count as unread again, so each entry's
+    unread_count and each user's UnreadCounter are recomputed to match.
+    """
+    Message = apps.get_model('messaging', 'Message')
+    InboxEntry = apps.get_model('messaging', 'InboxEntry')
+    UnreadCounter = apps.get_model('messaging', 'UnreadCounter')
+    for entry in InboxEntry.objects.order_by('pk').iterator(chunk_size=500):
+        others = Message.objects.filter(conversation_id=entry.conversation_id).exclude(sender_id=entry.user_id)
+        first_unread = others.filter(is_read=False).aggregate(pk=Min('pk'))['pk']
+        if first_unread is not None:
+            watermark = first_unread - 1
+        else:
+            watermark = Message.objects.filter(conversation_id=entry.conversation_id).aggregate(pk=Max('pk'))['pk'] or 0
+        InboxEntry.objects.filter(pk=entry.pk).update(
+            last_read_message_id=watermark,
+            last_read_at=others.filter(pk__lte=watermark).aggregate(at=Max('read_at'))['at'],
+            unread_count=others.filter(pk__gt=watermark).count(),
+        )
+    
+    totals = dict(
+        InboxEntry.objects.values('user_id').annotate(total=Sum('unread_count')).values_list('user_id', 'total')
+    )
+    for user_id, total in totals.items():
+        UnreadCounter.objects.update_or_create(user_id=user_id, defaults={'count': total or 0})
+    UnreadCounter.objects.exclude(user_id__in=totals).update(count=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0006_message_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inboxentry',
+            name='last_read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='inboxentry',
+            name='last_read_message_id',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_watermarks, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='message',
+            name='is_read',
+        ),
+        migrations.RemoveField(
+            model_name='message',
+            name='read_at',
+        ),
+    ]
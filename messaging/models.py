@@ -1,9 +1,29 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Case, F, Value, When
 from django.utils import timezone
 
+from . import realtime
+
 User = get_user_model()
 
+UNREAD_CACHE_TIMEOUT = 60 * 5
+
+# Characters of the last message kept on each inbox entry
+SNIPPET_LENGTH = 200
+
+
+def _floored_add(field, delta):
+    """F(field) + delta, clamped at zero; unsigned columns cannot go negative even transiently."""
+    if delta >= 0:
+        return F(field) + delta
+    return Case(When(**{f'{field}__gte': -delta}, then=F(field) + delta), default=Value(0))
+
+
+def display_name(first_name, last_name, username):
+    return f'{first_name} {last_name}'.strip() or username
+
 
 class Conversation(models.Model):
     """Conversation between two users."""
@@ -14,15 +34,55 @@ class Conversation(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Canonical key of a two-person conversation: the lower and higher
+    # participant id and the project id, or 0 for none (a NULL would let
+    # duplicates through the unique index). Set by between().
+    pair_low = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    pair_high = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    pair_project = models.PositiveBigIntegerField(default=0, editable=False)
+    # Highest message id moved to MessageArchive, or 0 if none
+    archived_up_to = models.PositiveBigIntegerField(default=0, editable=False)
     
     class Meta:
         ordering = ['-updated_at']
+        constraints = [
+            models.UniqueConstraint(fields=['pair_low', 'pair_high', 'pair_project'], name='messaging_conversation_pair_unique'),
+        ]
     
     def __str__(self):
         if self.project:
             return f"Conversation about {self.project.title}"
         return f"Conversation between {', '.join([p.full_name for p in self.participants.all()])}"
     
+    @staticmethod
+    def pair_key(user_id, other_id, project_id=None):
+        """Lookup kwargs for the conversation between two users, optionally about a project."""
+        low, high = sorted((user_id, other_id))
+        return {'pair_low': low, 'pair_high': high, 'pair_project': project_id or 0}
+    
+    @classmethod
+    def between(cls, user, other, project=None, **defaults):
+        """Get or create the conversation between two users (and project).
+        
+        Returns (conversation, created). One indexed lookup when it exists.
+        Concurrent creators race on the unique pair key, and the loser gets
+        the winner's conversation.
+        """
+        key = cls.pair_key(user.pk, other.pk, project.pk if project else None)
+        conversation = cls.objects.filter(**key).first()
+        if conversation is not None:
+            return conversation, False
+        try:
+            with transaction.atomic():
+                conversation = cls.objects.create(project=project, **key, **defaults)
+                conversation.participants.add(user, other)
+        except IntegrityError:
+            # A locking read sees the winner's row even under MySQL's
+            # repeatable-read snapshot
+            with transaction.atomic():
+                return cls.objects.select_for_update().get(**key), False
+        return conversation, True
+    
     def get_other_participant(self, user):
         """Get the other participant in the conversation."""
         return self.participants.exclude(id=user.id).first()
@@ -35,6 +95,38 @@ class Conversation(models.Model):
     def last_message(self):
         """Get the latest message in the conversation (property for templates)."""
         return self.get_latest_message()
+    
+    def mark_read(self, user, up_to):
+        """Advance user's read watermark to message id up_to.
+        
+        up_to must be the id of a message in this conversation. Messages at
+        or below a participant's watermark count as read by them, so this is
+        a single-row update of their inbox entry whatever the number of
+        messages, plus their unread counter. Returns the number of messages
+        from others that became read.
+        """
+        with transaction.atomic():
+            # Locking the entry orders this against a concurrent fan_out
+            entry = InboxEntry.objects.select_for_update().filter(user=user, conversation=self).first()
+            if entry is None or up_to <= entry.last_read_message_id:
+                return 0
+            still_unread = self.messages.filter(pk__gt=up_to).exclude(sender=user).count()
+            newly_read = entry.unread_count - still_unread
+            now = timezone.now()
+            InboxEntry.objects.filter(pk=entry.pk).update(
+                last_read_message_id=up_to, last_read_at=now, unread_count=still_unread, updated_at=now,
+            )
+            UnreadCounter.adjust({user.pk: -newly_read})
+            transaction.on_commit(lambda: realtime.publish_read(self.pk, user.pk, up_to))
+        return newly_read
+    
+    def read_up_to(self, exclude_user):
+        """Lowest read watermark among participants other than exclude_user.
+        
+        A message at or below it has been read by everyone it was sent to.
+        """
+        watermarks = self.inbox_entries.exclude(user=exclude_user).values_list('last_read_message_id', flat=True)
+        return min(watermarks, default=0)
 
 
 class Message(models.Model):
@@ -43,22 +135,27 @@ class Message(models.Model):
     conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages')
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
     content = models.TextField()
-    is_read = models.BooleanField(default=False)
-    read_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Delta sync and history pages walk a conversation by id
+            models.Index(fields=['conversation', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.sender.full_name} - {self.conversation}"
     
-    def mark_as_read(self):
-        """Mark message as read."""
-        if not self.is_read:
-            self.is_read = True
-            self.read_at = timezone.now()
-            self.save()
+    def save(self, *args, **kwargs):
+        # Keep the unread counter and inbox fan-out in messaging.signals in
+        # the same transaction as the message itself
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
+    def mark_as_read(self, user):
+        """Mark this message, and everything before it, as read by user."""
+        return self.conversation.mark_read(user, self.pk)
 
 
 class MessageAttachment(models.Model):
@@ -73,3 +170,219 @@ class MessageAttachment(models.Model):
     def __str__(self):
         return f"{self.message} - {self.filename}"
 
+
+
+class UnreadCounter(models.Model):
+    """Denormalized number of unread messages addressed to a user.
+    
+    Incremented for every recipient when a message is created and decremented
+    when messages are marked read, so the header badge never counts over
+    Message. Reads go through the cache; reconcile_unread_counts repairs drift.
+    """
+    
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='unread_counter')
+    count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user.full_name}: {self.count} unread"
+    
+    @staticmethod
+    def cache_key(user_id):
+        # v2: counted from read watermarks (migration 0007); counts cached
+        # under the old key are never read again
+        return f'messaging:unread:v2:{user_id}'
+    
+    @staticmethod
+    def count_unread(user_id):
+        """Count a user's unread messages from scratch."""
+        return Message.objects.filter(
+            conversation__inbox_entries__user_id=user_id,
+            pk__gt=F('conversation__inbox_entries__last_read_message_id'),
+        ).exclude(sender_id=user_id).count()
+    
+    @classmethod
+    def get_count(cls, user_id):
+        """Return a user's unread count, normally from a single cache hit."""
+        key = cls.cache_key(user_id)
+        count = cache.get(key)
+        if count is None:
+            count = cls.objects.filter(user_id=user_id).values_list('count', flat=True).first()
+            if count is None:
+                counter, created = cls.objects.get_or_create(
+                    user_id=user_id, defaults={'count': cls.count_unread(user_id)},
+                )
+                count = counter.count
+            cache.set(key, count, UNREAD_CACHE_TIMEOUT)
+        return count
+    
+    @classmethod
+    def adjust(cls, deltas):
+        """Apply {user_id: delta} to the counters, flooring at zero."""
+        by_delta = {}
+        for user_id, delta in deltas.items():
+            if delta:
+                by_delta.setdefault(delta, []).append(user_id)
+        
+        for delta, user_ids in by_delta.items():
+            updated = cls.objects.filter(user_id__in=user_ids).update(
+                count=_floored_add('count', delta), updated_at=timezone.now(),
+            )
+            if updated < len(user_ids):
+                # First change for these users: start from the true count,
+                # which already includes this change
+                existing = set(cls.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+                for user_id in set(user_ids) - existing:
+                    cls.objects.get_or_create(user_id=user_id, defaults={'count': cls.count_unread(user_id)})
+        
+        keys = [cls.cache_key(user_id) for user_id, delta in deltas.items() if delta]
+        if keys:
+            transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+class InboxEntry(models.Model):
+    """One row per (user, conversation) holding what the inbox page shows.
+    
+    Written when a message is created, in the same transaction, so listing
+    a user's conversations is a single keyset-paginated query on
+    (user, last_message_at, id) with no per-row lookups.
+    """
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='inbox_entries')
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='inbox_entries')
+    other_participant = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    other_participant_name = models.CharField(max_length=300, blank=True)
+    last_sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_snippet = models.CharField(max_length=SNIPPET_LENGTH, blank=True)
+    last_message_at = models.DateTimeField()
+    message_count = models.PositiveIntegerField(default=0)
+    unread_count = models.PositiveIntegerField(default=0)
+    # Read watermark: messages with an id up to this are read by the user
+    last_read_message_id = models.PositiveBigIntegerField(default=0)
+    last_read_at = models.DateTimeField(null=True, blank=True)
+    # Bumped by every change, for delta sync; bulk updates set it explicitly
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['user', 'conversation']
+        indexes = [
+            models.Index(fields=['user', '-last_message_at', '-id']),
+            models.Index(fields=['user', 'updated_at', 'id']),
+        ]
+        verbose_name_plural = 'Inbox entries'
+    
+    def __str__(self):
+        return f"Inbox entry for user {self.user_id}: conversation {self.conversation_id}"
+    
+    @classmethod
+    def fan_out(cls, message):
+        """Apply a new message to every participant's entry.
+        
+        Returns the ids of the recipients (participants other than the sender).
+        """
+        participant_ids = list(message.conversation.participants.values_list('pk', flat=True))
+        recipients = [user_id for user_id in participant_ids if user_id != message.sender_id]
+        latest = {
+            'last_sender_id': message.sender_id,
+            'last_message_snippet': message.content[:SNIPPET_LENGTH],
+            'last_message_at': message.created_at,
+            'message_count': F('message_count') + 1,
+            'updated_at': timezone.now(),
+        }
+        entries = cls.objects.filter(conversation_id=message.conversation_id)
+        updated = entries.filter(user_id=message.sender_id).update(**latest)
+        if recipients:
+            updated += entries.filter(user_id__in=recipients).update(
+                unread_count=F('unread_count') + 1, **latest,
+            )
+        if updated < len(participant_ids):
+            # Participants without an entry yet, e.g. conversations created
+            # before the inbox existed: build them from the messages
+            cls.rebuild(message.conversation)
+        return recipients
+    
+    @classmethod
+    def rebuild(cls, conversation):
+        """Recompute every participant's entry for a conversation from its messages."""
+        from .archive import archived_count, latest_archived
+        
+        participants = list(conversation.participants.values_list('pk', 'first_name', 'last_name', 'username'))
+        messages = conversation.messages.all()
+        message_count = messages.count()
+        last = messages.order_by('-created_at', '-pk').values_list('sender_id', 'content', 'created_at', 'pk').first()
+        if conversation.archived_up_to:
+            message_count += archived_count(conversation.pk)
+            archived = latest_archived(conversation.pk)
+            if archived and (last is None or archived[2:] > last[2:]):
+                last = archived
+        watermarks = dict(cls.objects.filter(conversation=conversation).values_list('user_id', 'last_read_message_id'))
+        
+        with transaction.atomic():
+            for user_id, *_ in participants:
+                other = next((p for p in participants if p[0] != user_id), None)
+                cls.objects.update_or_create(
+                    user_id=user_id,
+                    conversation=conversation,
+                    defaults={
+                        'other_participant_id': other[0] if other else None,
+                        'other_participant_name': display_name(*other[1:]) if other else '',
+                        'last_sender_id': last[0] if last else None,
+                        'last_message_snippet': last[1][:SNIPPET_LENGTH] if last else '',
+                        'last_message_at': last[2] if last else conversation.created_at,
+                        'message_count': message_count,
+                        'unread_count': messages.filter(pk__gt=watermarks.get(user_id, 0)).exclude(sender_id=user_id).count(),
+                    },
+                )
+            cls.objects.filter(conversation=conversation).exclude(
+                user_id__in=[p[0] for p in participants],
+            ).delete()
+
+
+class MessageSearchTerm(models.Model):
+    """Posting in the local message search index (see messaging/search.py).
+    
+    One row per (participant, term, message), so a user's search reads
+    only their own postings and needs no participant join.
+    """
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    term = models.CharField(max_length=64)
+    message = models.ForeignKey(Message, on_delete=models.CASCADE, related_name='+')
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='+')
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'term', 'message'], name='messaging_search_posting_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'conversation']),
+        ]
+    
+    def __str__(self):
+        return f"{self.term!r} in message {self.message_id} for user {self.user_id}"
+
+
+class MessageArchive(models.Model):
+    """A batch of old messages moved out of Message (see messaging/archive.py).
+    
+    data is the zlib-compressed JSON list of [id, sender_id, created_at,
+    content] rows, oldest first. Batches of one conversation cover disjoint
+    id ranges.
+    """
+    
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='archives')
+    first_message_id = models.PositiveBigIntegerField()
+    last_message_id = models.PositiveBigIntegerField()
+    message_count = models.PositiveIntegerField()
+    first_created_at = models.DateTimeField()
+    last_created_at = models.DateTimeField()
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['conversation', '-last_message_id']),
+        ]
+    
+    def __str__(self):
+        return f"Archive of messages {self.first_message_id}-{self.last_message_id} in conversation {self.conversation_id}"
@@ -0,0 +1,150 @@
+"""
+Online and typing presence, kept in a TTL key store instead of the database.
+
+Open pages send a heartbeat every HEARTBEAT_INTERVAL seconds and a typing
+notice while the user types. Each one sets a key that expires after
+ONLINE_TTL or TYPING_TTL. A user who closes the tab goes offline on their
+own once the key lapses, so nothing ever has to be cleaned up.
+
+Each process keeps its own store. When PRESENCE_SHARED is true (the
+default), keys are also written to the default cache, and queries read the
+cache so all nodes agree. A user's repeated heartbeats within
+SHARED_REFRESH seconds of the last shared write are absorbed by the local
+store and never reach the cache. Batch queries read every key with a single
+get_many, so a whole inbox page costs one cache round trip.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+CACHE_KEY_PREFIX = 'presence'
+
+# Seconds a heartbeat keeps a user online; clients beat more often than this
+ONLINE_TTL = 60
+HEARTBEAT_INTERVAL = 25
+
+# Seconds a typing notice lasts; clients resend it every 3 seconds of typing
+TYPING_TTL = 6
+
+# Minimum seconds between shared writes of one user's online key
+SHARED_REFRESH = 20
+
+# Above this many keys, expired ones are dropped from the in-process store
+MAX_LOCAL_KEYS = 10000
+
+
+class TTLStore:
+    """In-process keys that expire a fixed time after they were last set, guarded by one lock."""
+
+    def __init__(self):
+        self._expires = {}
+        self._lock = threading.Lock()
+
+    def set(self, key, ttl, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._expires[key] = now + ttl
+            if len(self._expires) > MAX_LOCAL_KEYS:
+                self._prune(now)
+
+    def add(self, key, ttl, now=None):
+        """Set key unless it is already live; return whether it was set."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._expires.get(key, 0) > now:
+                return False
+            self._expires[key] = now + ttl
+            if len(self._expires) > MAX_LOCAL_KEYS:
+                self._prune(now)
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            self._expires.pop(key, None)
+
+    def live(self, keys, now=None):
+        """Return the subset of keys that have not expired."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return {key for key in keys if self._expires.get(key, 0) > now}
+
+    def clear(self):
+        with self._lock:
+            self._expires.clear()
+
+    def _prune(self, now):
+        expired = [key for key, expires in self._expires.items() if expires <= now]
+        for key in expired:
+            del self._expires[key]
+        if len(self._expires) > MAX_LOCAL_KEYS:
+            self._expires.clear()
+
+
+local_store = TTLStore()
+
+
+def _shared():
+    return getattr(settings, 'PRESENCE_SHARED', True)
+
+
+def online_key(user_id):
+    return f'online:{user_id}'
+
+
+def typing_key(conversation_id, user_id):
+    return f'typing:{conversation_id}:{user_id}'
+
+
+def _live(keys):
+    """Subset of keys that are live, from the cache when shared, in one call."""
+    if not keys:
+        return set()
+    if _shared():
+        found = cache.get_many([f'{CACHE_KEY_PREFIX}:{key}' for key in keys])
+        return {key for key in keys if f'{CACHE_KEY_PREFIX}:{key}' in found}
+    return local_store.live(keys)
+
+
+def heartbeat(user_id):
+    """Mark a user online for the next ONLINE_TTL seconds."""
+    key = online_key(user_id)
+    local_store.set(key, ONLINE_TTL)
+    if _shared() and local_store.add(f'synced:{key}', SHARED_REFRESH):
+        cache.set(f'{CACHE_KEY_PREFIX}:{key}', 1, ONLINE_TTL)
+
+
+def typing(conversation_id, user_id):
+    """Mark a user as typing in a conversation; typing also counts as a heartbeat."""
+    key = typing_key(conversation_id, user_id)
+    local_store.set(key, TYPING_TTL)
+    if _shared():
+        cache.set(f'{CACHE_KEY_PREFIX}:{key}', 1, TYPING_TTL)
+    heartbeat(user_id)
+
+
+def stopped_typing(conversation_id, user_id):
+    """Clear a typing mark early, e.g. once the message is sent."""
+    key = typing_key(conversation_id, user_id)
+    local_store.delete(key)
+    if _shared():
+        cache.delete(f'{CACHE_KEY_PREFIX}:{key}')
+
+
+def online_user_ids(user_ids):
+    """Return the set of user_ids that are online."""
+    user_ids = set(user_ids)
+    live = _live([online_key(user_id) for user_id in user_ids])
+    return {user_id for user_id in user_ids if online_key(user_id) in live}
+
+
+def typing_user_ids(conversation_id, user_ids):
+    """Return the set of user_ids typing in a conversation."""
+    user_ids = set(user_ids)
+    live = _live([typing_key(conversation_id, user_id) for user_id in user_ids])
+    return {user_id for user_id in user_ids if typing_key(conversation_id, user_id) in live}
+
+
+def is_online(user_id):
+    return user_id in online_user_ids([user_id])
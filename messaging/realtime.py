@@ -0,0 +1,215 @@
+"""
+Real-time conversation events over Server-Sent Events.
+
+Participants viewing a conversation hold one streaming response open to
+conversation_events. Three kinds of small JSON events are sent to them:
+new messages, read receipts and typing notices. Events are published to
+a broker channel per conversation once the writing transaction commits.
+
+The default InProcessBroker only reaches clients connected to the same
+process, which is enough for a single ASGI worker. For several workers
+or nodes, set MESSAGING_BROKER to the dotted path of a class with the
+same subscribe/publish interface backed by a shared pub/sub service.
+Clients resume after a reconnect with Last-Event-ID, and any messages
+they missed are replayed from the database.
+
+Streaming needs the ASGI entry point (freelancer_marketplace.asgi).
+Under WSGI each open stream would hold a worker thread.
+"""
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Seconds between keepalive comments on an idle stream
+KEEPALIVE_SECONDS = 20
+
+# Browser reconnect delay after a dropped stream, in milliseconds
+RETRY_MS = 3000
+
+# Undelivered events buffered per connection before it is closed; the
+# client then reconnects and catches up from the database
+MAX_PENDING_EVENTS = 100
+
+# Messages replayed at most when a client resumes with Last-Event-ID
+MAX_REPLAY = 200
+
+
+class Subscription:
+    """One connection's queue on a broker channel."""
+
+    def __init__(self, broker, channel, loop):
+        self.broker = broker
+        self.channel = channel
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=MAX_PENDING_EVENTS)
+        self.overflowed = False
+
+    def deliver(self, event):
+        """Queue an event; safe to call from any thread."""
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The connection's event loop has shut down
+            self.broker.unsubscribe(self)
+
+    def _put(self, event):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self, timeout):
+        """Wait for the next event; None means the connection fell behind."""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Publish/subscribe between threads and event loops of one process."""
+
+    def __init__(self):
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        """Subscribe the running event loop to channel."""
+        subscription = Subscription(self, channel, asyncio.get_running_loop())
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[subscription.channel]
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def subscriber_count(self, channel=None):
+        with self._lock:
+            if channel is not None:
+                return len(self._channels.get(channel, ()))
+            return sum(len(subscribers) for subscribers in self._channels.values())
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the process-wide broker named by MESSAGING_BROKER."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, 'MESSAGING_BROKER', 'messaging.realtime.InProcessBroker')
+                _broker = import_string(path)()
+    return _broker
+
+
+def conversation_channel(conversation_id):
+    return f'conversation:{conversation_id}'
+
+
+def message_event(message):
+    sender = message.sender
+    return {
+        'type': 'message',
+        'id': message.pk,
+        'conversation_id': message.conversation_id,
+        'sender_id': message.sender_id,
+        'sender_name': sender.get_full_name() or sender.username,
+        'content': message.content,
+        'created_at': message.created_at.isoformat(),
+    }
+
+
+def publish_message(message):
+    get_broker().publish(conversation_channel(message.conversation_id), message_event(message))
+
+
+def publish_read(conversation_id, reader_id, up_to_id):
+    """Tell participants that reader_id has read messages up to up_to_id."""
+    get_broker().publish(conversation_channel(conversation_id), {
+        'type': 'read',
+        'conversation_id': conversation_id,
+        'reader_id': reader_id,
+        'up_to': up_to_id,
+    })
+
+
+def publish_typing(conversation_id, user):
+    get_broker().publish(conversation_channel(conversation_id), {
+        'type': 'typing',
+        'conversation_id': conversation_id,
+        'user_id': user.pk,
+        'name': user.get_full_name() or user.username,
+    })
+
+
+def format_event(event):
+    """Encode an event as an SSE frame; message events carry their id for resuming."""
+    frame = f'event: {event["type"]}\ndata: {json.dumps(event, separators=(",", ":"))}\n\n'
+    if event['type'] == 'message':
+        frame = f'id: {event["id"]}\n' + frame
+    return frame
+
+
+def replay_messages(conversation_id, after_id):
+    """Message events newer than after_id, oldest first."""
+    from .models import Message
+
+    messages = (
+        Message.objects.filter(conversation_id=conversation_id, pk__gt=after_id)
+        .select_related('sender')
+        .order_by('pk')[:MAX_REPLAY]
+    )
+    return [message_event(message) for message in messages]
+
+
+async def event_stream(conversation_id, last_event_id=None, subscribed=None):
+    """Yield SSE frames for one conversation until the client disconnects.
+
+    subscribed, if given, is an asyncio.Event set once the stream is
+    registered with the broker (used by the load test).
+    """
+    from asgiref.sync import sync_to_async
+
+    subscription = get_broker().subscribe(conversation_channel(conversation_id))
+    if subscribed is not None:
+        subscribed.set()
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        # Subscribed before replaying, so nothing falls in between; the
+        # client drops any duplicates by id
+        if last_event_id is not None:
+            for event in await sync_to_async(replay_messages)(conversation_id, last_event_id):
+                yield format_event(event)
+        while True:
+            try:
+                event = await subscription.get(KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if event is None:
+                # Fell behind; end the stream so the client resumes from the database
+                break
+            yield format_event(event)
+    finally:
+        subscription.close()
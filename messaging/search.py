@@ -0,0 +1,148 @@
+"""
+Full-text search over the messages a user can see.
+
+Two backends, picked by MESSAGE_SEARCH_BACKEND:
+
+- 'fulltext' uses a MySQL FULLTEXT index on Message.content (created by
+  migration 0006), which InnoDB keeps up to date itself. The match is
+  joined to the user's conversation memberships.
+- 'index' uses MessageSearchTerm, a local inverted index with one posting
+  per (participant, term, message). It is written incrementally when a
+  message is created and when participants change, so a query reads only
+  the searching user's postings.
+
+'auto' (the default) picks 'fulltext' on MySQL and 'index' elsewhere.
+After switching to 'index' on an existing database, run the
+rebuild_message_search command.
+
+Every term must match. Results are newest first and paginated by message id.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, Count
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Message, MessageSearchTerm
+
+SEARCH_PAGE_SIZE = 20
+
+# Longest term stored; longer words are truncated
+MAX_TERM_LENGTH = 64
+
+# Shortest term searched; InnoDB ignores shorter words by default
+# (innodb_ft_min_token_size)
+MIN_TERM_LENGTH = 3
+
+# Characters of context shown around the first match
+SNIPPET_CONTEXT = 80
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def get_backend():
+    backend = getattr(settings, 'MESSAGE_SEARCH_BACKEND', 'auto')
+    if backend == 'auto':
+        return 'fulltext' if connection.vendor == 'mysql' else 'index'
+    return backend
+
+
+def tokenize(text):
+    """Distinct lowercase terms of text, in order of first appearance."""
+    terms = {}
+    for word in _WORD_RE.findall(text.lower()):
+        if len(word) >= MIN_TERM_LENGTH:
+            terms.setdefault(word[:MAX_TERM_LENGTH])
+    return list(terms)
+
+
+def index_message(message, user_ids):
+    """Add postings for a new message for each participant in user_ids."""
+    if get_backend() != 'index':
+        return
+    terms = tokenize(message.content)
+    MessageSearchTerm.objects.bulk_create([
+        MessageSearchTerm(user_id=user_id, term=term, message_id=message.pk, conversation_id=message.conversation_id)
+        for user_id in user_ids
+        for term in terms
+    ], ignore_conflicts=True)
+
+
+def index_conversation(conversation_id, user_ids, batch_size=500):
+    """Add postings for every message of a conversation, e.g. for new participants."""
+    if get_backend() != 'index':
+        return
+    messages = Message.objects.filter(conversation_id=conversation_id).values_list('pk', 'content')
+    postings = []
+    for message_id, content in messages.iterator(chunk_size=batch_size):
+        postings.extend(
+            MessageSearchTerm(user_id=user_id, term=term, message_id=message_id, conversation_id=conversation_id)
+            for user_id in user_ids
+            for term in tokenize(content)
+        )
+        if len(postings) >= batch_size:
+            MessageSearchTerm.objects.bulk_create(postings, ignore_conflicts=True)
+            postings = []
+    MessageSearchTerm.objects.bulk_create(postings, ignore_conflicts=True)
+
+
+def unindex_conversation(conversation_id, user_ids):
+    """Drop postings of users who left a conversation."""
+    MessageSearchTerm.objects.filter(conversation_id=conversation_id, user_id__in=user_ids).delete()
+
+
+def search(user, query, before=None, limit=SEARCH_PAGE_SIZE):
+    """Return (messages, terms, has_more) for the user's messages matching every term of query."""
+    terms = tokenize(query)
+    if not terms:
+        return [], terms, False
+
+    if get_backend() == 'fulltext':
+        # Terms are \w+ runs, so they carry no boolean-mode operators
+        against = ' '.join(f'+{term}' for term in terms)
+        matches = Message.objects.filter(conversation__participants=user).filter(
+            RawSQL('MATCH (messaging_message.content) AGAINST (%s IN BOOLEAN MODE)', [against], output_field=BooleanField())
+        )
+        if before is not None:
+            matches = matches.filter(pk__lt=before)
+        ids = list(matches.order_by('-pk').values_list('pk', flat=True)[:limit + 1])
+    else:
+        postings = MessageSearchTerm.objects.filter(user=user, term__in=terms)
+        if before is not None:
+            postings = postings.filter(message_id__lt=before)
+        ids = list(
+            postings.values('message_id')
+            .annotate(matched=Count('term'))
+            .filter(matched=len(terms))
+            .order_by('-message_id')
+            .values_list('message_id', flat=True)[:limit + 1]
+        )
+
+    has_more = len(ids) > limit
+    ids = ids[:limit]
+    messages = Message.objects.filter(pk__in=ids).select_related('sender', 'conversation').order_by('-pk')
+    return list(messages), terms, has_more
+
+
+def highlight(content, terms, context=SNIPPET_CONTEXT):
+    """HTML snippet of content around the first matching term, with matches in <mark>."""
+    if not terms:
+        return escape(content[:context * 2])
+    pattern = re.compile(r'\b(?:%s)\w*' % '|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+    first = pattern.search(content)
+    start = max(0, first.start() - context) if first else 0
+    end = min(len(content), start + context * 2)
+    snippet = content[start:end]
+
+    parts = ['…' if start else '']
+    position = 0
+    for match in pattern.finditer(snippet):
+        parts.append(escape(snippet[position:match.start()]))
+        parts.append(f'<mark>{escape(match.group())}</mark>')
+        position = match.end()
+    parts.append(escape(snippet[position:]))
+    parts.append('…' if end < len(content) else '')
+    return mark_safe(''.join(parts))
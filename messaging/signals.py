@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import realtime, search
+from .models import Conversation, InboxEntry, Message, UnreadCounter, display_name
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Message)
+def fan_out_message(sender, instance, created, **kwargs):
+    """Add a new message to inbox entries, unread counters and the search index, and push it to open streams."""
+    if created:
+        recipients = InboxEntry.fan_out(instance)
+        UnreadCounter.adjust({user_id: 1 for user_id in recipients})
+        search.index_message(instance, [instance.sender_id, *recipients])
+        transaction.on_commit(lambda: realtime.publish_message(instance))
+
+
+@receiver(m2m_changed, sender=Conversation.participants.through)
+def sync_inbox_participants(sender, instance, action, reverse, **kwargs):
+    """Give new participants an inbox entry and drop entries of removed ones."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # Changed from the user side: instance is a User
+        conversations = Conversation.objects.filter(pk__in=kwargs['pk_set'] or ())
+        if action == 'post_clear':
+            InboxEntry.objects.filter(user=instance).delete()
+            return
+    else:
+        conversations = [instance]
+    for conversation in conversations:
+        InboxEntry.rebuild(conversation)
+
+
+@receiver(m2m_changed, sender=Conversation.participants.through)
+def sync_search_participants(sender, instance, action, reverse, pk_set, **kwargs):
+    """Give new participants search postings for a conversation and drop those of removed ones."""
+    if action == 'post_clear':
+        if reverse:
+            search.MessageSearchTerm.objects.filter(user=instance).delete()
+        else:
+            search.MessageSearchTerm.objects.filter(conversation=instance).delete()
+    elif action in ('post_add', 'post_remove'):
+        # pk_set holds users, or conversations when changed from the user side
+        pairs = [(pk, [instance.pk]) for pk in pk_set] if reverse else [(instance.pk, pk_set)]
+        for conversation_id, user_ids in pairs:
+            if action == 'post_add':
+                search.index_conversation(conversation_id, user_ids)
+            else:
+                search.unindex_conversation(conversation_id, user_ids)
+
+
+@receiver(post_save, sender=User)
+def rename_inbox_participant(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the denormalized participant name on other users' inbox entries current."""
+    if created or (update_fields is not None and not {'first_name', 'last_name', 'username'} & set(update_fields)):
+        return
+    name = display_name(instance.first_name, instance.last_name, instance.username)
+    InboxEntry.objects.filter(other_participant=instance).exclude(other_participant_name=name).update(
+        other_participant_name=name, updated_at=timezone.now(),
+    )
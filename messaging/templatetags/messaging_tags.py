@@ -1,5 +1,5 @@
 from django import template
-from ..models import Conversation
+from ..models import UnreadCounter
 
 register = template.Library()
 
@@ -9,16 +9,4 @@ def get_unread_message_count(user):
     if not user.is_authenticated:
         return 0
     
-    conversations = Conversation.objects.filter(
-        participants=user,
-        is_active=True
-    )
-    
-    total_unread = 0
-    for conversation in conversations:
-        unread_count = conversation.messages.filter(
-            is_read=False
-        ).exclude(sender=user).count()
-        total_unread += unread_count
-    
-    return total_unread
+    return UnreadCounter.get_count(user.pk)
@@ -0,0 +1,352 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from . import views
+from .archive import archive_batch, archived_count, archived_messages
+from .models import SNIPPET_LENGTH, Conversation, InboxEntry, Message, MessageArchive, MessageAttachment, UnreadCounter
+from .templatetags.messaging_tags import get_unread_message_count
+
+
+class MessagingTestMixin:
+    """Two users in a conversation, and helpers to send and inspect messages."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice', 'alice@example.com', None, role='employer', first_name='Alice')
+        cls.bob = User.objects.create_user('bob', 'bob@example.com', None, role='freelancer', first_name='Bob')
+    
+    def setUp(self):
+        cache.clear()
+        self.conversation, _ = Conversation.between(self.alice, self.bob, subject='Hello')
+    
+    def send(self, sender, content='Hi', conversation=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Message.objects.create(conversation=conversation or self.conversation, sender=sender, content=content)
+    
+    def entry(self, user, conversation=None):
+        return InboxEntry.objects.get(user=user, conversation=conversation or self.conversation)
+    
+    def stored_count(self, user):
+        return UnreadCounter.objects.get(user=user).count
+
+
+class UnreadBadgeTests(MessagingTestMixin, TestCase):
+    """UnreadCounter behind the header badge."""
+    
+    def test_count_is_served_from_cache(self):
+        self.send(self.bob)
+        self.send(self.bob)
+        
+        self.assertEqual(UnreadCounter.get_count(self.alice.pk), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(UnreadCounter.get_count(self.alice.pk), 2)
+        self.assertEqual(UnreadCounter.get_count(self.bob.pk), 0)
+    
+    def test_new_message_drops_cached_count_on_commit(self):
+        self.assertEqual(UnreadCounter.get_count(self.alice.pk), 0)
+        self.send(self.bob)
+        self.assertEqual(UnreadCounter.get_count(self.alice.pk), 1)
+    
+    def test_missing_counter_is_counted_from_messages(self):
+        self.send(self.bob)
+        self.send(self.bob)
+        UnreadCounter.objects.filter(user=self.alice).delete()
+        cache.clear()
+        
+        self.assertEqual(UnreadCounter.get_count(self.alice.pk), 2)
+        self.assertEqual(self.stored_count(self.alice), 2)
+    
+    def test_adjust_floors_at_zero(self):
+        self.send(self.bob)
+        with self.captureOnCommitCallbacks(execute=True):
+            UnreadCounter.adjust({self.alice.pk: -5, self.bob.pk: 0})
+        self.assertEqual(self.stored_count(self.alice), 0)
+        self.assertEqual(UnreadCounter.get_count(self.alice.pk), 0)
+    
+    def test_reconcile_repairs_drifted_counters(self):
+        self.send(self.bob)
+        self.send(self.bob)
+        self.assertEqual(UnreadCounter.get_count(self.alice.pk), 2)
+        UnreadCounter.objects.filter(user=self.alice).update(count=9)
+        
+        out = StringIO()
+        call_command('reconcile_unread_counts', stdout=out)
+        
+        self.assertIn(f'user {self.alice.pk}: 9 -> 2', out.getvalue())
+        # Users who never received a message get a counter too
+        self.assertIn(f'user {self.bob.pk}: missing -> 0', out.getvalue())
+        self.assertIn('Reconciled 2 drifted counters.', out.getvalue())
+        self.assertEqual(UnreadCounter.get_count(self.alice.pk), 2)
+    
+    def test_anonymous_badge_is_zero(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(get_unread_message_count(AnonymousUser()), 0)
+
+
+class InboxFanOutTests(MessagingTestMixin, TestCase):
+    """InboxEntry rows written alongside each message."""
+    
+    def test_message_updates_every_participant_entry(self):
+        self.send(self.alice, 'First')
+        self.send(self.bob, 'Hello there')
+        
+        alice, bob = self.entry(self.alice), self.entry(self.bob)
+        self.assertEqual((alice.message_count, alice.unread_count), (2, 1))
+        self.assertEqual((bob.message_count, bob.unread_count), (2, 1))
+        self.assertEqual(alice.last_message_snippet, 'Hello there')
+        self.assertEqual(alice.last_sender_id, self.bob.pk)
+        self.assertEqual(alice.other_participant_name, 'Bob')
+        self.assertEqual(bob.other_participant_id, self.alice.pk)
+    
+    def test_snippet_is_truncated(self):
+        self.send(self.bob, 'x' * (SNIPPET_LENGTH * 2))
+        self.assertEqual(len(self.entry(self.alice).last_message_snippet), SNIPPET_LENGTH)
+    
+    def test_missing_entry_is_rebuilt_from_messages(self):
+        self.send(self.alice)
+        InboxEntry.objects.filter(user=self.bob).delete()
+        
+        self.send(self.alice, 'Again')
+        
+        bob = self.entry(self.bob)
+        self.assertEqual((bob.message_count, bob.unread_count), (2, 2))
+        self.assertEqual(bob.last_message_snippet, 'Again')
+    
+    def test_rename_updates_other_participants_entries(self):
+        self.bob.first_name = 'Robert'
+        self.bob.save()
+        self.assertEqual(self.entry(self.alice).other_participant_name, 'Robert')
+    
+    def test_conversation_list_queries_do_not_grow_with_conversations(self):
+        self.client.force_login(self.alice)
+        url = reverse('messaging:list')
+        
+        def queries_for_inbox():
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            return len(queries)
+        
+        self.send(self.bob)
+        # The first request also loads site-wide context kept in process
+        queries_for_inbox()
+        few = queries_for_inbox()
+        for i in range(5):
+            other = User.objects.create_user(f'user{i}', f'user{i}@example.com', None, role='freelancer')
+            conversation, _ = Conversation.between(self.alice, other)
+            self.send(other, conversation=conversation)
+        self.assertEqual(queries_for_inbox(), few)
+
+
+class ReadWatermarkTests(MessagingTestMixin, TestCase):
+    """Unread counts as Conversation.mark_read moves a user's watermark."""
+    
+    def mark_read(self, user, message):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.conversation.mark_read(user, message.pk)
+    
+    def assertUnread(self, user, count):
+        self.assertEqual(self.entry(user).unread_count, count)
+        self.assertEqual(self.stored_count(user), count)
+        self.assertEqual(UnreadCounter.count_unread(user.pk), count)
+        self.assertEqual(UnreadCounter.get_count(user.pk), count)
+    
+    def test_partial_read_leaves_later_messages_unread(self):
+        first, second, third = [self.send(self.bob, f'Message {i}') for i in range(3)]
+        self.assertUnread(self.alice, 3)
+        
+        self.assertEqual(self.mark_read(self.alice, second), 2)
+        
+        self.assertUnread(self.alice, 1)
+        self.assertEqual(self.entry(self.alice).last_read_message_id, second.pk)
+    
+    def test_watermark_never_moves_back(self):
+        first, second = self.send(self.bob), self.send(self.bob)
+        self.mark_read(self.alice, second)
+        
+        self.assertEqual(self.mark_read(self.alice, first), 0)
+        self.assertEqual(self.mark_read(self.alice, second), 0)
+        self.assertUnread(self.alice, 0)
+        self.assertEqual(self.entry(self.alice).last_read_message_id, second.pk)
+    
+    def test_own_messages_are_never_unread(self):
+        self.send(self.bob)
+        own = self.send(self.alice)
+        self.assertUnread(self.alice, 1)
+        
+        self.assertEqual(self.mark_read(self.alice, own), 1)
+        self.assertUnread(self.alice, 0)
+    
+    def test_messages_after_the_watermark_count_again(self):
+        message = self.send(self.bob)
+        self.mark_read(self.alice, message)
+        
+        self.send(self.bob)
+        self.send(self.bob)
+        self.assertUnread(self.alice, 2)
+    
+    def test_watermarks_are_per_conversation(self):
+        carol = User.objects.create_user('carol', 'carol@example.com', None, role='freelancer')
+        other, _ = Conversation.between(self.alice, carol)
+        message = self.send(self.bob)
+        self.send(carol, conversation=other)
+        
+        self.mark_read(self.alice, message)
+        
+        self.assertEqual(self.entry(self.alice).unread_count, 0)
+        self.assertEqual(self.entry(self.alice, other).unread_count, 1)
+        self.assertEqual(UnreadCounter.get_count(self.alice.pk), 1)
+    
+    def test_read_up_to_is_the_other_participants_watermark(self):
+        first, second = self.send(self.alice), self.send(self.alice)
+        self.assertEqual(self.conversation.read_up_to(self.alice), 0)
+        self.mark_read(self.bob, first)
+        self.assertEqual(self.conversation.read_up_to(self.alice), first.pk)
+    
+    def test_opening_the_conversation_reads_it(self):
+        self.send(self.bob)
+        self.send(self.bob)
+        self.client.force_login(self.alice)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(reverse('messaging:conversation_detail', args=[self.conversation.pk]))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertUnread(self.alice, 0)
+    
+    def test_mark_read_view_rejects_messages_from_other_conversations(self):
+        carol = User.objects.create_user('carol', 'carol@example.com', None, role='freelancer')
+        other, _ = Conversation.between(self.bob, carol)
+        foreign = self.send(carol, conversation=other)
+        self.send(self.bob)
+        self.client.force_login(self.alice)
+        
+        response = self.client.post(reverse('messaging:mark_read', args=[self.conversation.pk]), {'up_to': foreign.pk})
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertUnread(self.alice, 1)
+
+
+class ArchiveTests(MessagingTestMixin, TestCase):
+    """Moving old messages into MessageArchive and reading them back."""
+    
+    def setUp(self):
+        super().setUp()
+        self.sent = [self.send(self.bob if i % 2 else self.alice, f'Message {i}') for i in range(7)]
+        Message.objects.filter(conversation=self.conversation).update(created_at=timezone.now() - timedelta(days=400))
+        for message in self.sent:
+            message.refresh_from_db()
+        self.cutoff = timezone.now() - timedelta(days=365)
+    
+    def read_all(self, up_to=None):
+        up_to = up_to or self.sent[-1]
+        for user in (self.alice, self.bob):
+            self.conversation.mark_read(user, up_to.pk)
+    
+    def archive_all(self, batch_size=3):
+        while archive_batch(self.conversation.pk, self.cutoff, batch_size):
+            pass
+        self.conversation.refresh_from_db()
+    
+    def test_only_messages_read_by_every_participant_are_archived(self):
+        self.conversation.mark_read(self.alice, self.sent[-1].pk)
+        self.conversation.mark_read(self.bob, self.sent[2].pk)
+        
+        self.archive_all()
+        
+        self.assertEqual(archived_count(self.conversation.pk), 3)
+        self.assertEqual(self.conversation.archived_up_to, self.sent[2].pk)
+        self.assertEqual(
+            list(self.conversation.messages.order_by('pk').values_list('pk', flat=True)),
+            [message.pk for message in self.sent[3:]],
+        )
+    
+    def test_recent_messages_and_attachments_stay_live(self):
+        MessageAttachment.objects.create(message=self.sent[1], file='message_attachments/a.txt', filename='a.txt', file_size=1)
+        latest = self.send(self.bob, 'Recent')
+        self.read_all(latest)
+        
+        self.archive_all()
+        
+        live = set(self.conversation.messages.values_list('pk', flat=True))
+        self.assertEqual(live, {self.sent[1].pk, latest.pk})
+        self.assertEqual(archived_count(self.conversation.pk), 6)
+    
+    def test_batches_cover_disjoint_id_ranges(self):
+        self.read_all()
+        self.archive_all(batch_size=3)
+        
+        ranges = list(MessageArchive.objects.order_by('first_message_id').values_list('first_message_id', 'last_message_id', 'message_count'))
+        ids = [message.pk for message in self.sent]
+        self.assertEqual(ranges, [(ids[0], ids[2], 3), (ids[3], ids[5], 3), (ids[6], ids[6], 1)])
+        self.assertEqual(archive_batch(self.conversation.pk, self.cutoff), 0)
+    
+    def test_rehydrated_messages_match_the_originals(self):
+        self.read_all()
+        self.archive_all()
+        
+        rehydrated = archived_messages(self.conversation, limit=10)
+        
+        self.assertEqual(
+            [(m.pk, m.sender_id, m.content, m.created_at) for m in rehydrated],
+            [(m.pk, m.sender_id, m.content, m.created_at) for m in reversed(self.sent)],
+        )
+        self.assertEqual(rehydrated[0].sender, self.alice)
+    
+    def test_rehydration_pages_across_batches_with_before(self):
+        self.read_all()
+        self.archive_all(batch_size=3)
+        ids = [message.pk for message in self.sent]
+        
+        page = archived_messages(self.conversation, before=ids[5], limit=4)
+        
+        self.assertEqual([message.pk for message in page], ids[1:5][::-1])
+        self.assertEqual(archived_messages(self.conversation, before=ids[0]), [])
+    
+    def test_history_pages_merge_live_and_archived_messages(self):
+        self.read_all(self.sent[3])
+        self.archive_all()
+        ids = [message.pk for message in self.sent]
+        
+        with mock.patch.object(views, 'HISTORY_PAGE_SIZE', 3):
+            first, has_older = views._history_page(self.conversation)
+            self.assertEqual(([m.pk for m in first], has_older), (ids[4:], True))
+            second, has_older = views._history_page(self.conversation, before=ids[4])
+            self.assertEqual(([m.pk for m in second], has_older), (ids[1:4], True))
+            third, has_older = views._history_page(self.conversation, before=ids[1])
+            self.assertEqual(([m.pk for m in third], has_older), (ids[:1], False))
+    
+    def test_unread_counts_and_inbox_survive_archiving(self):
+        self.read_all(self.sent[3])
+        before = {user: (self.entry(user).unread_count, self.stored_count(user)) for user in (self.alice, self.bob)}
+        
+        self.archive_all()
+        InboxEntry.rebuild(self.conversation)
+        
+        for user, counts in before.items():
+            self.assertEqual((self.entry(user).unread_count, self.stored_count(user)), counts)
+            self.assertEqual(self.entry(user).message_count, 7)
+        self.assertEqual(self.entry(self.alice).last_message_snippet, 'Message 6')
+    
+    def test_inbox_rebuild_reads_the_latest_archived_message(self):
+        self.read_all()
+        self.archive_all()
+        self.assertFalse(self.conversation.messages.exists())
+        
+        InboxEntry.rebuild(self.conversation)
+        
+        entry = self.entry(self.bob)
+        self.assertEqual((entry.message_count, entry.unread_count), (7, 0))
+        self.assertEqual(entry.last_message_snippet, 'Message 6')
+        self.assertEqual(entry.last_message_at, self.sent[-1].created_at)
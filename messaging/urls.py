@@ -5,8 +5,17 @@ app_name = 'messaging'
 
 urlpatterns = [
     path('', views.conversation_list, name='list'),
+    path('search/', views.message_search, name='search'),
     path('conversation/<int:pk>/', views.conversation_detail, name='conversation_detail'),
     path('conversation/<int:pk>/send/', views.send_message, name='send_message'),
+    path('conversation/<int:pk>/read/', views.mark_conversation_read, name='mark_read'),
+    path('conversation/<int:pk>/history/', views.message_history, name='message_history'),
+    path('conversation/<int:pk>/events/', views.conversation_events, name='conversation_events'),
+    path('conversation/<int:pk>/typing/', views.typing, name='typing'),
+    path('api/conversation/<int:pk>/messages/', views.sync_messages, name='sync_messages'),
+    path('api/inbox/', views.sync_inbox, name='sync_inbox'),
+    path('presence/', views.presence_status, name='presence_status'),
+    path('presence/heartbeat/', views.presence_heartbeat, name='presence_heartbeat'),
     path('start/<int:user_id>/', views.start_conversation, name='start_conversation'),
     path('start/project/<int:project_id>/', views.start_project_conversation, name='start_project_conversation'),
 ]
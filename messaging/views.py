@@ -1,42 +1,83 @@
+import hashlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.loader import render_to_string
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.paginator import Paginator
 from django.db.models import Q
-from django.http import JsonResponse
-from .models import Conversation, Message, MessageAttachment
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
+from .models import Conversation, InboxEntry, Message, MessageAttachment, UnreadCounter
 from accounts.models import User
+from accounts.ratelimit import rate_limit
+from . import archive, presence, realtime, search
+
+
+INBOX_PAGE_SIZE = 10
+
+# Messages rendered when a conversation opens, and per older page loaded
+HISTORY_PAGE_SIZE = 50
+
+# Delta-sync API page size, and the most a client may ask for
+SYNC_PAGE_SIZE = 100
+SYNC_MAX_PAGE_SIZE = 500
+
+# Inbox changes younger than this may still have commits pending before
+# them, so the sync cursor is not advanced past them yet
+SYNC_SETTLE = timedelta(seconds=10)
+
+# Most users one presence query may ask about
+PRESENCE_MAX_USERS = 100
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _encode_cursor(moment, pk):
+    micros = (moment - _EPOCH) // timedelta(microseconds=1)
+    return f'{micros}_{pk}'
+
+
+def _decode_cursor(cursor):
+    """Return (last_message_at, id) from a cursor, or None if it is malformed."""
+    try:
+        micros, pk = (int(part) for part in cursor.split('_'))
+    except (AttributeError, ValueError):
+        return None
+    return _EPOCH + timedelta(microseconds=micros), pk
 
 
 @login_required
 def conversation_list(request):
-    """List user's conversations."""
-    conversations = Conversation.objects.filter(
-        participants=request.user,
-        is_active=True
-    ).order_by('-updated_at')
-    
-    # Add unread message count for each conversation
-    conversations_with_unread = []
-    total_unread = 0
-    
-    for conversation in conversations:
-        unread_count = conversation.messages.filter(
-            is_read=False
-        ).exclude(sender=request.user).count()
-        
-        conversation.unread_count = unread_count
-        conversations_with_unread.append(conversation)
-        total_unread += unread_count
+    """List user's conversations, newest activity first, from their inbox entries."""
+    entries = InboxEntry.objects.filter(
+        user=request.user,
+        conversation__is_active=True
+    ).select_related('conversation__project').order_by('-last_message_at', '-pk')
+    
+    # Keyset pagination: ?after=<cursor> continues below the last entry shown
+    cursor = _decode_cursor(request.GET.get('after'))
+    if cursor:
+        last_message_at, pk = cursor
+        entries = entries.filter(
+            Q(last_message_at__lt=last_message_at) | Q(last_message_at=last_message_at, pk__lt=pk)
+        )
     
-    # Pagination
-    paginator = Paginator(conversations_with_unread, 10)
-    page_number = request.GET.get('page')
-    conversations = paginator.get_page(page_number)
+    page = list(entries[:INBOX_PAGE_SIZE + 1])
+    next_cursor = _encode_cursor(page[INBOX_PAGE_SIZE - 1].last_message_at, page[INBOX_PAGE_SIZE - 1].pk) if len(page) > INBOX_PAGE_SIZE else None
+    
+    page = page[:INBOX_PAGE_SIZE]
     
     context = {
-        'conversations': conversations,
-        'total_unread': total_unread,
+        'entries': page,
+        'online_ids': presence.online_user_ids(entry.other_participant_id for entry in page if entry.other_participant_id),
+        'next_cursor': next_cursor,
+        'is_first_page': cursor is None,
+        'total_unread': UnreadCounter.get_count(request.user.pk),
     }
     return render(request, 'messaging/conversation_list.html', context)
 
@@ -44,13 +85,7 @@ def conversation_list(request):
 @login_required
 def conversation_detail(request, pk):
     """View conversation and send messages."""
-    conversation = get_object_or_404(Conversation, pk=pk, participants=request.user)
-    
-    # Mark messages as read
-    conversation.messages.filter(is_read=False).exclude(sender=request.user).update(is_read=True)
-    
-    # Get messages
-    messages_list = conversation.messages.all().order_by('created_at')
+    conversation = get_object_or_404(Conversation.objects.select_related('project'), pk=pk, participants=request.user)
     
     if request.method == 'POST':
         content = request.POST.get('content', '').strip()
@@ -74,19 +109,74 @@ def conversation_detail(request, pk):
     
     other_participant = conversation.get_other_participant(request.user)
     
+    # Only the latest page; older ones load on scroll from message_history
+    message_list, has_older = _history_page(conversation)
+    
+    # Everything shown is now read: advance the user's watermark
+    if message_list:
+        conversation.mark_read(request.user, message_list[-1].pk)
+    
+    message_count = conversation.messages.count()
+    if conversation.archived_up_to:
+        message_count += archive.archived_count(conversation.pk)
+    
     context = {
         'conversation': conversation,
-        'messages': messages_list,
+        'message_list': message_list,
+        'has_older': has_older,
+        'read_up_to': conversation.read_up_to(request.user),
+        'message_count': message_count,
         'other_participant': other_participant,
+        'other_online': other_participant is not None and presence.is_online(other_participant.pk),
+        'other_typing': other_participant is not None and bool(presence.typing_user_ids(pk, [other_participant.pk])),
     }
     return render(request, 'messaging/conversation_detail.html', context)
 
 
+def _history_page(conversation, before=None):
+    """Return up to HISTORY_PAGE_SIZE messages older than id before, oldest first, and whether more remain.
+    
+    Archived messages are merged in once the page reaches back past the
+    newest of them.
+    """
+    rows = conversation.messages.select_related('sender').order_by('-pk')
+    if before is not None:
+        rows = rows.filter(pk__lt=before)
+    rows = list(rows[:HISTORY_PAGE_SIZE + 1])
+    if conversation.archived_up_to and (len(rows) <= HISTORY_PAGE_SIZE or rows[-1].pk < conversation.archived_up_to):
+        rows += archive.archived_messages(conversation, before, HISTORY_PAGE_SIZE + 1)
+        rows = sorted(rows, key=lambda message: message.pk, reverse=True)[:HISTORY_PAGE_SIZE + 1]
+    has_older = len(rows) > HISTORY_PAGE_SIZE
+    return rows[:HISTORY_PAGE_SIZE][::-1], has_older
+
+
 @login_required
-def send_message(request, conversation_id):
+def message_history(request, pk):
+    """Older messages of a conversation, as rendered items, before ?before=<id>."""
+    conversation = get_object_or_404(Conversation, pk=pk, participants=request.user)
+    try:
+        before = int(request.GET['before'])
+    except (KeyError, ValueError):
+        return JsonResponse({'success': False, 'message': 'Invalid cursor.'}, status=400)
+    
+    message_list, has_older = _history_page(conversation, before)
+    html = render_to_string('messaging/message_items.html', {
+        'message_list': message_list,
+        'read_up_to': conversation.read_up_to(request.user),
+    }, request=request)
+    return JsonResponse({
+        'html': html,
+        'before': message_list[0].pk if message_list else None,
+        'has_more': has_older,
+    })
+
+
+@rate_limit('messaging:send_message', rate='30/m', burst=10)
+@login_required
+def send_message(request, pk):
     """Send a message via AJAX."""
     if request.method == 'POST':
-        conversation = get_object_or_404(Conversation, pk=conversation_id, participants=request.user)
+        conversation = get_object_or_404(Conversation, pk=pk, participants=request.user)
         content = request.POST.get('content', '').strip()
         
         if content:
@@ -99,10 +189,14 @@ def send_message(request, conversation_id):
                 
                 # Update conversation timestamp
                 conversation.save()
+                presence.stopped_typing(pk, request.user.pk)
                 
+                # The sender's page appends this right away; the stream
+                # echo of the same message is dropped by id
                 return JsonResponse({
                     'success': True,
-                    'message': 'Message sent successfully!'
+                    'message': 'Message sent successfully!',
+                    'data': realtime.message_event(message),
                 })
             except Exception as e:
                 return JsonResponse({
@@ -121,6 +215,236 @@ def send_message(request, conversation_id):
     })
 
 
+def _sync_limit(request):
+    try:
+        limit = int(request.GET.get('limit', SYNC_PAGE_SIZE))
+    except ValueError:
+        limit = SYNC_PAGE_SIZE
+    return max(1, min(limit, SYNC_MAX_PAGE_SIZE))
+
+
+def _sync_response(request, version, payload):
+    """Return payload as JSON with an ETag for version, or 304 if the client has it."""
+    etag = '"%s"' % hashlib.sha1(version.encode()).hexdigest()
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse(payload)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@login_required
+def message_search(request):
+    """Search the user's messages, newest match first; ?before=<id> continues."""
+    query = request.GET.get('q', '').strip()
+    try:
+        before = int(request.GET['before']) if request.GET.get('before') else None
+    except ValueError:
+        before = None
+    
+    results, terms, has_more = search.search(request.user, query, before) if query else ([], [], False)
+    
+    context = {
+        'query': query,
+        'results': [(message, search.highlight(message.content, terms)) for message in results],
+        'next_before': results[-1].pk if has_more else None,
+        'is_first_page': before is None,
+    }
+    return render(request, 'messaging/search.html', context)
+
+
+@login_required
+def sync_messages(request, pk):
+    """Messages of a conversation with an id above ?after=, oldest first.
+    
+    Clients poll with the returned cursor as the next ?after=. The query is
+    a range scan on (conversation, id) joined to the participant check, so
+    a poll with nothing new is one indexed probe and answers 304 to a
+    client that sends back the previous ETag.
+    """
+    try:
+        after = max(0, int(request.GET.get('after', 0)))
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid cursor.'}, status=400)
+    limit = _sync_limit(request)
+    
+    rows = list(
+        Message.objects.filter(conversation_id=pk, conversation__participants=request.user, pk__gt=after)
+        .select_related('sender')
+        .order_by('pk')[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    cursor = rows[-1].pk if rows else after
+    
+    version = f'messages:{pk}:{after}:{cursor}:{has_more}'
+    response = _sync_response(request, version, {
+        'messages': [realtime.message_event(message) for message in rows],
+        'cursor': cursor,
+        'has_more': has_more,
+    })
+    if not rows and response.status_code == 200:
+        # Empty for a conversation the user is not in as well; only
+        # spend the extra query when not revalidating
+        if not Conversation.objects.filter(pk=pk, participants=request.user).exists():
+            raise Http404
+    return response
+
+
+@login_required
+def sync_inbox(request):
+    """Inbox entries changed since ?since=, oldest change first.
+    
+    The cursor is an (updated_at, id) keyset position. Changes made in the
+    last SYNC_SETTLE are returned but the cursor stops short of them, so a
+    change committed late with an earlier timestamp is still picked up by
+    the next poll. Clients upsert entries by conversation_id.
+    """
+    since = request.GET.get('since')
+    position = _decode_cursor(since) if since else None
+    if since and position is None:
+        return JsonResponse({'success': False, 'message': 'Invalid cursor.'}, status=400)
+    limit = _sync_limit(request)
+    
+    entries = InboxEntry.objects.filter(user=request.user).select_related('conversation').order_by('updated_at', 'pk')
+    if position:
+        updated_at, pk = position
+        entries = entries.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, pk__gt=pk))
+    page = list(entries[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+    
+    if has_more:
+        settled = page
+    else:
+        settle_before = timezone.now() - SYNC_SETTLE
+        settled = [entry for entry in page if entry.updated_at <= settle_before]
+    cursor = _encode_cursor(settled[-1].updated_at, settled[-1].pk) if settled else since
+    
+    version = 'inbox:%s:%s:%s' % (
+        since, cursor, ','.join(f'{entry.pk}@{entry.updated_at.timestamp()}' for entry in page)
+    )
+    return _sync_response(request, version, {
+        'conversations': [
+            {
+                'conversation_id': entry.conversation_id,
+                'subject': entry.conversation.subject,
+                'project_id': entry.conversation.project_id,
+                'is_active': entry.conversation.is_active,
+                'other_participant_id': entry.other_participant_id,
+                'other_participant_name': entry.other_participant_name,
+                'last_sender_id': entry.last_sender_id,
+                'last_message_snippet': entry.last_message_snippet,
+                'last_message_at': entry.last_message_at.isoformat(),
+                'message_count': entry.message_count,
+                'unread_count': entry.unread_count,
+                'updated_at': entry.updated_at.isoformat(),
+            }
+            for entry in page
+        ],
+        'cursor': cursor,
+        'has_more': has_more,
+    })
+
+
+async def conversation_events(request, pk):
+    """Stream new messages, read receipts and typing notices as Server-Sent Events.
+    
+    Streaming needs the ASGI entry point. A WSGI server would buffer the
+    endless stream and hold a worker for good, so there the view answers
+    204, which stops EventSource from reconnecting, and the page polls
+    sync_messages instead.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    user = await sync_to_async(lambda: request.user if request.user.is_authenticated else None)()
+    if user is None:
+        return HttpResponse(status=401)
+    if not await Conversation.objects.filter(pk=pk, participants=user).aexists():
+        raise Http404
+    
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_event_id = None
+    
+    response = StreamingHttpResponse(
+        realtime.event_stream(pk, last_event_id),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Keep reverse proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+@require_POST
+def mark_conversation_read(request, pk):
+    """Record that the user has read messages up to ?up_to=<id>, e.g. ones appended live."""
+    conversation = get_object_or_404(Conversation, pk=pk, participants=request.user)
+    try:
+        up_to = int(request.POST['up_to'])
+    except (KeyError, ValueError):
+        return JsonResponse({'success': False, 'message': 'Invalid message id.'}, status=400)
+    
+    # The watermark must name a real message, or later ones would count as read
+    if not conversation.messages.filter(pk=up_to).exists():
+        return JsonResponse({'success': False, 'message': 'Invalid message id.'}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'newly_read': conversation.mark_read(request.user, up_to),
+    })
+
+
+@rate_limit('messaging:typing', rate='30/m', burst=10)
+@login_required
+@require_POST
+def typing(request, pk):
+    """Tell the other participants that the user is typing."""
+    if not Conversation.objects.filter(pk=pk, participants=request.user).exists():
+        raise Http404
+    presence.typing(pk, request.user.pk)
+    realtime.publish_typing(pk, request.user)
+    return HttpResponse(status=204)
+
+
+@rate_limit('messaging:presence_heartbeat', rate='10/m', burst=5)
+@login_required
+@require_POST
+def presence_heartbeat(request):
+    """Keep the user shown as online while one of their pages is open."""
+    presence.heartbeat(request.user.pk)
+    return HttpResponse(status=204)
+
+
+@login_required
+def presence_status(request):
+    """Report which of ?users=<id>,<id>,... are online, among users the caller shares a conversation with."""
+    try:
+        user_ids = {int(user_id) for user_id in request.GET.get('users', '').split(',') if user_id}
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid user id.'}, status=400)
+    if len(user_ids) > PRESENCE_MAX_USERS:
+        return JsonResponse({'success': False, 'message': 'Too many users.'}, status=400)
+    
+    # Presence is only visible to people the user is talking to
+    visible = InboxEntry.objects.filter(
+        user=request.user,
+        other_participant_id__in=user_ids
+    ).values_list('other_participant_id', flat=True).distinct() if user_ids else []
+    
+    response = JsonResponse({
+        'success': True,
+        'online': sorted(presence.online_user_ids(visible)),
+    })
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@rate_limit('messaging:start_conversation', rate='20/h', burst=5)
 @login_required
 def start_conversation(request, user_id):
     """Start a new conversation with a user."""
@@ -130,11 +454,10 @@ def start_conversation(request, user_id):
         messages.error(request, 'You cannot start a conversation with yourself.')
         return redirect('accounts:dashboard')
     
-    # Check if conversation already exists
+    # Check if a conversation already exists, about any project or none
+    key = Conversation.pair_key(request.user.pk, other_user.pk)
     existing_conversation = Conversation.objects.filter(
-        participants=request.user
-    ).filter(
-        participants=other_user
+        pair_low=key['pair_low'], pair_high=key['pair_high']
     ).first()
     
     if existing_conversation:
@@ -145,10 +468,10 @@ def start_conversation(request, user_id):
         initial_message = request.POST.get('message', '')
         
         try:
-            conversation = Conversation.objects.create(
-                subject=subject
-            )
-            conversation.participants.add(request.user, other_user)
+            conversation, created = Conversation.between(request.user, other_user, subject=subject)
+            if not created:
+                # A concurrent request (e.g. a double submit) created it first
+                return redirect('messaging:conversation_detail', pk=conversation.pk)
             
             if initial_message:
                 Message.objects.create(
@@ -185,11 +508,7 @@ def start_project_conversation(request, project_id):
     
     # Check if conversation already exists
     existing_conversation = Conversation.objects.filter(
-        participants=request.user
-    ).filter(
-        participants=other_user
-    ).filter(
-        project=project
+        **Conversation.pair_key(request.user.pk, other_user.pk, project.pk)
     ).first()
     
     if existing_conversation:
@@ -200,11 +519,10 @@ def start_project_conversation(request, project_id):
         initial_message = request.POST.get('message', '')
         
         try:
-            conversation = Conversation.objects.create(
-                subject=subject,
-                project=project
-            )
-            conversation.participants.add(request.user, other_user)
+            conversation, created = Conversation.between(request.user, other_user, project=project, subject=subject)
+            if not created:
+                # A concurrent request (e.g. a double submit) created it first
+                return redirect('messaging:conversation_detail', pk=conversation.pk)
             
             if initial_message:
                 Message.objects.create(
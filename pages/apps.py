@@ -4,4 +4,6 @@ from django.apps import AppConfig
 class PagesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pages'
-
+    
+    def ready(self):
+        import pages.signals
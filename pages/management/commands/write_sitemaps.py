@@ -0,0 +1,54 @@
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from pages.sitemaps import SECTIONS, shard_count, shard_filename, iter_sitemap_index, iter_sitemap
+
+
+class Command(BaseCommand):
+    help = 'Write the sitemap index and every sitemap shard to static files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url',
+            required=True,
+            help='Site origin used in <loc> entries, e.g. https://example.com',
+        )
+        parser.add_argument(
+            '--output-dir',
+            default=str(Path(settings.STATIC_ROOT) / 'sitemaps'),
+            help='Directory the XML files are written to',
+        )
+        parser.add_argument(
+            '--url-prefix',
+            default=settings.STATIC_URL + 'sitemaps/',
+            help='URL path the output directory is served from',
+        )
+
+    def handle(self, *args, **options):
+        base_url = options['base_url'].rstrip('/')
+        output_dir = Path(options['output_dir'])
+        url_prefix = options['url_prefix']
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        def shard_url(section_name, shard):
+            return base_url + url_prefix + shard_filename(section_name, shard)
+        
+        written = 0
+        for section in SECTIONS.values():
+            for shard in range(shard_count(section)):
+                self._write(output_dir / shard_filename(section.name, shard), iter_sitemap(base_url, section, shard))
+                written += 1
+        self._write(output_dir / 'sitemap.xml', iter_sitemap_index(shard_url))
+        
+        self.stdout.write(self.style.SUCCESS(f'Wrote sitemap index and {written} shards to {output_dir}'))
+
+    def _write(self, path, pieces):
+        """Stream pieces to a temp file, then swap it into place."""
+        tmp_path = path.with_suffix('.xml.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            for piece in pieces:
+                handle.write(piece)
+        os.replace(tmp_path, path)
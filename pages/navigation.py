@@ -0,0 +1,69 @@
+"""
+Process-local cache of the published pages linked from nav and footer.
+
+Both lists come from one query and are kept per worker as tuples. A version
+stamp in the shared cache, bumped from StaticPage post_save/post_delete,
+tells every worker when to reload.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db.models import Q
+
+NAVIGATION_VERSION_KEY = 'pages:navigation:version'
+
+NavLink = namedtuple('NavLink', ['slug', 'title', 'page_type'])
+Navigation = namedtuple('Navigation', ['version', 'nav_pages', 'footer_pages'])
+
+_navigation = None
+_lock = threading.Lock()
+
+
+def _current_version():
+    version = cache.get(NAVIGATION_VERSION_KEY)
+    if version is None:
+        # add() so concurrent workers agree on a single initial stamp
+        cache.add(NAVIGATION_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(NAVIGATION_VERSION_KEY)
+    return version
+
+
+def _load(version):
+    from .models import StaticPage
+    
+    rows = StaticPage.objects.filter(
+        Q(show_in_nav=True) | Q(show_in_footer=True),
+        status='published',
+    ).order_by('order', 'title').values_list('slug', 'title', 'page_type', 'show_in_nav', 'show_in_footer')
+    
+    nav_pages = []
+    footer_pages = []
+    for slug, title, page_type, show_in_nav, show_in_footer in rows:
+        link = NavLink(slug, title, page_type)
+        if show_in_nav:
+            nav_pages.append(link)
+        if show_in_footer:
+            footer_pages.append(link)
+    return Navigation(version, tuple(nav_pages), tuple(footer_pages))
+
+
+def get_navigation():
+    """Return the cached Navigation, reloading it if the shared stamp moved."""
+    global _navigation
+    version = _current_version()
+    navigation = _navigation
+    if navigation is None or navigation.version != version:
+        with _lock:
+            navigation = _navigation
+            if navigation is None or navigation.version != version:
+                navigation = _navigation = _load(version)
+    return navigation
+
+
+def invalidate():
+    """Bump the shared version so every worker reloads its navigation."""
+    global _navigation
+    cache.set(NAVIGATION_VERSION_KEY, time.time_ns(), timeout=None)
+    _navigation = None
@@ -0,0 +1,12 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from . import navigation
+from .models import StaticPage
+
+
+@receiver(post_save, sender=StaticPage)
+@receiver(post_delete, sender=StaticPage)
+def invalidate_navigation(sender, **kwargs):
+    """Drop every worker's cached nav/footer links once a page edit commits."""
+    transaction.on_commit(navigation.invalidate)
@@ -0,0 +1,104 @@
+"""
+Streaming XML sitemaps for open projects, categories and published pages.
+
+Each section is split into shards by primary-key range so a shard can be
+produced with one indexed range scan and the index never has to count rows.
+Rows are read with .iterator(chunk_size=...) and written out one <url> at a
+time, so memory stays flat however many URLs a section holds.
+"""
+from collections import namedtuple
+from xml.sax.saxutils import escape
+
+from django.db.models import Max
+from django.urls import reverse
+
+SHARD_SIZE = 50000
+CHUNK_SIZE = 2000
+
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+Section = namedtuple('Section', ['name', 'queryset', 'fields', 'location', 'sharded'])
+
+
+def _open_projects():
+    from projects.models import Project
+    return Project.objects.filter(status='open')
+
+
+def _categories():
+    from projects.models import Category
+    return Category.objects.all()
+
+
+def _published_pages():
+    from .models import StaticPage
+    return StaticPage.objects.filter(status='published')
+
+
+SECTIONS = {
+    'projects': Section(
+        name='projects',
+        queryset=_open_projects,
+        fields=('id', 'updated_at'),
+        location=lambda pk: reverse('projects:detail', kwargs={'pk': pk}),
+        sharded=True,
+    ),
+    'categories': Section(
+        name='categories',
+        queryset=_categories,
+        fields=('id', None),
+        location=lambda pk: reverse('projects:by_category', kwargs={'category_id': pk}),
+        sharded=False,
+    ),
+    'pages': Section(
+        name='pages',
+        queryset=_published_pages,
+        fields=('slug', 'updated_at'),
+        location=lambda slug: reverse('pages:view', kwargs={'slug': slug}),
+        sharded=False,
+    ),
+}
+
+
+def shard_count(section):
+    """Number of shards covering the section's current id range."""
+    if not section.sharded:
+        return 1
+    max_id = section.queryset().aggregate(max_id=Max('id'))['max_id'] or 0
+    return max_id // SHARD_SIZE + 1
+
+
+def shard_filename(section_name, shard):
+    """File name of a shard, shared by the sitemap URLs and write_sitemaps."""
+    return f'sitemap-{section_name}-{shard}.xml'
+
+
+def iter_sitemap_index(shard_url):
+    """Yield the sitemap index document in pieces.
+    
+    shard_url(section_name, shard) returns the absolute URL of a shard.
+    """
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{SITEMAP_NS}">\n'
+    for section in SECTIONS.values():
+        for shard in range(shard_count(section)):
+            yield f'<sitemap><loc>{escape(shard_url(section.name, shard))}</loc></sitemap>\n'
+    yield '</sitemapindex>\n'
+
+
+def iter_sitemap(base_url, section, shard):
+    """Yield one sitemap shard in pieces."""
+    key_field, lastmod_field = section.fields
+    queryset = section.queryset()
+    if section.sharded:
+        queryset = queryset.filter(id__gte=shard * SHARD_SIZE, id__lt=(shard + 1) * SHARD_SIZE)
+    fields = [field for field in section.fields if field]
+    rows = queryset.order_by(key_field).values_list(*fields).iterator(chunk_size=CHUNK_SIZE)
+    
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n'
+    for row in rows:
+        loc = escape(base_url + section.location(row[0]))
+        if lastmod_field and row[1]:
+            yield f'<url><loc>{loc}</loc><lastmod>{row[1].isoformat(timespec="seconds")}</lastmod></url>\n'
+        else:
+            yield f'<url><loc>{loc}</loc></url>\n'
+    yield '</urlset>\n'
@@ -1,12 +1,25 @@
+import hashlib
+
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
+from django.core.cache import cache
 from django.core.paginator import Paginator
 from django.db.models import Q
 from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse, Http404, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.utils.text import compress_string
 from .models import StaticPage
+from .navigation import get_navigation
+from .sitemaps import SECTIONS, shard_count, iter_sitemap_index, iter_sitemap
 from accounts.decorators import admin_required
 
+RENDERED_PAGE_TIMEOUT = 60 * 60 * 24
+
 
 def is_admin(user):
     """Check if user is admin or staff."""
@@ -14,13 +27,75 @@ def is_admin(user):
 
 
 def page_view(request, slug):
-    """View a static page."""
-    page = get_object_or_404(StaticPage, slug=slug, status='published')
+    """View a static page.
     
-    context = {
-        'page': page,
-    }
-    return render(request, 'pages/view.html', context)
+    Anonymous visitors share one rendered copy per (slug, updated_at), kept
+    with a gzip variant in the cache and served with strong ETag and
+    Last-Modified validators so clients and CDNs can revalidate with 304s.
+    Signed-in users get the per-user chrome rendered fresh.
+    """
+    stamps = StaticPage.objects.filter(slug=slug, status='published').values('updated_at', 'published_at').first()
+    if stamps is None:
+        raise Http404('No StaticPage matches the given query.')
+    
+    if request.user.is_authenticated or messages.get_messages(request):
+        page = get_object_or_404(StaticPage, slug=slug, status='published')
+        response = render(request, 'pages/view.html', {'page': page})
+        patch_cache_control(response, private=True)
+        return response
+    
+    last_modified = max(filter(None, [stamps['updated_at'], stamps['published_at']]))
+    version = f"{slug}:{stamps['updated_at'].timestamp()}:{get_navigation().version}"
+    etag = '"%s"' % hashlib.sha1(version.encode()).hexdigest()
+    
+    use_gzip = 'gzip' in request.headers.get('Accept-Encoding', '')
+    if use_gzip:
+        etag = etag[:-1] + '-gzip"'
+    
+    response = get_conditional_response(request, etag=etag, last_modified=int(last_modified.timestamp()))
+    if response is None:
+        rendered = _get_rendered_page(request, slug, version)
+        response = HttpResponse(rendered['gzip'] if use_gzip else rendered['body'])
+        if use_gzip:
+            response['Content-Encoding'] = 'gzip'
+    
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_vary_headers(response, ('Accept-Encoding', 'Cookie'))
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+def _get_rendered_page(request, slug, version):
+    """Return the cached identity and gzip bodies for a page version."""
+    cache_key = f'pages:rendered:{hashlib.sha1(version.encode()).hexdigest()}'
+    rendered = cache.get(cache_key)
+    if rendered is None:
+        page = get_object_or_404(StaticPage, slug=slug, status='published')
+        body = render_to_string('pages/view.html', {'page': page}, request=request).encode()
+        rendered = {'body': body, 'gzip': compress_string(body)}
+        cache.set(cache_key, rendered, RENDERED_PAGE_TIMEOUT)
+    return rendered
+
+
+def sitemap_index(request):
+    """Stream the sitemap index listing every section shard."""
+    base_url = request.build_absolute_uri('/')[:-1]
+    
+    def shard_url(section_name, shard):
+        return base_url + reverse('sitemap_section', kwargs={'section': section_name, 'shard': shard})
+    
+    return StreamingHttpResponse(iter_sitemap_index(shard_url), content_type='application/xml')
+
+
+def sitemap_section(request, section, shard):
+    """Stream one shard of a sitemap section."""
+    sitemap = SECTIONS.get(section)
+    if sitemap is None or shard >= shard_count(sitemap):
+        raise Http404('No such sitemap.')
+    
+    base_url = request.build_absolute_uri('/')[:-1]
+    return StreamingHttpResponse(iter_sitemap(base_url, sitemap, shard), content_type='application/xml')
 
 
 @login_required
@@ -1,9 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from decimal import Decimal
 import uuid
+from accounts.models import FreelancerStats
 
 User = get_user_model()
 
@@ -156,8 +157,18 @@ class Escrow(models.Model):
         return f"Escrow for {self.project.title} - ${self.amount}"
     
     def release_funds(self):
-        """Release funds to freelancer."""
-        if self.status == 'active':
+        """Release funds to freelancer.
+        
+        The escrow row is locked and every write, including the freelancer's
+        stats, commits or rolls back together, so a release is never paid or
+        counted twice.
+        """
+        with transaction.atomic():
+            status = Escrow.objects.select_for_update().values_list('status', flat=True).get(pk=self.pk)
+            if status != 'active':
+                self.status = status
+                return
+            
             self.status = 'released'
             self.released_at = timezone.now()
             self.save()
@@ -176,6 +187,7 @@ class Escrow(models.Model):
                 description=f"Payment for project: {self.project.title}",
                 completed_at=timezone.now()
             )
+            FreelancerStats.record(self.freelancer_id, completed=1, earnings=self.amount)
     
     def refund_funds(self):
         """Refund funds to employer."""
@@ -1,13 +1,14 @@
 from django.contrib import admin
-from .models import Category, Project, ProjectAttachment, ProjectMilestone
+from .models import Category, Project, ProjectAttachment, ProjectMilestone, ProjectBidCounter
 
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     """Category admin interface."""
     
-    list_display = ('name', 'icon', 'created_at')
+    list_display = ('name', 'icon', 'open_projects_count', 'total_projects_count', 'created_at')
     search_fields = ('name', 'description')
+    readonly_fields = ('open_projects_count', 'total_projects_count')
     ordering = ('name',)
 
 
@@ -60,3 +61,12 @@ class ProjectMilestoneAdmin(admin.ModelAdmin):
     search_fields = ('project__title', 'title', 'description')
     ordering = ('-created_at',)
 
+
+
+@admin.register(ProjectBidCounter)
+class ProjectBidCounterAdmin(admin.ModelAdmin):
+    """Project bid counter slot admin interface."""
+    
+    list_display = ('project', 'slot', 'count')
+    search_fields = ('project__title',)
+    ordering = ('project', 'slot')
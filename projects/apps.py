@@ -4,4 +4,12 @@ from django.apps import AppConfig
 class ProjectsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'projects'
-
+    
+    def ready(self):
+        import projects.signals
+        from django.core.signals import request_started
+        from . import catalog
+        
+        # Warm on the first request rather than here: querying while the
+        # app registry is still loading breaks migrate on a fresh database.
+        request_started.connect(catalog.warm_on_first_request, dispatch_uid='projects.catalog.warm')
@@ -0,0 +1,104 @@
+"""
+Process-local cache of the small, rarely edited catalog tables.
+
+Categories and skills are held in memory as immutable tuples so hot views
+never query them. Each worker compares its copy against a version stamp in
+the shared cache; admin edits bump the stamp and every worker reloads on its
+next access. Category project counters change with every project write, so
+copies are also refreshed after CATALOG_MAX_AGE seconds.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from django.core.cache import cache
+
+CATALOG_VERSION_KEY = 'catalog:version'
+CATALOG_MAX_AGE = 60
+
+CategoryEntry = namedtuple('CategoryEntry', [
+    'id', 'name', 'description', 'icon', 'open_projects_count', 'total_projects_count',
+])
+SkillEntry = namedtuple('SkillEntry', ['id', 'name', 'category'])
+
+_Snapshot = namedtuple('_Snapshot', ['version', 'loaded_at', 'categories', 'categories_by_id', 'skills'])
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+def _current_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # add() so concurrent workers agree on a single initial stamp
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def _load(version):
+    from accounts.models import Skill
+    from .models import Category
+    
+    categories = tuple(
+        CategoryEntry(*row) for row in Category.objects.order_by('name').values_list(*CategoryEntry._fields)
+    )
+    skills = tuple(
+        SkillEntry(*row) for row in Skill.objects.order_by('name').values_list(*SkillEntry._fields)
+    )
+    return _Snapshot(
+        version=version,
+        loaded_at=time.monotonic(),
+        categories=categories,
+        categories_by_id={category.id: category for category in categories},
+        skills=skills,
+    )
+
+
+def _get_snapshot():
+    global _snapshot
+    version = _current_version()
+    snapshot = _snapshot
+    if snapshot is None or snapshot.version != version or time.monotonic() - snapshot.loaded_at > CATALOG_MAX_AGE:
+        with _lock:
+            snapshot = _snapshot
+            if snapshot is None or snapshot.version != version or time.monotonic() - snapshot.loaded_at > CATALOG_MAX_AGE:
+                snapshot = _snapshot = _load(version)
+    return snapshot
+
+
+def get_categories():
+    """Return all categories ordered by name."""
+    return _get_snapshot().categories
+
+
+def get_category(category_id):
+    """Return the category with the given id, or None."""
+    try:
+        return _get_snapshot().categories_by_id.get(int(category_id))
+    except (TypeError, ValueError):
+        return None
+
+
+def get_skills():
+    """Return all skills ordered by name."""
+    return _get_snapshot().skills
+
+
+def warm():
+    """Load the catalog into this process."""
+    _get_snapshot()
+
+
+def warm_on_first_request(sender, **kwargs):
+    """request_started receiver that warms the catalog once per process."""
+    from django.core.signals import request_started
+    request_started.disconnect(dispatch_uid='projects.catalog.warm')
+    warm()
+
+
+def invalidate():
+    """Bump the shared version so every worker reloads its catalog."""
+    global _snapshot
+    cache.set(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+    _snapshot = None
@@ -0,0 +1,106 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction, OperationalError
+from django.db.models import Sum
+from django.utils import timezone
+
+from projects.models import Category, Project, ProjectBidCounter, BID_COUNTER_SLOTS
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark bid counting with many threads bidding on one project. '
+        'Compares a read-modify-write counter, a single F() row and the '
+        'sharded counter against the configured database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent bidders')
+        parser.add_argument('--bids', type=int, default=200, help='Bids per thread')
+        parser.add_argument('--slots', type=int, default=BID_COUNTER_SLOTS, help='Slots for the sharded run')
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        bids = options['bids']
+        
+        employer = User.objects.create_user(
+            username='bench-bid-counter',
+            email='bench-bid-counter@example.com',
+            password=None,
+            role='employer',
+        )
+        category = Category.objects.create(name='bench-bid-counter')
+        project = Project.objects.create(
+            title='Bid counter benchmark',
+            description='Temporary project created by bench_bid_counter',
+            category=category,
+            employer=employer,
+            budget_min=1,
+            budget_max=1,
+            deadline=timezone.now() + timedelta(days=1),
+            skills_required='benchmark',
+        )
+        try:
+            self.stdout.write(f'{connection.vendor}: {threads} threads x {bids} bids on project {project.pk}')
+            self._run('read-modify-write', project, threads, bids, self._read_modify_write)
+            self._run('single F() row', project, threads, bids,
+                      lambda: ProjectBidCounter.add(project.pk, 1, slots=1))
+            self._run(f'sharded x{options["slots"]}', project, threads, bids,
+                      lambda: ProjectBidCounter.add(project.pk, 1, slots=options['slots']))
+        finally:
+            project.delete()
+            category.delete()
+            employer.delete()
+
+    def _read_modify_write(self):
+        """The pre-sharding pattern: read the count, add one in Python, write it back."""
+        counter = ProjectBidCounter.objects.get(project_id=self._project_id, slot=0)
+        counter.count += 1
+        counter.save(update_fields=['count'])
+
+    def _run(self, label, project, threads, bids, increment):
+        ProjectBidCounter.objects.filter(project=project).delete()
+        ProjectBidCounter.objects.create(project=project, slot=0, count=0)
+        self._project_id = project.pk
+        
+        errors = []
+        barrier = threading.Barrier(threads)
+        
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(bids):
+                    for attempt in range(50):
+                        try:
+                            with transaction.atomic():
+                                increment()
+                            break
+                        except OperationalError:
+                            # SQLite reports lock contention instead of waiting
+                            time.sleep(0.001 * (attempt + 1))
+                    else:
+                        errors.append('gave up after repeated lock errors')
+            finally:
+                connection.close()
+        
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        
+        expected = threads * bids
+        total = ProjectBidCounter.objects.filter(project=project).aggregate(total=Sum('count'))['total'] or 0
+        self.stdout.write(
+            f'  {label:<20} {expected / elapsed:>10.0f} bids/s  '
+            f'counted {total}/{expected} (lost {expected - total})'
+            + (f'  errors {len(errors)}' if errors else '')
+        )
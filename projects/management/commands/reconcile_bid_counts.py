@@ -0,0 +1,71 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from bids.models import Bid
+from projects.models import Project, ProjectBidCounter
+
+
+class Command(BaseCommand):
+    help = 'Recompute the sharded project bid counters from Bid rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of projects checked per batch',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted projects without writing corrections',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        dry_run = options['dry_run']
+        
+        drifted = 0
+        checked = 0
+        last_id = 0
+        while True:
+            project_ids = list(
+                Project.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:chunk_size]
+            )
+            if not project_ids:
+                break
+            last_id = project_ids[-1]
+            checked += len(project_ids)
+            
+            # A bid counts from creation until it is withdrawn or deleted
+            actual = dict(
+                Bid.objects.filter(project_id__in=project_ids).exclude(status='withdrawn')
+                .values('project_id').annotate(total=Count('id')).values_list('project_id', 'total')
+            )
+            stored = dict(
+                ProjectBidCounter.objects.filter(project_id__in=project_ids)
+                .values('project_id').annotate(total=Sum('count')).values_list('project_id', 'total')
+            )
+            
+            for project_id in project_ids:
+                expected = actual.get(project_id, 0)
+                current = stored.get(project_id) or 0
+                if expected == current:
+                    continue
+                drifted += 1
+                self.stdout.write(f'Project {project_id}: {current} -> {expected}')
+                if dry_run:
+                    continue
+                with transaction.atomic():
+                    # Lock the slots so concurrent increments land after the rewrite
+                    list(ProjectBidCounter.objects.select_for_update().filter(project_id=project_id))
+                    expected = Bid.objects.filter(project_id=project_id).exclude(status='withdrawn').count()
+                    ProjectBidCounter.objects.filter(project_id=project_id).delete()
+                    if expected:
+                        ProjectBidCounter.objects.create(project_id=project_id, slot=0, count=expected)
+                cache.delete(Project._bids_count_cache_key(project_id))
+        
+        action = 'Found' if dry_run else 'Reconciled'
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} projects. {action} {drifted} drifted.'))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+
+from projects.models import Category
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized open/total project counters on every category'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted categories without writing corrections',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        
+        categories = Category.objects.annotate(
+            actual_open=Count('projects', filter=Q(projects__status='open')),
+            actual_total=Count('projects'),
+        )
+        
+        drifted = []
+        for category in categories:
+            if (category.open_projects_count != category.actual_open or
+                    category.total_projects_count != category.actual_total):
+                self.stdout.write(
+                    f'{category.name}: open {category.open_projects_count} -> {category.actual_open}, '
+                    f'total {category.total_projects_count} -> {category.actual_total}'
+                )
+                category.open_projects_count = category.actual_open
+                category.total_projects_count = category.actual_total
+                drifted.append(category)
+        
+        if drifted and not dry_run:
+            with transaction.atomic():
+                Category.objects.bulk_update(drifted, ['open_projects_count', 'total_projects_count'])
+        
+        action = 'Found' if dry_run else 'Reconciled'
+        self.stdout.write(
+            self.style.SUCCESS(f'{action} {len(drifted)} drifted categor{"y" if len(drifted) == 1 else "ies"}.')
+        )
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_project_counts(apps, schema_editor):
+    Category = apps.get_model('projects', 'Category')
+    categories = Category.objects.annotate(
+        actual_open=Count('projects', filter=Q(projects__status='open')),
+        actual_total=Count('projects'),
+    )
+    for category in categories:
+        Category.objects.filter(pk=category.pk).update(
+            open_projects_count=category.actual_open,
+            total_projects_count=category.actual_total,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_projectphase'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='open_projects_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='total_projects_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_project_counts, migrations.RunPython.noop),
+    ]
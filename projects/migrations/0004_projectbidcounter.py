@@ -0,0 +1,51 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def move_bids_count_to_counters(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    ProjectBidCounter = apps.get_model('projects', 'ProjectBidCounter')
+    rows = Project.objects.filter(bids_count__gt=0).values_list('id', 'bids_count').iterator(chunk_size=2000)
+    batch = []
+    for project_id, bids_count in rows:
+        batch.append(ProjectBidCounter(project_id=project_id, slot=0, count=bids_count))
+        if len(batch) >= 2000:
+            ProjectBidCounter.objects.bulk_create(batch)
+            batch = []
+    ProjectBidCounter.objects.bulk_create(batch)
+
+
+def move_counters_to_bids_count(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    ProjectBidCounter = apps.get_model('projects', 'ProjectBidCounter')
+    totals = ProjectBidCounter.objects.values('project_id').annotate(total=Sum('count'))
+    for row in totals.iterator(chunk_size=2000):
+        Project.objects.filter(pk=row['project_id']).update(bids_count=max(0, row['total']))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_category_project_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectBidCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot', models.PositiveSmallIntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bid_counters', to='projects.project')),
+            ],
+            options={
+                'unique_together': {('project', 'slot')},
+            },
+        ),
+        migrations.RunPython(move_bids_count_to_counters, move_counters_to_bids_count),
+        migrations.RemoveField(
+            model_name='project',
+            name='bids_count',
+        ),
+    ]
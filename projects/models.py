@@ -1,10 +1,20 @@
-from django.db import models
+import random
+
+from django.core.cache import cache
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Sum
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 
 User = get_user_model()
 
+BID_COUNTER_SLOTS = 8
+# A read that summed the slots before a bid committed can cache the old
+# count after the commit's invalidation; the short timeout bounds how long
+# such a stale count survives. The SUM only reads BID_COUNTER_SLOTS rows.
+BID_COUNT_CACHE_TIMEOUT = 60
+
 
 class Category(models.Model):
     """Project categories."""
@@ -12,11 +22,26 @@ class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
     icon = models.CharField(max_length=50, blank=True, help_text="Font Awesome icon class")
+    
+    # Denormalized counters, maintained from Project saves and deletes
+    open_projects_count = models.PositiveIntegerField(default=0)
+    total_projects_count = models.PositiveIntegerField(default=0)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
         return self.name
     
+    @classmethod
+    def adjust_project_counts(cls, category_id, open_delta=0, total_delta=0):
+        """Apply counter deltas for a category with a single UPDATE."""
+        if not (open_delta or total_delta):
+            return
+        cls.objects.filter(pk=category_id).update(
+            open_projects_count=F('open_projects_count') + open_delta,
+            total_projects_count=F('total_projects_count') + total_delta,
+        )
+    
     class Meta:
         verbose_name_plural = "Categories"
         ordering = ['name']
@@ -60,7 +85,6 @@ class Project(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
     is_featured = models.BooleanField(default=False)
     views_count = models.PositiveIntegerField(default=0)
-    bids_count = models.PositiveIntegerField(default=0)
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -69,6 +93,22 @@ class Project(models.Model):
     def __str__(self):
         return self.title
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_counted_state()
+        return instance
+    
+    def _remember_counted_state(self):
+        """Record the category/status pair the category counters reflect."""
+        self._counted_category_id = self.__dict__.get('category_id')
+        self._counted_status = self.__dict__.get('status')
+    
+    def save(self, *args, **kwargs):
+        """Save the project and its category counters in one transaction."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
     def get_skills_required_list(self):
         """Return required skills as a list."""
         if self.skills_required:
@@ -88,15 +128,91 @@ class Project(models.Model):
         self.views_count += 1
         self.save(update_fields=['views_count'])
     
+    @staticmethod
+    def _bids_count_cache_key(project_id):
+        return f'projects:bids_count:{project_id}'
+    
+    @property
+    def bids_count(self):
+        """Number of live bids, summed from the sharded counter and cached."""
+        if not hasattr(self, '_bids_count'):
+            key = self._bids_count_cache_key(self.pk)
+            count = cache.get(key)
+            if count is None:
+                total = self.bid_counters.aggregate(total=Sum('count'))['total'] or 0
+                count = max(0, total)
+                cache.set(key, count, BID_COUNT_CACHE_TIMEOUT)
+            self._bids_count = count
+        return self._bids_count
+    
+    @classmethod
+    def load_bid_counts(cls, projects):
+        """Fill bids_count for a page of projects with one cache round trip
+        and at most one grouped SUM for the misses."""
+        projects = [project for project in projects if not hasattr(project, '_bids_count')]
+        if not projects:
+            return
+        keys = {cls._bids_count_cache_key(project.pk): project for project in projects}
+        cached = cache.get_many(keys)
+        missing = {project.pk: project for key, project in keys.items() if key not in cached}
+        for key, count in cached.items():
+            keys[key]._bids_count = count
+        if missing:
+            totals = dict(
+                ProjectBidCounter.objects.filter(project_id__in=missing)
+                .values('project_id').annotate(total=Sum('count')).values_list('project_id', 'total')
+            )
+            fresh = {}
+            for project_id, project in missing.items():
+                project._bids_count = max(0, totals.get(project_id) or 0)
+                fresh[cls._bids_count_cache_key(project_id)] = project._bids_count
+            cache.set_many(fresh, BID_COUNT_CACHE_TIMEOUT)
+    
+    def _adjust_bids(self, delta):
+        ProjectBidCounter.add(self.pk, delta)
+        self.__dict__.pop('_bids_count', None)
+        key = self._bids_count_cache_key(self.pk)
+        transaction.on_commit(lambda: cache.delete(key))
+    
     def increment_bids(self):
         """Increment bid count."""
-        self.bids_count += 1
-        self.save(update_fields=['bids_count'])
+        self._adjust_bids(1)
     
     def decrement_bids(self):
         """Decrement bid count."""
-        self.bids_count = max(0, self.bids_count - 1)
-        self.save(update_fields=['bids_count'])
+        self._adjust_bids(-1)
+
+
+class ProjectBidCounter(models.Model):
+    """One of BID_COUNTER_SLOTS counter rows per project.
+    
+    Concurrent bids land on random slots, so they rarely wait on the same
+    row lock; Project.bids_count is the sum of the slots. Individual slots
+    may go negative because a withdrawal need not hit the slot its bid did.
+    """
+    
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='bid_counters')
+    slot = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['project', 'slot']
+    
+    def __str__(self):
+        return f"{self.project_id} slot {self.slot}: {self.count}"
+    
+    @classmethod
+    def add(cls, project_id, delta, slots=BID_COUNTER_SLOTS):
+        """Atomically add delta to a random slot, creating the slot on first use."""
+        slot = random.randrange(slots)
+        if cls.objects.filter(project_id=project_id, slot=slot).update(count=F('count') + delta):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(project_id=project_id, slot=slot, count=delta)
+        except IntegrityError:
+            # Another request created the slot first
+            cls.objects.filter(project_id=project_id, slot=slot).update(count=F('count') + delta)
 
 
 class ProjectAttachment(models.Model):
@@ -0,0 +1,58 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from accounts.models import Skill
+from . import catalog
+from .models import Category, Project
+
+
+@receiver(post_save, sender=Project)
+def update_category_counts_on_save(sender, instance, created, update_fields=None, **kwargs):
+    """Keep Category project counters in step with project creates and status changes."""
+    if created:
+        Category.adjust_project_counts(
+            instance.category_id,
+            open_delta=1 if instance.status == 'open' else 0,
+            total_delta=1,
+        )
+        instance._remember_counted_state()
+        return
+    
+    if update_fields is not None and not {'status', 'category', 'category_id'} & set(update_fields):
+        return
+    
+    old_category_id = getattr(instance, '_counted_category_id', None)
+    old_status = getattr(instance, '_counted_status', None)
+    if old_category_id is None or old_status is None:
+        # Loaded without the counted fields; reconcile_category_counts repairs drift
+        return
+    
+    was_open = old_status == 'open'
+    is_open = instance.status == 'open'
+    if old_category_id != instance.category_id:
+        Category.adjust_project_counts(old_category_id, open_delta=-int(was_open), total_delta=-1)
+        Category.adjust_project_counts(instance.category_id, open_delta=int(is_open), total_delta=1)
+    elif was_open != is_open:
+        Category.adjust_project_counts(instance.category_id, open_delta=1 if is_open else -1)
+    instance._remember_counted_state()
+
+
+@receiver(post_delete, sender=Project)
+def update_category_counts_on_delete(sender, instance, **kwargs):
+    """Decrement Category project counters when a project is deleted."""
+    category_id = getattr(instance, '_counted_category_id', None) or instance.category_id
+    status = getattr(instance, '_counted_status', None) or instance.status
+    Category.adjust_project_counts(
+        category_id,
+        open_delta=-1 if status == 'open' else 0,
+        total_delta=-1,
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def invalidate_catalog(sender, **kwargs):
+    """Drop every worker's catalog copy once a category or skill edit commits."""
+    transaction.on_commit(catalog.invalidate)
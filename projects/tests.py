@@ -0,0 +1,152 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import User
+from bids.models import Bid
+from .models import BID_COUNTER_SLOTS, Category, Project, ProjectBidCounter
+
+
+def make_project(employer, category, **kwargs):
+    defaults = {
+        'title': 'Build a website',
+        'description': 'Details',
+        'category': category,
+        'employer': employer,
+        'budget_min': 100,
+        'budget_max': 500,
+        'deadline': timezone.now() + timedelta(days=7),
+        'skills_required': 'python, django',
+    }
+    defaults.update(kwargs)
+    return Project.objects.create(**defaults)
+
+
+class ShardedBidCounterTests(TestCase):
+    """Project.bids_count over ProjectBidCounter slots."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = User.objects.create_user('employer', 'employer@example.com', None, role='employer')
+        cls.category = Category.objects.create(name='Web')
+    
+    def setUp(self):
+        cache.clear()
+        self.project = make_project(self.employer, self.category)
+    
+    def fresh(self):
+        return Project.objects.get(pk=self.project.pk)
+    
+    def test_count_is_sum_of_slots(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(20):
+                self.project.increment_bids()
+            for _ in range(5):
+                self.project.decrement_bids()
+        
+        slots = ProjectBidCounter.objects.filter(project=self.project)
+        self.assertLessEqual(slots.count(), BID_COUNTER_SLOTS)
+        self.assertEqual(self.fresh().bids_count, 15)
+    
+    def test_slot_may_go_negative_but_total_never_does(self):
+        with mock.patch('projects.models.random.randrange', side_effect=[0, 1]):
+            ProjectBidCounter.add(self.project.pk, 1)
+            ProjectBidCounter.add(self.project.pk, -1)
+        self.assertEqual(
+            dict(ProjectBidCounter.objects.filter(project=self.project).values_list('slot', 'count')),
+            {0: 1, 1: -1},
+        )
+        self.assertEqual(self.fresh().bids_count, 0)
+        
+        ProjectBidCounter.objects.filter(project=self.project, slot=1).update(count=-3)
+        cache.clear()
+        self.assertEqual(self.fresh().bids_count, 0)
+    
+    def test_count_is_cached_and_invalidated_on_commit(self):
+        self.assertEqual(self.fresh().bids_count, 0)
+        with self.assertNumQueries(0):
+            self.assertEqual(Project(pk=self.project.pk).bids_count, 0)
+        
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.project.increment_bids()
+        # Not committed yet: other readers still see the cached count
+        self.assertEqual(Project(pk=self.project.pk).bids_count, 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(Project(pk=self.project.pk).bids_count, 1)
+    
+    def test_load_bid_counts_batches_lookups(self):
+        other = make_project(self.employer, self.category)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.increment_bids()
+            other.increment_bids()
+            other.increment_bids()
+        
+        projects = list(Project.objects.filter(pk__in=[self.project.pk, other.pk]).order_by('pk'))
+        with self.assertNumQueries(1):
+            Project.load_bid_counts(projects)
+        with self.assertNumQueries(0):
+            self.assertEqual([project.bids_count for project in projects], [1, 2])
+        
+        # A second page load is served from the cache
+        projects = list(Project.objects.filter(pk__in=[self.project.pk, other.pk]).order_by('pk'))
+        with self.assertNumQueries(0):
+            Project.load_bid_counts(projects)
+            self.assertEqual([project.bids_count for project in projects], [1, 2])
+
+
+class ReconcileBidCountsTests(TestCase):
+    """The reconcile_bid_counts command."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = User.objects.create_user('employer', 'employer@example.com', None, role='employer')
+        cls.category = Category.objects.create(name='Web')
+    
+    def setUp(self):
+        cache.clear()
+        self.project = make_project(self.employer, self.category)
+        for i, status in enumerate(['pending', 'pending', 'rejected', 'withdrawn']):
+            freelancer = User.objects.create_user(f'freelancer{i}', f'f{i}@example.com', None, role='freelancer')
+            Bid.objects.create(
+                project=self.project, freelancer=freelancer, amount=200,
+                delivery_time=5, proposal='Proposal', status=status,
+            )
+    
+    def reconcile(self, *args):
+        out = StringIO()
+        call_command('reconcile_bid_counts', *args, stdout=out)
+        return out.getvalue()
+    
+    def test_rewrites_drifted_slots_to_bid_rows(self):
+        ProjectBidCounter.objects.create(project=self.project, slot=2, count=7)
+        ProjectBidCounter.objects.create(project=self.project, slot=5, count=-1)
+        self.assertEqual(Project.objects.get(pk=self.project.pk).bids_count, 6)
+        
+        output = self.reconcile()
+        
+        self.assertIn(f'Project {self.project.pk}: 6 -> 3', output)
+        self.assertEqual(
+            list(ProjectBidCounter.objects.filter(project=self.project).values_list('slot', 'count')),
+            [(0, 3)],
+        )
+        self.assertEqual(Project.objects.get(pk=self.project.pk).bids_count, 3)
+    
+    def test_dry_run_writes_nothing(self):
+        ProjectBidCounter.objects.create(project=self.project, slot=2, count=7)
+        
+        output = self.reconcile('--dry-run')
+        
+        self.assertIn('Found 1 drifted', output)
+        self.assertEqual(ProjectBidCounter.objects.get(project=self.project).count, 7)
+    
+    def test_counters_in_step_are_left_alone(self):
+        ProjectBidCounter.objects.create(project=self.project, slot=4, count=3)
+        
+        self.assertIn('Reconciled 0 drifted', self.reconcile())
+        self.assertEqual(ProjectBidCounter.objects.get(project=self.project).slot, 4)
@@ -3,11 +3,14 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator
 from django.db.models import Q, Count
-from django.http import JsonResponse
+from django.http import JsonResponse, Http404
 from django.core.exceptions import PermissionDenied
 from .models import Project, Category, ProjectAttachment, ProjectMilestone
+from .catalog import get_categories, get_category, get_skills
 from accounts.models import Profile
 from accounts.decorators import employer_required, owner_required
+from bids.models import ProjectBidStats
+from bids.ranking import get_bid_ranking
 
 
 def project_list(request):
@@ -45,9 +48,10 @@ def project_list(request):
     paginator = Paginator(projects, 12)
     page_number = request.GET.get('page')
     projects = paginator.get_page(page_number)
+    Project.load_bid_counts(projects)
     
     # Get categories for filter
-    categories = Category.objects.all()
+    categories = get_categories()
     
     context = {
         'projects': projects,
@@ -67,21 +71,36 @@ def project_detail(request, pk):
     project.increment_views()
     
     # Get project bids
-    bids = project.bids.all().order_by('-created_at')
+    bids = project.bids.select_related('freelancer__profile').order_by('-created_at')
     
     # Check if user has already bid on this project
     user_bid = None
     if request.user.is_authenticated and request.user.role == 'freelancer':
         user_bid = bids.filter(freelancer=request.user).first()
     
+    # Employers can order bids by composite "best match" score
+    sort = request.GET.get('sort', '')
+    if sort == 'best' and request.user == project.employer:
+        scores = dict(get_bid_ranking(project))
+        bids = list(bids)
+        for bid in bids:
+            bid.match_score = scores.get(bid.pk)
+        bids.sort(key=lambda bid: bid.match_score if bid.match_score is not None else -1, reverse=True)
+    else:
+        sort = ''
+    
     # Get project milestones
     milestones = project.milestones.all().order_by('due_date')
     
+    bid_stats = ProjectBidStats.objects.filter(project=project, bid_count__gt=0).first()
+    
     context = {
         'project': project,
         'bids': bids,
         'user_bid': user_bid,
         'milestones': milestones,
+        'bid_stats': bid_stats,
+        'sort': sort,
     }
     return render(request, 'projects/project_detail.html', context)
 
@@ -105,7 +124,7 @@ def project_create(request):
         # Validation
         if not all([title, description, category_id, budget_min, budget_max, deadline, skills_required]):
             messages.error(request, 'Please fill in all required fields.')
-            categories = Category.objects.all()
+            categories = get_categories()
             return render(request, 'projects/project_create.html', {
                 'categories': categories,
                 'form_data': request.POST
@@ -117,28 +136,30 @@ def project_create(request):
             budget_max = float(budget_max)
             if budget_min <= 0 or budget_max <= 0:
                 messages.error(request, 'Budget values must be greater than 0.')
-                categories = Category.objects.all()
+                categories = get_categories()
                 return render(request, 'projects/project_create.html', {
                     'categories': categories,
                     'form_data': request.POST
                 })
             if budget_min > budget_max:
                 messages.error(request, 'Minimum budget cannot be greater than maximum budget.')
-                categories = Category.objects.all()
+                categories = get_categories()
                 return render(request, 'projects/project_create.html', {
                     'categories': categories,
                     'form_data': request.POST
                 })
         except (ValueError, TypeError):
             messages.error(request, 'Invalid budget values. Please enter valid numbers.')
-            categories = Category.objects.all()
+            categories = get_categories()
             return render(request, 'projects/project_create.html', {
                 'categories': categories,
                 'form_data': request.POST
             })
         
         try:
-            category = Category.objects.get(id=category_id)
+            category = get_category(category_id)
+            if category is None:
+                raise Category.DoesNotExist
             
             # Convert budget values to Decimal
             from decimal import Decimal
@@ -151,7 +172,7 @@ def project_create(request):
             deadline_datetime = parse_datetime(deadline)
             if not deadline_datetime:
                 messages.error(request, 'Invalid deadline format. Please use the date picker.')
-                categories = Category.objects.all()
+                categories = get_categories()
                 return render(request, 'projects/project_create.html', {
                     'categories': categories,
                     'form_data': request.POST
@@ -164,7 +185,7 @@ def project_create(request):
             # Check if deadline is in the past
             if deadline_datetime < timezone.now():
                 messages.error(request, 'Deadline cannot be in the past.')
-                categories = Category.objects.all()
+                categories = get_categories()
                 return render(request, 'projects/project_create.html', {
                     'categories': categories,
                     'form_data': request.POST
@@ -173,7 +194,7 @@ def project_create(request):
             project = Project.objects.create(
                 title=title.strip(),
                 description=description.strip(),
-                category=category,
+                category_id=category.id,
                 employer=request.user,
                 budget_type=budget_type,
                 budget_min=budget_min_decimal,
@@ -187,14 +208,14 @@ def project_create(request):
             return redirect('projects:detail', pk=project.pk)
         except Category.DoesNotExist:
             messages.error(request, 'Selected category does not exist.')
-            categories = Category.objects.all()
+            categories = get_categories()
             return render(request, 'projects/project_create.html', {
                 'categories': categories,
                 'form_data': request.POST
             })
         except ValueError as e:
             messages.error(request, f'Invalid input: {str(e)}')
-            categories = Category.objects.all()
+            categories = get_categories()
             return render(request, 'projects/project_create.html', {
                 'categories': categories,
                 'form_data': request.POST
@@ -203,13 +224,13 @@ def project_create(request):
             messages.error(request, f'Error creating project: {str(e)}')
             import traceback
             print(traceback.format_exc())
-            categories = Category.objects.all()
+            categories = get_categories()
             return render(request, 'projects/project_create.html', {
                 'categories': categories,
                 'form_data': request.POST
             })
     
-    categories = Category.objects.all()
+    categories = get_categories()
     context = {
         'categories': categories,
     }
@@ -246,7 +267,7 @@ def project_edit(request, pk):
                 project.deadline = deadline_datetime
             else:
                 messages.error(request, 'Invalid deadline format. Please use the date picker.')
-                categories = Category.objects.all()
+                categories = get_categories()
                 context = {
                     'project': project,
                     'categories': categories,
@@ -263,7 +284,7 @@ def project_edit(request, pk):
         except Exception as e:
             messages.error(request, f'Error updating project: {str(e)}')
     
-    categories = Category.objects.all()
+    categories = get_categories()
     context = {
         'project': project,
         'categories': categories,
@@ -332,12 +353,14 @@ def project_search(request):
     paginator = Paginator(projects, 12)
     page_number = request.GET.get('page')
     projects = paginator.get_page(page_number)
+    Project.load_bid_counts(projects)
     
-    categories = Category.objects.all()
+    categories = get_categories()
     
     context = {
         'projects': projects,
         'categories': categories,
+        'skill_options': get_skills(),
         'search_params': {
             'q': search_query,
             'category': category_id,
@@ -352,13 +375,16 @@ def project_search(request):
 
 def project_list_by_category(request, category_id):
     """List projects by category."""
-    category = get_object_or_404(Category, id=category_id)
-    projects = Project.objects.filter(category=category, status='open').order_by('-created_at')
+    category = get_category(category_id)
+    if category is None:
+        raise Http404('No Category matches the given query.')
+    projects = Project.objects.filter(category_id=category.id, status='open').order_by('-created_at')
     
     # Pagination
     paginator = Paginator(projects, 12)
     page_number = request.GET.get('page')
     projects = paginator.get_page(page_number)
+    Project.load_bid_counts(projects)
     
     context = {
         'projects': projects,
@@ -24,7 +24,7 @@ class Report(models.Model):
         ('dismissed', 'Dismissed'),
     ]
     
-    reporter = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reports_made')
+    reporter = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reports_made', null=True, blank=True, help_text="Empty for reports raised automatically")
     reported_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reports_received', null=True, blank=True)
     project = models.ForeignKey('projects.Project', on_delete=models.CASCADE, related_name='reports', null=True, blank=True)
     bid = models.ForeignKey('bids.Bid', on_delete=models.CASCADE, related_name='reports', null=True, blank=True)
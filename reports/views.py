@@ -7,6 +7,7 @@ from django.utils import timezone
 from .models import Report, ReportAttachment, ActivityLog, Notification
 from projects.models import Project
 from bids.models import Bid
+from accounts.ratelimit import rate_limit
 
 
 @login_required
@@ -42,6 +43,7 @@ def report_list(request):
     return render(request, 'reports/report_list.html', context)
 
 
+@rate_limit('reports:create', rate='10/h', burst=3)
 @login_required
 def report_create(request):
     """Create a new report."""
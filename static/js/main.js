@@ -68,7 +68,7 @@ $(document).ready(function() {
         var content = form.find('#message-content').val().trim();
         
         if (content) {
-            sendMessage(form.attr('action'), content);
+            sendMessage(form.data('send-url') || form.attr('action'), content);
             form[0].reset();
         }
     });
@@ -227,8 +227,13 @@ function sendMessage(url, content) {
         },
         success: function(response) {
             if (response.success) {
-                // Reload the page to show the new message
-                location.reload();
+                // Conversation pages append the message in place; elsewhere
+                // reload to show it
+                if (response.data && window.appendConversationMessage) {
+                    window.appendConversationMessage(response.data);
+                } else {
+                    location.reload();
+                }
             } else {
                 showAlert(response.message, 'danger');
             }
@@ -308,4 +313,51 @@ function animateOnScroll() {
 }
 
 $(window).on('scroll', animateOnScroll);
-$(document).ready(animateOnScroll);
\ No newline at end of file
+$(document).ready(animateOnScroll);
+
+// Presence: keep the user shown as online while any of their pages is
+// visible, and refresh the online dots of other users on the page
+$(document).ready(function() {
+    var presence = document.body.dataset;
+    if (!presence.heartbeatUrl) {
+        return;
+    }
+
+    function heartbeat() {
+        // Tabs share one heartbeat through localStorage
+        var last = parseInt(localStorage.getItem('freelancerhub_heartbeat_at') || '0', 10);
+        if (document.hidden || Date.now() - last < 20000) {
+            return;
+        }
+        localStorage.setItem('freelancerhub_heartbeat_at', String(Date.now()));
+        $.post(presence.heartbeatUrl, {'csrfmiddlewaretoken': presence.csrfToken});
+    }
+
+    function refreshPresence() {
+        var dots = $('[data-presence-user]');
+        if (!dots.length || document.hidden) {
+            return;
+        }
+        var ids = dots.map(function() { return this.dataset.presenceUser; }).get().filter(function(id, i, all) {
+            return all.indexOf(id) === i;
+        });
+        $.getJSON(presence.presenceUrl, {'users': ids.join(',')}, function(response) {
+            var online = response.online.map(String);
+            dots.each(function() {
+                var isOnline = online.indexOf(this.dataset.presenceUser) !== -1;
+                this.classList.toggle('online', isOnline);
+                this.title = isOnline ? 'Online' : 'Offline';
+            });
+        });
+    }
+
+    heartbeat();
+    setInterval(heartbeat, 25000);
+    setInterval(refreshPresence, 30000);
+    document.addEventListener('visibilitychange', function() {
+        if (!document.hidden) {
+            heartbeat();
+            refreshPresence();
+        }
+    });
+});